@@ -1,83 +1,170 @@
-from fastapi import FastAPI, Request
-from pydantic import BaseModel
+from utils.startup_report import startup_report
+
+with startup_report.track("web_framework"):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+    from pydantic import BaseModel
+
 from typing import Optional, Dict, Any
 from datetime import datetime
-import requests
+import asyncio
 import os
 import logging
+import io
+import tempfile
+import uuid
 import json
+
+with startup_report.track("config"):
+    from config.fusion_settings import (
+        FIELD_QUESTIONS,
+        REQUIRED_FIELDS,
+        COLLECTED_FIELDS,
+        SESSION_STORE,
+        SESSION_DB_PATH,
+        SESSION_IDLE_TTL,
+        LOG_LEVEL,
+        LOG_FORMAT,
+        LOG_MAX_CHARS,
+        LOG_PAYLOAD_SAMPLE_RATE,
+        IDEMPOTENCY_WINDOW,
+        IDEMPOTENCY_MAX_KEYS,
+        OUTBOX_ENABLED,
+        OUTBOX_DB_PATH,
+        OUTBOX_WORKERS,
+        OUTBOX_MAX_ATTEMPTS,
+        OUTBOX_RETRY_BASE,
+        OUTBOX_RETRY_MAX,
+        OUTBOX_LEASE_SECONDS,
+        BULK_CONCURRENCY,
+        BULK_RATE_LIMIT,
+        BULK_BATCH_SIZE,
+        BULK_CHECKPOINT_DIR,
+        BULK_MAX_UPLOAD_BYTES,
+        BULK_SPOOL_BYTES
+    )
+
+# Gemini / Fusion clients are created lazily on first use (or by warm-up)
+with startup_report.track("agent_modules"):
+    from gemini_agent import extraction_cache, get_client as get_gemini_client
+    from extraction_service import extraction_service
+    from utils.session_manager import (
+        init_session, merge_session, get_missing_fields, record_created, conversation_stats
+    )
+    from fusion_validator import validate_fields
+    from fusion_client import create_results, find_supplier, get_fusion_client, fusion_stats
+    from config.tenants import tenants, current_tenant, use_tenant
+    import supplier_children
+    from supplier_children import create_supplier_with_children, children_message
+    from utils.token_manager import TokenManager
+    from utils.executor import run_blocking, shutdown_executor
+    from utils.work_queue import ConversationWorkQueue
+    from utils.session_store import create_session_store, SessionConflict
+    from utils import fast_extractor
+    from utils.fast_extractor import fast_extract
+    from utils.metrics import REGISTRY, track_stage
+    from utils.tracing import new_trace_id
+    from utils.log_setup import setup_logging, log_payload, dropped_records
+    from utils.profiler import profiler
+    from utils.lov_cache import get_lov_cache, get_lov_index
+    from utils.countries import country_index, lookup_country, normalize_taxpayer_id
+    from utils.supplier_index import supplier_index, duplicate_message
+    from utils.idempotency import SeenSet, IdempotentResults
+    from utils.outbox import Outbox
+    from utils.bot_sender import BotSender, SendQueueFull
+    import bulk_onboarding
  
-from gemini_agent import extract_supplier_payload
-from utils.session_manager import init_session, merge_session, get_missing_fields
-from fusion_validator import validate_against_fusion
-from fusion_client import create_supplier
-from config.fusion_settings import FIELD_QUESTIONS, REQUIRED_FIELDS
- 
+setup_logging(LOG_LEVEL, json_output=LOG_FORMAT == "json", max_chars=LOG_MAX_CHARS)
+logger = logging.getLogger("supplier_agent")
+
 app = FastAPI()
-logging.basicConfig(level=logging.INFO)
+
+TRACE_IDS_ENABLED = os.getenv("AGENT_TRACE_IDS", "false").lower() == "true"
+PROFILER_ENABLED = os.getenv("AGENT_PROFILER_ENABLED", "false").lower() == "true"
+WARMUP_ENABLED = os.getenv("AGENT_WARMUP", "false").lower() == "true"
  
 # ------------------------------------------------------------------
-# In-memory session store (POC only)
+# Session store (memory or SQLite, see SESSION_STORE)
 # ------------------------------------------------------------------
-sessions = {}
+with startup_report.track("session_store"):
+    sessions = create_session_store(SESSION_STORE, SESSION_DB_PATH, SESSION_IDLE_TTL)
  
 # ------------------------------------------------------------------
 # Azure Bot Authentication
 # ------------------------------------------------------------------
 MICROSOFT_APP_ID = os.getenv("MICROSOFT_APP_ID")
 MICROSOFT_APP_PASSWORD = os.getenv("MICROSOFT_APP_PASSWORD")
- 
-def get_access_token():
+BOT_TOKEN_URL = os.getenv(
+    "BOT_TOKEN_URL",
+    "https://login.microsoftonline.com/fb21dfed-763b-4605-968f-94816723486b/oauth2/v2.0/token"
+)
+
+token_manager = TokenManager(
+    token_url=BOT_TOKEN_URL,
+    client_id=MICROSOFT_APP_ID,
+    client_secret=MICROSOFT_APP_PASSWORD,
+    scope="https://api.botframework.com/.default",
+    refresh_margin=int(os.getenv("BOT_TOKEN_REFRESH_MARGIN", "300"))
+)
 
-    url = "https://login.microsoftonline.com/fb21dfed-763b-4605-968f-94816723486b/oauth2/v2.0/token"
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": os.getenv("MICROSOFT_APP_ID"),
-        "client_secret": os.getenv("MICROSOFT_APP_PASSWORD"),
-        "scope": "https://api.botframework.com/.default"
-    }
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded"
-
-    }
-    r = requests.post(url, data=data, headers=headers)
-    r.raise_for_status()
-    return r.json()["access_token"]
+def get_access_token():
+    # cached; only hits login.microsoftonline.com near / after expiry
+    with track_stage("bot_token") as t:
+        misses = token_manager.misses
+        token = token_manager.get_token()
+        t.outcome = "fetched" if token_manager.misses != misses else "cached"
+    return token
+
+
+# pooled, queued outbound sender (one keep-alive pool per serviceUrl)
+bot_sender = BotSender(
+    get_token=get_access_token,
+    on_unauthorized=token_manager.invalidate,
+    workers=int(os.getenv("BOT_SEND_WORKERS", "8")),
+    max_queue=int(os.getenv("BOT_SEND_MAX_QUEUE", "1000")),
+    block_timeout=float(os.getenv("BOT_SEND_BLOCK_SECONDS", "2")),
+    coalesce_window=float(os.getenv("BOT_SEND_COALESCE_MS", "0")) / 1000,
+    max_retries=int(os.getenv("BOT_SEND_MAX_RETRIES", "3"))
+)
+
+
+def reply_dropped(activity: dict):
+    # sending inline would overtake this conversation's queued replies
+    logger.error(
+        "Reply dropped, bot send queue full (conversation %s)",
+        (activity.get("conversation") or {}).get("id")
+    )
 
 
 def send_activity(activity: dict, text: str):
-    try:
-        token = get_access_token()
-
-        # ✅ Normalize "from"
-        sender = activity.get("from") or activity.get("from_")
-        recipient = activity.get("recipient")
-
-        if not sender or not recipient:
-            logging.error("Invalid activity payload for sending message")
-            logging.error(activity)
-            return
-
-        url = f"{activity['serviceUrl']}/v3/conversations/{activity['conversation']['id']}/activities"
-
-        payload = {
-            "type": "message",
-            "from": recipient,   # BOT
-            "recipient": sender, # USER
-            "conversation": activity["conversation"],
-            "replyToId": activity.get("id"),
-            "text": text
-        }
-
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+    # outbox threads: the outbox row is already settled, so this is the only copy
+    # of the result; wait for room as long as it takes rather than drop it
+    while True:
+        try:
+            queued = bot_sender.submit(activity, text)
+            break
+        except SendQueueFull:
+            logger.warning(
+                "Bot send queue full, still waiting to post a result (conversation %s)",
+                (activity.get("conversation") or {}).get("id")
+            )
+    # sent inline only when the sender is not running
+    if not queued:
+        bot_sender.send_now(activity, text)
 
-        requests.post(url, headers=headers, json=payload)
 
-    except Exception:
-        logging.exception("Failed to send activity")
+async def reply(activity: dict, text: str):
+    try:
+        queued = bot_sender.submit(activity, text, block=False)
+    except SendQueueFull:
+        # wait for room on the I/O pool, not the event loop
+        try:
+            queued = await run_blocking(bot_sender.submit, activity, text)
+        except SendQueueFull:
+            return reply_dropped(activity)
+    if not queued:
+        # token fetch + outbound POST run on the I/O pool, not the event loop
+        await run_blocking(bot_sender.send_now, activity, text)
 
 # ------------------------------------------------------------------
 # Azure Bot Activity Model (SAFE)
@@ -97,6 +184,84 @@ class BotActivity(BaseModel):
         fields = {"from_": "from"}
  
 
+# ------------------------------------------------------------------
+# Background turn processing
+# ------------------------------------------------------------------
+work_queue = ConversationWorkQueue(
+    handler=lambda activity_json: process_turn(activity_json),
+    workers=int(os.getenv("AGENT_QUEUE_WORKERS", "16")),
+    max_depth=int(os.getenv("AGENT_QUEUE_MAX_DEPTH", "1000"))
+)
+
+# activity ids already accepted by this process (redeliveries are dropped in the webhook)
+seen_activities = SeenSet(window=IDEMPOTENCY_WINDOW, max_keys=IDEMPOTENCY_MAX_KEYS)
+
+
+# ------------------------------------------------------------------
+# Confirmed creates: durable outbox drained by background workers
+# ------------------------------------------------------------------
+outbox = Outbox(
+    OUTBOX_DB_PATH,
+    workers=OUTBOX_WORKERS,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    retry_base=OUTBOX_RETRY_BASE,
+    retry_max=OUTBOX_RETRY_MAX,
+    lease_seconds=OUTBOX_LEASE_SECONDS
+) if OUTBOX_ENABLED else None
+
+# what send_activity needs to post into the conversation later
+REPLY_CONTEXT_KEYS = ("id", "serviceUrl", "channelId", "conversation", "from", "recipient")
+
+
+def create_result_message(status, response):
+    if status == 201 and isinstance(response, dict):
+        children = children_message(response.get("children"))
+        return (
+            "✅ **Success! Supplier created.**\n\n"
+            f"Supplier ID: {response.get('SupplierId', 'N/A')}\n"
+            f"Supplier Number: {response.get('SupplierNumber', 'N/A')}"
+            + (f"\n\n{children}" if children else "")
+        )
+
+    # FAILURE: Send the exact error string to Azure Chat
+    # If response is a dict, convert it to a readable string
+    error_detail = json.dumps(response, indent=2) if isinstance(response, dict) else str(response)
+
+    return (
+        f"❌ **Fusion API Error ({status})**\n\n"
+        f"Please check the details below:\n"
+        f"```\n{error_detail}\n```"
+    )
+
+
+def submit_outbox_item(item):
+    with use_tenant(item["context"].get("tenant")):
+        # an earlier attempt may have created the supplier before timing out / crashing
+        existing = None
+        if item["attempts"] > 1:
+            existing = find_supplier(item["payload"].get("Supplier"))
+            if existing:
+                logger.info("Outbox item %s already created in Fusion, not resubmitting", item["id"])
+        return create_supplier_with_children(item["payload"], idempotency_key=item["key"], existing=existing)
+
+
+def outbox_status_message(key):
+    item = outbox.get(key)
+    if item is not None and item["status"] == "done":
+        return "This supplier was already submitted.\n\n" + create_result_message(201, item["result"])
+    return (
+        "⏳ This supplier is already being submitted to Fusion "
+        "(attempt {}). I'll post the result here.".format(item["attempts"] if item else 0)
+    )
+
+
+def notify_outbox_result(item, status, response):
+    if status == 201 and isinstance(response, dict):
+        supplier_index.add({**item["payload"], **response}, tenant=item["context"].get("tenant"))
+        record_created(item["context"].get("turns"))
+    send_activity(item["context"], create_result_message(status, response))
+
+
 # ------------------------------------------------------------------
 # Health
 # ------------------------------------------------------------------
@@ -106,9 +271,181 @@ def root():
  
 @app.get("/health")
 def health():
+    startup_report.mark_healthy()
     return {"status": "ok"}
- 
- 
+
+@app.get("/startup")
+def startup_timings():
+    return startup_report.report()
+
+def warm_up():
+    # runs in a background thread after startup; /health is already being served
+    for name, fn in (
+        ("warmup_gemini_client", get_gemini_client),
+        ("warmup_fusion_connection", lambda: get_fusion_client().warm_up()),
+        ("warmup_bot_token", token_manager.get_token),
+    ):
+        try:
+            with startup_report.track(name):
+                fn()
+        except Exception as e:
+            logger.info("Warm-up step %s failed: %s", name, e)
+    startup_report.log()
+
+async def purge_sessions_loop():
+    while True:
+        await asyncio.sleep(300)
+        try:
+            purged = await run_blocking(sessions.purge_expired)
+            if purged:
+                logger.info("Purged %s idle sessions", purged)
+            if outbox is not None:
+                await run_blocking(outbox.purge)
+        except Exception:
+            logger.exception("Session purge failed")
+
+@app.on_event("startup")
+async def startup():
+    work_queue.start()
+    bot_sender.start()
+    get_lov_cache().start()
+    supplier_index.start()
+    if outbox is not None:
+        outbox.start(submit_outbox_item, notify_outbox_result)
+    app.state.session_purger = asyncio.create_task(purge_sessions_loop())
+    if WARMUP_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+    else:
+        startup_report.log()
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.session_purger.cancel()
+    get_lov_cache().stop()
+    supplier_index.stop()
+    if outbox is not None:
+        outbox.stop()
+    await work_queue.stop()
+    bot_sender.stop()
+    shutdown_executor()
+
+STATS_SOURCES = {
+    "token": token_manager.stats,
+    "queue": work_queue.stats,
+    "bot_sender": bot_sender.stats,
+    "fusion": fusion_stats,
+    "tenants": tenants.stats,
+    "fast_path": fast_extractor.stats,
+    "extraction_cache": extraction_cache.stats,
+    "sessions": sessions.stats,
+    "gemini": extraction_service.stats,
+    "profiler": profiler.stats,
+    "lov": lambda: get_lov_cache().stats(),
+    "countries": country_index.stats,
+    "supplier_children": supplier_children.stats,
+    "supplier_index": supplier_index.stats,
+    "outbox": lambda: outbox.stats() if outbox is not None else {},
+    "conversations": conversation_stats,
+    "idempotency": lambda: {
+        "activities_suppressed": seen_activities.suppressed,
+        "creates_replayed": create_results.replayed,
+    },
+    "logging": lambda: {"dropped_records": dropped_records()}
+}
+
+for _name, _fn in STATS_SOURCES.items():
+    REGISTRY.register_stats(_name, _fn)
+
+@app.get("/stats")
+def stats():
+    return {name: fn() for name, fn in STATS_SOURCES.items()}
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# ------------------------------------------------------------------
+# Runtime sampling profiler (AGENT_PROFILER_ENABLED=true)
+# ------------------------------------------------------------------
+@app.post("/debug/profiler/start")
+def profiler_start(interval: float = 0.01):
+    if not PROFILER_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    started = profiler.start(interval=max(0.001, interval))
+    return {"started": started, **profiler.stats()}
+
+@app.post("/debug/profiler/stop")
+def profiler_stop(top: Optional[int] = None):
+    if not PROFILER_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    profiler.stop()
+    # collapsed stacks: feed to flamegraph.pl / speedscope
+    return PlainTextResponse(profiler.collapsed(top))
+
+
+# ------------------------------------------------------------------
+# Bulk onboarding: CSV / JSONL body in, NDJSON results out
+# ------------------------------------------------------------------
+@app.post("/bulk/suppliers")
+async def bulk_suppliers(
+    request: Request,
+    job_id: Optional[str] = None,
+    format: Optional[str] = None,
+    concurrency: int = BULK_CONCURRENCY,
+    rate: float = BULK_RATE_LIMIT,
+    batch_size: int = BULK_BATCH_SIZE
+):
+    fmt = format or bulk_onboarding.detect_format(request.headers.get("content-type"))
+
+    # rate <= 0 would switch the limiter off; callers may only go slower than configured
+    if not rate > 0:
+        return JSONResponse(status_code=400, content={"detail": "rate must be greater than 0"})
+    if BULK_RATE_LIMIT > 0:
+        rate = min(rate, BULK_RATE_LIMIT)
+
+    # re-POSTing the same file with the same job_id skips rows already finished
+    checkpoint = None
+    if job_id:
+        if not job_id.replace("-", "").replace("_", "").isalnum():
+            return JSONResponse(status_code=400, content={"detail": "job_id must be alphanumeric"})
+        os.makedirs(BULK_CHECKPOINT_DIR, exist_ok=True)
+        checkpoint = os.path.join(BULK_CHECKPOINT_DIR, f"{job_id}.ckpt")
+
+    # spool the upload chunk by chunk (memory, then a temp file) instead of one big body
+    upload = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if BULK_MAX_UPLOAD_BYTES and size > BULK_MAX_UPLOAD_BYTES:
+            upload.close()
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload larger than {BULK_MAX_UPLOAD_BYTES} bytes"}
+            )
+        await run_blocking(upload.write, chunk)
+    upload.seek(0)
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+
+    results = bulk_onboarding.run_job(
+        bulk_onboarding.read_rows(stream, fmt),
+        job_id=job_id or uuid.uuid4().hex,
+        checkpoint_path=checkpoint,
+        concurrency=max(1, min(concurrency, 32)),
+        rate=rate,
+        batch_size=batch_size
+    )
+    def ndjson():
+        try:
+            for r in results:
+                yield json.dumps(r, default=str) + "\n"
+        finally:
+            stream.close()
+
+    # sync generator -> Starlette iterates it on its threadpool
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 # ------------------------------------------------------------------
 # Supplier Agent Endpoint
 # ------------------------------------------------------------------
@@ -116,71 +453,279 @@ def health():
 async def supplier_agent(request: Request):
     activity_json = await request.json()
 
-    logging.info("===== AZURE PAYLOAD =====")
-    logging.info(activity_json)
-    logging.info("=========================")
+    log_payload(logger, "AZURE PAYLOAD", activity_json, rate=LOG_PAYLOAD_SAMPLE_RATE)
 
     activity_type = activity_json.get("type")
 
     # --------------------------------------------------------------
     # Ignore typing / ping
     # --------------------------------------------------------------
-    if activity_type in ["typing", "ping"]:
+    if activity_type not in ["conversationUpdate", "message"]:
+        return {"status": "ok"}
+
+    # --------------------------------------------------------------
+    # Ack now, process in the background (ordered per conversation)
+    # --------------------------------------------------------------
+    conversation_id = (activity_json.get("conversation") or {}).get("id", "")
+
+    # Bot Service redelivers on slow acks; drop repeats before any work is queued
+    activity_id = activity_json.get("id")
+    seen_key = f"{conversation_id}|{activity_id}" if activity_id else None
+    if seen_key and not seen_activities.check_and_add(seen_key):
+        logger.info("Duplicate activity %s suppressed", activity_id)
         return {"status": "ok"}
 
+    if not work_queue.submit(conversation_id, activity_json):
+        # 503 -> Bot Service redelivers; that retry must not count as a duplicate
+        if seen_key:
+            seen_activities.discard(seen_key)
+        logger.warning("Work queue full, rejecting activity %s", activity_id)
+        return JSONResponse(status_code=503, content={"status": "busy"})
+
+    return {"status": "ok"}
+
+
+async def process_turn(activity_json: dict):
+    if TRACE_IDS_ENABLED:
+        new_trace_id((activity_json.get("conversation") or {}).get("id"))
+    # Fusion pod for this conversation / channel (config/tenants.py)
+    current_tenant.set(tenants.resolve(activity_json))
+    for attempt in range(2):
+        try:
+            with track_stage("turn"):
+                await handle_activity(activity_json)
+            return
+        except SessionConflict as e:
+            # another worker / process advanced this conversation concurrently;
+            # state is saved before any reply, so the turn can run again on it
+            if attempt == 0:
+                logger.info("Session conflict for conversation %s, retrying the turn", e)
+                continue
+            logger.warning("Session conflict for conversation %s, asking to resend", e)
+            await reply(activity_json, "Sorry, I lost track of that message. Please send it again.")
+
+
+# ------------------------------------------------------------------
+# Direct chat (Streamlit / internal / load tests): same state machine,
+# reply in the HTTP response instead of via the Bot Framework connector
+# ------------------------------------------------------------------
+class ChatRequest(BaseModel):
+    message: str
+    sessionId: Optional[str] = None
+    tenant: Optional[str] = None
+
+
+def chat_activity(body: ChatRequest, session_id: str):
+    return {
+        "type": "message",
+        "id": uuid.uuid4().hex,
+        "channelId": "direct",
+        "text": body.message,
+        "conversation": {"id": f"direct:{session_id}"},
+        "channelData": {"fusionTenant": body.tenant} if body.tenant else {},
+        "from": {"id": "direct-user"},
+        "recipient": {"id": "supplier-agent"}
+    }
+
+
+def unknown_tenant(body: ChatRequest):
+    if body.tenant and body.tenant not in tenants.names():
+        return JSONResponse(status_code=400, content={"detail": f"Unknown tenant: {body.tenant}"})
+    return None
+
+
+async def run_direct_turn(activity_json: dict, send):
+    if TRACE_IDS_ENABLED:
+        new_trace_id(activity_json["conversation"]["id"])
+    current_tenant.set(tenants.resolve(activity_json))
+    with track_stage("turn"):
+        await handle_activity(activity_json, send=send, direct=True)
+
+
+@app.post("/chat")
+async def chat(body: ChatRequest):
+    error = unknown_tenant(body)
+    if error:
+        return error
+    session_id = body.sessionId or uuid.uuid4().hex
+    replies, result = [], {}
+
+    async def collect(text, **fields):
+        replies.append(text)
+        result.update(fields)
+
+    try:
+        await run_direct_turn(chat_activity(body, session_id), collect)
+    except SessionConflict:
+        return JSONResponse(
+            status_code=409,
+            content={"reply": "Another message for this session is still being processed.", "sessionId": session_id}
+        )
+
+    return {"reply": "\n\n".join(replies), "sessionId": session_id, **result}
+
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatRequest):
+    """
+    Server-Sent Events: `typing` right away, one `message` per reply as soon
+    as it is produced, then `done` with sessionId (+ SupplierId/SupplierNumber).
+    """
+    error = unknown_tenant(body)
+    if error:
+        return error
+    session_id = body.sessionId or uuid.uuid4().hex
+    events = asyncio.Queue()
+
+    async def push(text, **fields):
+        await events.put(("message", {"reply": text, **fields}))
+
+    async def run():
+        try:
+            await run_direct_turn(chat_activity(body, session_id), push)
+        except SessionConflict:
+            await events.put(("error", {"reply": "Another message for this session is still being processed."}))
+        except Exception:
+            logger.exception("Direct chat turn failed")
+            await events.put(("error", {"reply": "Something went wrong, please try again."}))
+        finally:
+            await events.put(("done", {"sessionId": session_id}))
+
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            yield f"event: typing\ndata: {json.dumps({'sessionId': session_id})}\n\n"
+            while True:
+                event, data = await events.get()
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                if event == "done":
+                    break
+        finally:
+            # client went away: let the turn finish, it owns session state
+            await asyncio.shield(task)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+START_COMMANDS = ("create supplier", "create a supplier")
+
+
+def start_command(user_input: str):
+    # "create supplier" alone, or followed by the supplier details
+    for command in START_COMMANDS:
+        rest = user_input[len(command):]
+        if user_input.startswith(command) and (not rest or not rest[0].isalnum()):
+            return command
+    return None
+
+
+def captured_message(session: dict, changed: list):
+    # several fields from one message: say what we took before asking the next
+    if len(changed) < 2:
+        return ""
+    return "✅ Got " + ", ".join(f"{f}: {session[f]}" for f in changed) + "\n\n"
+
+
+async def reask(conversation_id: str, state: dict, session: dict, errors: dict, send):
+    # clear every rejected field and ask for the first one again
+    for field in errors:
+        session[field] = None
+    field = next(f for f in COLLECTED_FIELDS if f in errors)
+
+    state["session"] = session
+    state["state"] = "COLLECTING"
+    state["current_field"] = field
+    await save_state(conversation_id, state)
+
+    messages = [m for f in COLLECTED_FIELDS for m in errors.get(f, [])]
+    question = FIELD_QUESTIONS.get(field, f"Please provide {field}.")
+    await send("Validation failed:\n" + "\n".join(messages) + "\n\n" + question)
+
+
+async def save_state(conversation_id: str, state: dict):
+    await run_blocking(sessions.save, conversation_id, state)
+
+
+async def drop_state(conversation_id: str):
+    await run_blocking(sessions.delete, conversation_id)
+
+
+async def handle_activity(activity_json: dict, send=None, direct=False):
+    """
+    One turn of the supplier state machine.
+
+    send:   async callable(text, **result) delivering a reply; defaults to
+            posting back through the Bot Framework connector
+    direct: caller waits for the answer (/chat), so create inline rather
+            than through the outbox
+    """
+    if send is None:
+        send = lambda text, **result: reply(activity_json, text)
+
+    activity_type = activity_json.get("type")
+
     # --------------------------------------------------------------
     # Conversation start
     # --------------------------------------------------------------
     if activity_type == "conversationUpdate":
         if activity_json.get("membersAdded"):
-            send_activity(activity_json, "👋 Hi! Type **create supplier** to begin.")
-        return {"status": "ok"}
+            await send("👋 Hi! Type **create supplier** to begin.")
+        return
 
     # --------------------------------------------------------------
     # Only MESSAGE activities
     # --------------------------------------------------------------
     if activity_type != "message":
-        return {"status": "ok"}
+        return
 
     activity = BotActivity(**activity_json)
     activity_dict = activity.model_dump(by_alias=True)
 
     if not activity.text:
-        return {"status": "ok"}
+        return
 
     conversation_id = activity_dict["conversation"]["id"]
-    user_input = activity.text.strip().lower()
+    text = activity.text.strip()
+    user_input = text.lower()
 
     # ==============================================================
     # ✅ FIXED INIT SESSION LOGIC
     # ==============================================================
-    if conversation_id not in sessions:
+    state = await run_blocking(sessions.get, conversation_id)
+
+    if state is None:
 
         # ---- enforce command trigger ----
-        if user_input not in ["create supplier", "create a supplier"]:
-            send_activity(
-                activity_json,
+        command = start_command(user_input)
+        if command is None:
+            await send(
                 "Please type **create supplier** to start supplier creation."
             )
-            return {"status": "ok"}
+            return
 
         # ---- explicitly start supplier flow ----
         session = init_session()
-        first_field = REQUIRED_FIELDS[0]
+        first_field = COLLECTED_FIELDS[0]
 
-        sessions[conversation_id] = {
+        state = {
             "session": session,
             "current_field": first_field,
-            "state": "COLLECTING"
+            "state": "COLLECTING",
+            "turns": 1
         }
 
-        send_activity(activity_json, FIELD_QUESTIONS[first_field])
-        return {"status": "ok"}
+        # one-shot intake: "create supplier Acme Corp, EIN 12-3456789, ..."
+        text = text[len(command):].strip(" :,-\n")
+        if not text:
+            await save_state(conversation_id, state)
+            await send(FIELD_QUESTIONS[first_field])
+            return
+    else:
+        state["turns"] = state.get("turns", 0) + 1
 
     # ==============================================================
     # RESTORE SESSION
     # ==============================================================
-    state = sessions[conversation_id]
     session = state["session"]
     current_field = state["current_field"]
     mode = state["state"]
@@ -192,88 +737,150 @@ async def supplier_agent(request: Request):
         decision = user_input
 
         if decision == "yes":
-            # 1. Trigger the API
-            status, response = create_supplier(session)
-            
-            # 2. DEBUG LOGGING: This will show up in your Render logs
-            logging.info(f"--- FUSION DEBUG START ---")
-            logging.info(f"Status: {status}")
-            logging.info(f"Raw Response: {response}")
-            logging.info(f"--- FUSION DEBUG END ---")
+            # the index may have caught up since COLLECTING; don't burn a create on it
+            duplicates = supplier_index.find_duplicates(session)
+            if duplicates:
+                await save_state(conversation_id, state)
+                await send(
+                    duplicate_message(duplicates)
+                    + "\n\nType **edit** to change the details or **cancel**."
+                )
+                return
+
+            if outbox is not None and not direct:
+                # 1. Persist, ack now; the outbox worker posts the result later
+                key = IdempotentResults.make_key(conversation_id, payload=session)
+                context = {k: activity_json.get(k) for k in REPLY_CONTEXT_KEYS}
+                context["turns"] = state.get("turns")
+                context["tenant"] = current_tenant.get()
+                if not await run_blocking(outbox.enqueue, key, session, context):
+                    # same details confirmed before: say where that submission stands
+                    await drop_state(conversation_id)
+                    await send(await run_blocking(outbox_status_message, key))
+                    return
+                await drop_state(conversation_id)
+                await send(
+                    "⏳ Submitting the supplier to Fusion. "
+                    "I'll post the Supplier ID and Number here as soon as it is created."
+                )
+                return
+
+            # 1. Trigger the API (supplier, then its child resources level by level)
+            status, response = await run_blocking(
+                create_supplier_with_children, session, idempotency_key=conversation_id
+            )
+            # (fusion_client logs the response; no second copy here)
 
-            sessions.pop(conversation_id, None)
+            await drop_state(conversation_id)
 
             # 3. Handle the Response
             if status == 201 and isinstance(response, dict):
-                supplier_id = response.get("SupplierId", "N/A")
-                supplier_number = response.get("SupplierNumber", "N/A")
-
-                send_activity(
-                    activity_json,
-                    "✅ **Success! Supplier created.**\n\n"
-                    f"Supplier ID: {supplier_id}\n"
-                    f"Supplier Number: {supplier_number}"
-                )
-                return {"status": "ok"}
-
-            else:
-                # FAILURE: Send the exact error string to Azure Chat
-                # If response is a dict, convert it to a readable string
-                error_detail = json.dumps(response, indent=2) if isinstance(response, dict) else str(response)
-                
-                error_message = (
-                    f"❌ **Fusion API Error ({status})**\n\n"
-                    f"Please check the details below:\n"
-                    f"```\n{error_detail}\n```"
+                supplier_index.add({**session, **response})
+                record_created(state.get("turns"))
+                await send(
+                    create_result_message(status, response),
+                    SupplierId=response.get("SupplierId"),
+                    SupplierNumber=response.get("SupplierNumber"),
+                    children=response.get("children")
                 )
-                
-                send_activity(activity_json, error_message)
-            
-            return {"status": "ok"}
+                return
+            await send(create_result_message(status, response))
+            return
 
 
         if decision == "edit":
             state["state"] = "EDIT"
-            send_activity(
-                activity_json,
+            await save_state(conversation_id, state)
+            await send(
                 "Which field do you want to edit?\n" +
-                "\n".join(f"{i+1}. {f}" for i, f in enumerate(REQUIRED_FIELDS))
+                "\n".join(f"{i+1}. {f}" for i, f in enumerate(COLLECTED_FIELDS))
             )
-            return {"status": "ok"}
+            return
 
         if decision == "cancel":
-            sessions.pop(conversation_id, None)
-            send_activity(activity_json, "❌ Supplier creation cancelled.")
-            return {"status": "ok"}
+            await drop_state(conversation_id)
+            await send("❌ Supplier creation cancelled.")
+            return
 
-        send_activity(activity_json, "Please type: yes, edit, or cancel.")
-        return {"status": "ok"}
+        # keep the turn count
+        await save_state(conversation_id, state)
+        await send("Please type: yes, edit, or cancel.")
+        return
 
     # --------------------------------------------------------------
     # EDIT MODE
     # --------------------------------------------------------------
     if mode == "EDIT":
-        field_map = {str(i + 1): f for i, f in enumerate(REQUIRED_FIELDS)}
+        field_map = {str(i + 1): f for i, f in enumerate(COLLECTED_FIELDS)}
 
         if user_input in field_map:
             field = field_map[user_input]
+            # the next answer replaces the old value, even one only the raw-text fallback takes
+            session[field] = None
             state["current_field"] = field
             state["state"] = "COLLECTING"
-            send_activity(activity_json, FIELD_QUESTIONS[field])
+            await save_state(conversation_id, state)
+            await send(FIELD_QUESTIONS.get(field, f"Please provide {field}."))
         else:
-            send_activity(activity_json, "Invalid choice. Try again.")
+            await save_state(conversation_id, state)
+            await send("Invalid choice. Try again.")
 
-        return {"status": "ok"}
+        return
 
     # --------------------------------------------------------------
     # COLLECTING MODE
     # --------------------------------------------------------------
+    changed = []
+
     if current_field:
-        extracted = extract_supplier_payload(user_input)
+        before = {f: session.get(f) for f in COLLECTED_FIELDS}
+
+        # cheap rule-based path first; Gemini only when it isn't confident
+        extracted = fast_extract(current_field, text)
+        if extracted is None:
+            # only ask Gemini for the field in question + what is still missing
+            fields = [current_field] + [f for f in get_missing_fields(session) if f != current_field]
+            extracted = await extraction_service.extract(text, fields)
         session = merge_session(session, extracted)
 
-        if not session.get(current_field):
-            session[current_field] = activity.text.strip()
+        # snap LOV answers ("corp", "CORPORATION", lookup codes) to Fusion's meaning
+        lov = get_lov_index()
+        for field in lov.fields:
+            canonical = lov.lookup(field, session.get(field))
+            if canonical:
+                session[field] = canonical
+
+        # "usa", "Deutschland", "Untied Kingdom" -> ISO name; TaxpayerId in that country's format
+        country = lookup_country(session.get("TaxpayerCountry"))
+        if country:
+            session["TaxpayerCountry"] = country
+        session["TaxpayerId"] = normalize_taxpayer_id(session.get("TaxpayerCountry"), session.get("TaxpayerId"))
+
+        # a bare answer nothing could parse is taken as-is for the asked field;
+        # a message that filled other fields just moves on
+        if not session.get(current_field) and not any(extracted.values()):
+            session[current_field] = text
+
+        changed = [f for f in COLLECTED_FIELDS if session.get(f) != before[f]]
+
+        # validate what this message filled; reject and re-ask right away
+        errors = validate_fields(session, changed)
+        if errors:
+            await reask(conversation_id, state, session, errors, send)
+            return
+
+        # duplicate name / TaxpayerId / DUNS: ask again now, not after a failed create
+        duplicates = supplier_index.find_duplicates(session)
+        if duplicates:
+            for field in duplicates:
+                session[field] = None
+            state["session"] = session
+            state["current_field"] = next(iter(duplicates))
+            await save_state(conversation_id, state)
+            await send(
+                duplicate_message(duplicates) + "\n\n" + FIELD_QUESTIONS[state["current_field"]]
+            )
+            return
 
     state["session"] = session
     state["current_field"] = None
@@ -283,33 +890,35 @@ async def supplier_agent(request: Request):
     if missing:
         next_field = missing[0]
         state["current_field"] = next_field
-        send_activity(activity_json, FIELD_QUESTIONS[next_field])
-        return {"status": "ok"}
+        await save_state(conversation_id, state)
+        question = FIELD_QUESTIONS.get(next_field, f"Please provide {next_field}.")
+        await send(captured_message(session, changed) + question)
+        return
 
     # --------------------------------------------------------------
     # FINAL VALIDATION
     # --------------------------------------------------------------
-    errors = validate_against_fusion(session)
+    errors = validate_fields(session, REQUIRED_FIELDS)
     if errors:
-        send_activity(activity_json, "Validation failed:\n" + "\n".join(errors))
-        return {"status": "ok"}
+        await reask(conversation_id, state, session, errors, send)
+        return
 
     # --------------------------------------------------------------
     # CONFIRM SUMMARY
     # --------------------------------------------------------------
     summary = "\n".join(
         f"{i+1}. {f}: {session[f]}"
-        for i, f in enumerate(REQUIRED_FIELDS)
+        for i, f in enumerate(COLLECTED_FIELDS)
     )
 
     state["state"] = "CONFIRM"
+    await save_state(conversation_id, state)
 
-    send_activity(
-        activity_json,
+    await send(
         "Please review the supplier details:\n\n"
         + summary
         + "\n\nConfirm? (yes / edit / cancel)"
     )
 
-    return {"status": "ok"}
+    return
  
\ No newline at end of file
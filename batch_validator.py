@@ -0,0 +1,177 @@
+#columnar (numpy) validation for large supplier files
+import csv
+
+import numpy as np
+
+from config.fusion_settings import CHILD_FIELD_RULES, TAXPAYER_ID_RULES
+from fusion_validator import (
+    RULE_CHILD_FORMAT,
+    RULE_DUNS,
+    RULE_LOV,
+    RULE_TAXPAYER_ID,
+    RULES,
+    TAXPAYER_ID_SEPARATORS,
+    child_field_ok,
+    rule_message,
+)
+from utils.lov_cache import get_lov_index
+
+
+# ------------------------------------------------------------------
+# Columnar loading
+# ------------------------------------------------------------------
+def _column(values):
+    return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+
+def columns_from_rows(rows, fields):
+    """
+    rows: list of dicts -> {field: 1-D str array}; missing / None -> "".
+    """
+    return {f: _column([r.get(f) for r in rows]) for f in fields}
+
+
+def load_csv(path, fields=None):
+    """
+    Reads a CSV straight into columns (one array per header field).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        data = list(reader)
+
+    wanted = fields or header
+    columns = {}
+    for field in wanted:
+        if field in header:
+            i = header.index(field)
+            columns[field] = _column(row[i].strip() if i < len(row) else "" for row in data)
+        else:
+            columns[field] = np.full(len(data), "", dtype=str)
+    return columns
+
+
+# ------------------------------------------------------------------
+# Error matrix
+# ------------------------------------------------------------------
+class ErrorMatrix:
+    """
+    One entry per failed check, sorted by row: parallel int arrays
+    `row`, `field` (index into .fields) and `rule` (index into RULES).
+    """
+
+    def __init__(self, columns, row, field, rule, fields, allowed):
+        self.columns = columns
+        self.row = row
+        self.field = field
+        self.rule = rule
+        self.fields = fields
+        self.allowed = allowed
+
+    def __len__(self):
+        return len(self.row)
+
+    def invalid_rows(self):
+        return np.unique(self.row)
+
+    def records(self):
+        for r, f, k in zip(self.row.tolist(), self.field.tolist(), self.rule.tolist()):
+            yield {"row": r, "field": self.fields[f], "rule": RULES[k]}
+
+    def messages(self, row):
+        """
+        Human-readable errors for one row, worded exactly like the chat validator.
+        """
+        start, end = np.searchsorted(self.row, [row, row + 1])
+        return [
+            self._message(row, self.fields[f], RULES[k])
+            for f, k in zip(self.field[start:end].tolist(), self.rule[start:end].tolist())
+        ]
+
+    def by_field(self, row):
+        """
+        {field: [messages]} for one row, fields in check order.
+        """
+        errors = {}
+        start, end = np.searchsorted(self.row, [row, row + 1])
+        for f, k in zip(self.field[start:end].tolist(), self.rule[start:end].tolist()):
+            field = self.fields[f]
+            errors.setdefault(field, []).append(self._message(row, field, RULES[k]))
+        return errors
+
+    def _message(self, row, field, rule):
+        country = self.columns["TaxpayerCountry"][row] if rule == RULE_TAXPAYER_ID else None
+        return rule_message(rule, field, self.columns[field][row], allowed=self.allowed.get(field), country=country)
+
+
+# ------------------------------------------------------------------
+# Vectorized checks
+# ------------------------------------------------------------------
+def _taxpayer_id_errors(columns, n):
+    bad = np.zeros(n, dtype=bool)
+    if "TaxpayerId" not in columns or "TaxpayerCountry" not in columns:
+        return bad
+
+    ids = columns["TaxpayerId"]
+    for sep in TAXPAYER_ID_SEPARATORS:
+        ids = np.char.replace(ids, sep, "")
+    lengths = np.char.str_len(ids)
+    countries = columns["TaxpayerCountry"]
+    present = columns["TaxpayerId"] != ""
+
+    for country, rule in TAXPAYER_ID_RULES.items():
+        in_country = present & (countries == country)
+        if not in_country.any():
+            continue
+        charset_ok = np.char.isdigit(ids) if rule["charset"] == "digits" else np.char.isalnum(ids)
+        bad |= in_country & ~((lengths == rule["length"]) & charset_ok)
+    return bad
+
+
+def validate_columns(columns):
+    """
+    Runs every rule over whole columns; returns an ErrorMatrix.
+    """
+    n = len(next(iter(columns.values()))) if columns else 0
+    lov = get_lov_index()
+
+    fields = list(lov.fields) + ["DUNSNumber", "TaxpayerId"] + list(CHILD_FIELD_RULES)
+    allowed = {f: lov.allowed(f) for f in lov.fields}
+    hits = []      # (row indices, field index, rule index)
+
+    for i, field in enumerate(lov.fields):
+        col = columns.get(field)
+        if col is None:
+            continue
+        bad = (col != "") & ~np.isin(col, np.array(allowed[field], dtype=str))
+        hits.append((np.flatnonzero(bad), i, RULES.index(RULE_LOV)))
+
+    duns = columns.get("DUNSNumber")
+    if duns is not None:
+        bad = (duns != "") & ~(np.char.isdigit(duns) & (np.char.str_len(duns) == 9))
+        hits.append((np.flatnonzero(bad), fields.index("DUNSNumber"), RULES.index(RULE_DUNS)))
+
+    bad = _taxpayer_id_errors(columns, n)
+    hits.append((np.flatnonzero(bad), fields.index("TaxpayerId"), RULES.index(RULE_TAXPAYER_ID)))
+
+    # regexes don't vectorize; check each distinct value once
+    for field in CHILD_FIELD_RULES:
+        col = columns.get(field)
+        if col is None:
+            continue
+        values, inverse = np.unique(col, return_inverse=True)
+        ok = np.array([v == "" or child_field_ok(field, v) for v in values.tolist()], dtype=bool)
+        hits.append((np.flatnonzero(~ok[inverse]), fields.index(field), RULES.index(RULE_CHILD_FORMAT)))
+
+    row = np.concatenate([h[0] for h in hits]).astype(np.int64) if hits else np.empty(0, np.int64)
+    field = np.concatenate([np.full(len(h[0]), h[1], np.int16) for h in hits]) if hits else np.empty(0, np.int16)
+    rule = np.concatenate([np.full(len(h[0]), h[2], np.int8) for h in hits]) if hits else np.empty(0, np.int8)
+
+    # stable sort by row keeps the per-row order of checks
+    order = np.argsort(row, kind="stable")
+    return ErrorMatrix(columns, row[order], field[order], rule[order], fields, allowed)
+
+
+def validate_rows(rows):
+    fields = get_lov_index().fields + ["DUNSNumber", "TaxpayerId", "TaxpayerCountry"] + list(CHILD_FIELD_RULES)
+    return validate_columns(columns_from_rows(rows, fields))
@@ -0,0 +1,59 @@
+#ns/lookup and coverage: legacy FUSION_COUNTRY dict vs the ISO-3166 country index
+#
+#   python -m bench.bench_normalizer --iterations 200000
+#
+import argparse
+import time
+
+from utils.countries import lookup_country, normalize_taxpayer_id
+from utils.normalizer import FUSION_COUNTRY, normalize
+
+# (input, expected Fusion country)
+CASES = {
+    "exact": [("United States", "United States"), ("Germany", "Germany"), ("india", "India"),
+              ("Brazil", "Brazil"), ("Côte d'Ivoire", "Cote d'Ivoire")],
+    "alias": [("USA", "United States"), ("UK", "United Kingdom"), ("Holland", "Netherlands"),
+              ("South Korea", "Korea, Republic of"), ("Russia", "Russian Federation")],
+    "code": [("US", "United States"), ("DEU", "Germany"), ("gb", "United Kingdom"),
+             ("IND", "India"), ("CA", "Canada")],
+    "typo": [("Untied States", "United States"), ("Germny", "Germany"), ("Austrailia", "Australia"),
+             ("Phillipines", "Philippines"), ("Swtizerland", "Switzerland")],
+}
+
+
+def legacy(text):
+    return normalize(text, FUSION_COUNTRY)
+
+
+def ns_per_op(fn, inputs, iterations):
+    rounds = max(1, iterations // len(inputs))
+    t0 = time.perf_counter_ns()
+    for _ in range(rounds):
+        for text in inputs:
+            fn(text)
+    return (time.perf_counter_ns() - t0) / (rounds * len(inputs))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark country / TaxpayerId normalization")
+    p.add_argument("--iterations", type=int, default=200_000, help="lookups per case group")
+    args = p.parse_args(argv)
+
+    print(f"{'case':<6} {'dict ns/op':>11} {'index ns/op':>12} {'dict hits':>10} {'index hits':>11}")
+    for case, pairs in CASES.items():
+        inputs = [text for text, _ in pairs]
+        old_hits = sum(legacy(text) == expected for text, expected in pairs)
+        new_hits = sum(lookup_country(text) == expected for text, expected in pairs)
+        print(
+            f"{case:<6} {ns_per_op(legacy, inputs, args.iterations):>11,.0f}"
+            f" {ns_per_op(lookup_country, inputs, args.iterations):>12,.0f}"
+            f" {old_hits:>5}/{len(pairs):<4} {new_hits:>6}/{len(pairs):<4}"
+        )
+
+    ids = [("United States", "12 3456789"), ("India", "abcde1234f"), ("Canada", "123-456-789")]
+    taxpayer_ns = ns_per_op(lambda pair: normalize_taxpayer_id(*pair), ids, args.iterations)
+    print(f"TaxpayerId normalize {taxpayer_ns:,.0f} ns/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#rows/sec of the columnar validator vs the per-dict wrapper
+#
+#   python -m bench.bench_validator --sizes 100000 1000000
+#
+import argparse
+import random
+import time
+
+from batch_validator import columns_from_rows, validate_columns
+from fusion_validator import validate_against_fusion
+
+FIELDS = ["Supplier", "TaxOrganizationType", "SupplierType", "BusinessRelationship",
+          "TaxpayerCountry", "TaxpayerId", "DUNSNumber"]
+
+
+def make_rows(n, error_rate=0.1, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = {
+            "Supplier": f"Supplier {i}",
+            "TaxOrganizationType": "Corporation",
+            "SupplierType": "Services",
+            "BusinessRelationship": "Prospective",
+            "TaxpayerCountry": "United States",
+            "TaxpayerId": f"{rng.randint(10, 99)}-{rng.randint(1000000, 9999999)}",
+            "DUNSNumber": str(rng.randint(100000000, 999999999)),
+        }
+        if rng.random() < error_rate:
+            field = rng.choice(["SupplierType", "DUNSNumber", "TaxpayerId"])
+            row[field] = {"SupplierType": "Goods", "DUNSNumber": "12345", "TaxpayerId": "12-34"}[field]
+        rows.append(row)
+    return rows
+
+
+def bench_batch(rows):
+    t0 = time.perf_counter()
+    columns = columns_from_rows(rows, FIELDS)
+    t1 = time.perf_counter()
+    errors = validate_columns(columns)
+    t2 = time.perf_counter()
+    return {
+        "load_s": t1 - t0,
+        "validate_s": t2 - t1,
+        "rows_per_s": len(rows) / (t2 - t0),
+        "invalid_rows": len(errors.invalid_rows()),
+    }
+
+
+def bench_per_dict(rows):
+    t0 = time.perf_counter()
+    invalid = sum(1 for row in rows if validate_against_fusion(row))
+    elapsed = time.perf_counter() - t0
+    return {"rows_per_s": len(rows) / elapsed, "invalid_rows": invalid}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the columnar supplier validator")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    p.add_argument("--per-dict-sample", type=int, default=20_000,
+                   help="rows pushed through validate_against_fusion one by one")
+    args = p.parse_args(argv)
+
+    sample = make_rows(args.per_dict_sample)
+    single = bench_per_dict(sample)
+    check = bench_batch(sample)
+    assert check["invalid_rows"] == single["invalid_rows"], "batch and per-dict results differ"
+    print(f"per-dict   {args.per_dict_sample:>9} rows  {single['rows_per_s']:>12,.0f} rows/s")
+
+    for n in args.sizes:
+        r = bench_batch(make_rows(n))
+        print(
+            f"columnar   {n:>9} rows  {r['rows_per_s']:>12,.0f} rows/s"
+            f"  (load {r['load_s']:.2f}s, validate {r['validate_s']:.2f}s, {r['invalid_rows']} invalid)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#trace-replay load / latency benchmark for the supplier agent
+#
+#   python -m bench.replay --trace bench/traces/sample.jsonl --conversations 200 --concurrency 20
+#   python -m bench.replay ... --compare bench/results/<previous>.json
+#
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from bench.stubs import StubConfig, FusionStub, GeminiStub, BotFrameworkStub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+START_COMMANDS = {"create supplier", "create a supplier"}
+TURN_TYPES = ["start", "COLLECTING", "CONFIRM", "EDIT"]
+
+
+# ------------------------------------------------------------------
+# Trace loading
+# ------------------------------------------------------------------
+def load_trace(path):
+    """
+    JSONL of Azure activities as logged under "AZURE PAYLOAD", grouped by
+    conversation.id in file order.
+    """
+    conversations = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            activity = json.loads(line)
+            if activity.get("type") not in ("message", "conversationUpdate"):
+                continue
+            conversations[activity["conversation"]["id"]].append(activity)
+    return list(conversations.values())
+
+
+def classify_turn(activity, last_reply):
+    if activity.get("type") == "conversationUpdate":
+        return "start"
+    text = (activity.get("text") or "").strip().lower()
+    if text in START_COMMANDS and last_reply is None:
+        return "start"
+    if last_reply and ("Confirm? (yes / edit / cancel)" in last_reply
+                       or last_reply.startswith("Please type: yes, edit, or cancel")):
+        return "CONFIRM"
+    if last_reply and (last_reply.startswith("Which field do you want to edit?")
+                       or last_reply.startswith("Invalid choice")):
+        return "EDIT"
+    return "COLLECTING"
+
+
+# ------------------------------------------------------------------
+# Replay
+# ------------------------------------------------------------------
+class Replayer:
+
+    def __init__(self, app_url, bot, turn_timeout=30.0):
+        self.app_url = app_url
+        self.bot = bot
+        self.turn_timeout = turn_timeout
+        self.http = requests.Session()
+        self.samples = defaultdict(list)
+        self.timeouts = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def replay_conversation(self, template, n):
+        conversation_id = f"bench-{n}-{uuid.uuid4().hex[:8]}"
+        last_reply = None
+
+        for original in template:
+            activity = copy.deepcopy(original)
+            activity["id"] = uuid.uuid4().hex
+            activity["serviceUrl"] = self.bot.url
+            activity["conversation"] = {**activity.get("conversation", {}), "id": conversation_id}
+
+            turn_type = classify_turn(activity, last_reply)
+            event, texts, times = self.bot.expect(activity["id"])
+
+            sent = time.monotonic()
+            try:
+                r = self.http.post(f"{self.app_url}/supplier-agent", json=activity, timeout=self.turn_timeout)
+                if r.status_code != 200:
+                    self.errors[turn_type] += 1
+                    self.bot.forget(activity["id"])
+                    return
+            except requests.RequestException:
+                self.errors[turn_type] += 1
+                self.bot.forget(activity["id"])
+                return
+
+            if not event.wait(self.turn_timeout):
+                self.timeouts[turn_type] += 1
+                self.bot.forget(activity["id"])
+                return
+
+            self.samples[turn_type].append(times[0] - sent)
+            last_reply = texts[-1]
+            self.bot.forget(activity["id"])
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(replayer):
+    summary = {}
+    for turn_type in TURN_TYPES:
+        ordered = sorted(replayer.samples.get(turn_type, []))
+        summary[turn_type] = {
+            "count": len(ordered),
+            "timeouts": replayer.timeouts.get(turn_type, 0),
+            "errors": replayer.errors.get(turn_type, 0),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else None,
+            "p50_ms": _ms(percentile(ordered, 0.50)),
+            "p95_ms": _ms(percentile(ordered, 0.95)),
+            "p99_ms": _ms(percentile(ordered, 0.99)),
+        }
+    return summary
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+# ------------------------------------------------------------------
+# App process
+# ------------------------------------------------------------------
+def start_app(port, fusion, gemini, bot, extra_env):
+    env = {
+        **os.environ,
+        "FUSION_BASE_URL": fusion.url,
+        "FUSION_USERNAME": "bench",
+        "FUSION_PASSWORD": "bench",
+        "GEMINI_API_KEY": "bench",
+        "GEMINI_BASE_URL": gemini.url,
+        "BOT_TOKEN_URL": f"{bot.url}/oauth2/v2.0/token",
+        "MICROSOFT_APP_ID": "bench",
+        "MICROSOFT_APP_PASSWORD": "bench",
+        # the sample trace answers the supplier header questions only (the default;
+        # pinned so an operator SUPPLIER_CHILDREN in the environment cannot change it)
+        "SUPPLIER_CHILDREN": "",
+        **extra_env,
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("app exited during startup")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+
+    proc.terminate()
+    raise RuntimeError("app did not become healthy")
+
+
+# ------------------------------------------------------------------
+# Results
+# ------------------------------------------------------------------
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def save_result(result, path=None):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = path or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def compare(current, baseline):
+    lines = [f"{'turn':<12}{'metric':<8}{'baseline':>12}{'current':>12}{'delta':>10}"]
+    for turn_type in TURN_TYPES:
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            old = baseline["turns"].get(turn_type, {}).get(metric)
+            new = current["turns"].get(turn_type, {}).get(metric)
+            if old is None or new is None:
+                continue
+            delta = (new - old) / old * 100 if old else 0.0
+            lines.append(f"{turn_type:<12}{metric:<8}{old:>12.1f}{new:>12.1f}{delta:>+9.1f}%")
+
+    old, new = baseline["suppliers_per_sec"], current["suppliers_per_sec"]
+    delta = (new - old) / old * 100 if old else 0.0
+    lines.append(f"{'suppliers/s':<20}{old:>12.2f}{new:>12.2f}{delta:>+9.1f}%")
+    return "\n".join(lines)
+
+
+def print_summary(result):
+    print(f"{'turn':<12}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'timeouts':>10}")
+    for turn_type, s in result["turns"].items():
+        fmt = lambda v: f"{v:>10.1f}" if v is not None else f"{'-':>10}"
+        print(f"{turn_type:<12}{s['count']:>7}{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}{s['timeouts']:>10}")
+    print(f"completed suppliers/sec: {result['suppliers_per_sec']:.2f} "
+          f"({result['suppliers_created']} in {result['wall_seconds']:.1f}s)")
+
+
+# ------------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Replay recorded Azure activities against the supplier agent")
+    p.add_argument("--trace", default=os.path.join(ROOT, "bench", "traces", "sample.jsonl"))
+    p.add_argument("--conversations", type=int, default=50, help="conversations to replay (templates are cycled)")
+    p.add_argument("--concurrency", type=int, default=10)
+    p.add_argument("--port", type=int, default=8099)
+    p.add_argument("--turn-timeout", type=float, default=30.0)
+
+    for stub in ("fusion", "gemini", "bot"):
+        p.add_argument(f"--{stub}-latency", type=float, default=0.0, help="seconds")
+        p.add_argument(f"--{stub}-jitter", type=float, default=0.0, help="seconds")
+        p.add_argument(f"--{stub}-error-rate", type=float, default=0.0, help="0..1")
+
+    p.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the app")
+    p.add_argument("--output", help="result file (default bench/results/<utc timestamp>.json)")
+    p.add_argument("--compare", help="previous result file to diff against")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    templates = load_trace(args.trace)
+    if not templates:
+        sys.exit(f"No conversations in {args.trace}")
+
+    stub_config = lambda name: StubConfig(
+        latency=getattr(args, f"{name}_latency"),
+        jitter=getattr(args, f"{name}_jitter"),
+        error_rate=getattr(args, f"{name}_error_rate")
+    )
+    fusion = FusionStub(stub_config("fusion")).start()
+    gemini = GeminiStub(stub_config("gemini")).start()
+    bot = BotFrameworkStub(stub_config("bot")).start()
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    proc, app_url = start_app(args.port, fusion, gemini, bot, extra_env)
+
+    try:
+        replayer = Replayer(app_url, bot, args.turn_timeout)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for n in range(args.conversations):
+                pool.submit(replayer.replay_conversation, templates[n % len(templates)], n)
+        wall = time.monotonic() - started
+
+        try:
+            app_stats = requests.get(f"{app_url}/stats", timeout=5).json()
+        except Exception:
+            app_stats = None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        for stub in (fusion, gemini, bot):
+            stub.stop()
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "config": vars(args),
+        "wall_seconds": round(wall, 3),
+        "suppliers_created": fusion.created,
+        "suppliers_per_sec": round(fusion.created / wall, 3) if wall else 0.0,
+        "turns": summarize(replayer),
+        "stubs": {"fusion": fusion.stats(), "gemini": gemini.stats(), "bot": bot.stats()},
+        "app_stats": app_stats,
+    }
+
+    path = save_result(result, args.output)
+    print_summary(result)
+    print(f"saved {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(result, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
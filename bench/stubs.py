@@ -0,0 +1,207 @@
+#local stand-ins for Fusion, Gemini and Bot Framework used by the benchmark
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class StubServer:
+    """
+    Runs a handler on 127.0.0.1:<random port> in a daemon thread.
+    Subclasses implement `route(method, path, body) -> (status, dict)`.
+    """
+
+    name = "stub"
+
+    def __init__(self, config=None):
+        self.config = config or StubConfig()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.name, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+
+                with stub._lock:
+                    stub.requests += 1
+
+                stub.config.delay()
+                if stub.config.should_fail():
+                    with stub._lock:
+                        stub.errors += 1
+                    status, body = stub.config.error_status, {"error": "injected failure"}
+                else:
+                    status, body = stub.route(method, self.path, raw, self.headers)
+
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def route(self, method, path, raw, headers):
+        return 404, {}
+
+    def stats(self):
+        return {"requests": self.requests, "injected_errors": self.errors}
+
+
+# ------------------------------------------------------------------
+# Fusion suppliers resource
+# ------------------------------------------------------------------
+class FusionStub(StubServer):
+
+    name = "fusion-stub"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.created = 0
+        self.first_create = None
+        self.last_create = None
+
+    def route(self, method, path, raw, headers):
+        if "/suppliers" not in path:
+            return 404, {}
+
+        if method == "GET":
+            return 200, {"items": [], "count": 0, "hasMore": False}
+
+        payload = json.loads(raw or b"{}")
+        with self._lock:
+            self.created += 1
+            supplier_id = 300000000000000 + self.created
+            now = time.monotonic()
+            self.first_create = self.first_create or now
+            self.last_create = now
+
+        return 201, {
+            "SupplierId": supplier_id,
+            "SupplierNumber": str(10000 + self.created),
+            "Supplier": payload.get("Supplier")
+        }
+
+    def stats(self):
+        return {**super().stats(), "created": self.created}
+
+
+# ------------------------------------------------------------------
+# Gemini generateContent
+# ------------------------------------------------------------------
+class GeminiStub(StubServer):
+    """
+    Returns an empty extraction ({}) so the agent falls back to the raw
+    answer, which keeps replayed conversations deterministic.
+    """
+
+    name = "gemini-stub"
+
+    def route(self, method, path, raw, headers):
+        if ":generateContent" not in path:
+            return 404, {}
+        return 200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": "{}"}]},
+                "finishReason": "STOP"
+            }],
+            "usageMetadata": {"promptTokenCount": 60, "candidatesTokenCount": 2}
+        }
+
+
+# ------------------------------------------------------------------
+# Bot Framework token + activities
+# ------------------------------------------------------------------
+class BotFrameworkStub(StubServer):
+
+    name = "bot-stub"
+    ACTIVITIES = re.compile(r"^/v3/conversations/([^/]+)/activities")
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.token_requests = 0
+        self._waiters = {}      # replyToId -> (Event, [reply texts], [first reply time])
+
+    def expect(self, activity_id):
+        entry = (threading.Event(), [], [])
+        with self._lock:
+            self._waiters[activity_id] = entry
+        return entry
+
+    def forget(self, activity_id):
+        with self._lock:
+            self._waiters.pop(activity_id, None)
+
+    def route(self, method, path, raw, headers):
+        if path.endswith("/token"):
+            with self._lock:
+                self.token_requests += 1
+            return 200, {"token_type": "Bearer", "expires_in": 3600, "access_token": "stub-token"}
+
+        if self.ACTIVITIES.match(path):
+            activity = json.loads(raw or b"{}")
+            received = time.monotonic()
+            with self._lock:
+                entry = self._waiters.get(activity.get("replyToId"))
+            if entry is not None:
+                event, texts, times = entry
+                texts.append(activity.get("text") or "")
+                times.append(received)
+                event.set()
+            return 200, {"id": f"reply-{received}"}
+
+        return 404, {}
+
+    def stats(self):
+        return {**super().stats(), "token_requests": self.token_requests}
@@ -0,0 +1,378 @@
+#bulk supplier onboarding: CSV / JSONL rows -> Fusion, results as NDJSON
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from config.fusion_settings import (
+    REQUIRED_FIELDS,
+    DEFAULT_VALUES,
+    SUPPLIER_ENDPOINT,
+    BULK_CONCURRENCY,
+    BULK_RATE_LIMIT,
+    BULK_BATCH_SIZE
+)
+from fusion_client import create_supplier, find_supplier, get_fusion_client
+from fusion_validator import validate_against_fusion
+from utils.circuit_breaker import CircuitOpenError
+from utils.normalizer import normalize_supplier_payload
+from utils.rate_limit import RateLimiter
+from utils.supplier_index import supplier_index
+
+logger = logging.getLogger("bulk_onboarding")
+
+# Fusion REST batch: POST to the version root, one "part" per create
+BATCH_ENDPOINT = SUPPLIER_ENDPOINT.rsplit("/", 1)[0]
+BATCH_PART_PATH = "/" + SUPPLIER_ENDPOINT.rsplit("/", 1)[1]
+BATCH_CONTENT_TYPE = "application/vnd.oracle.adf.batch+json"
+
+# outcomes that are final; anything else is retried when the job is resumed
+FINAL_STATUSES = {"created", "invalid", "duplicate", "rejected"}
+
+
+# ------------------------------------------------------------------
+# Input
+# ------------------------------------------------------------------
+def read_rows(stream, fmt):
+    """
+    Yields (row_number, dict) from a text stream; row numbers start at 1.
+    """
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(stream), start=1):
+            yield n, row
+        return
+
+    n = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            yield n, json.loads(line)
+        except ValueError as e:
+            yield n, {"_parse_error": str(e)}
+
+
+def detect_format(name_or_type):
+    return "csv" if "csv" in (name_or_type or "").lower() else "jsonl"
+
+
+def _cell(value):
+    # JSONL numbers ("DUNSNumber": 123456789) are read like the CSV text they stand for
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def prepare_row(row):
+    """
+    Returns (payload, errors) using the same normalizer / validator as chat.
+    """
+    if not isinstance(row, dict):
+        return None, ["Row must be a JSON object"]
+    if "_parse_error" in row:
+        return None, [f"Invalid JSON: {row['_parse_error']}"]
+
+    raw = {
+        k.strip(): _cell(v)
+        for k, v in row.items() if k
+    }
+    raw = {k: v for k, v in raw.items() if v not in ("", None)}
+
+    payload = dict(DEFAULT_VALUES)
+    payload.update(raw)
+    payload = normalize_supplier_payload(payload)
+
+    errors = []
+    for field in REQUIRED_FIELDS:
+        if payload.get(field):
+            continue
+        if raw.get(field):
+            errors.append(f"{field} value '{raw[field]}' is not a recognised Fusion value")
+        else:
+            errors.append(f"{field} is required")
+    if payload.get("Supplier") and not isinstance(payload["Supplier"], str):
+        errors.append("Supplier must be text")
+
+    errors.extend(validate_against_fusion(payload))
+    return payload, errors
+
+
+# ------------------------------------------------------------------
+# Checkpoint
+# ------------------------------------------------------------------
+class Checkpoint:
+    """
+    Append-only file of finished row numbers; rows finish out of order,
+    so this is a set, not a high-water mark. Rows that failed are kept in
+    `attempted`: their create may have landed, so a resume checks first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.attempted = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        if entry["status"] in FINAL_STATUSES:
+                            self.done.add(entry["row"])
+                        else:
+                            self.attempted.add(entry["row"])
+                    except (ValueError, KeyError, TypeError):
+                        continue    # torn last line after a crash
+        if path:
+            self._file = open(path, "a")
+
+    def record(self, result):
+        if self._file is None or result["status"] not in FINAL_STATUSES | {"failed"}:
+            return
+        with self._lock:
+            self._file.write(json.dumps({"row": result["row"], "status": result["status"]}) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+# ------------------------------------------------------------------
+# Submission
+# ------------------------------------------------------------------
+def _result(row, payload, status, **extra):
+    result = {"row": row, "status": status, "Supplier": (payload or {}).get("Supplier")}
+    result.update(extra)
+    return result
+
+
+def _outcome(row, payload, http_status, body):
+    if http_status == 201 and isinstance(body, dict):
+        supplier_index.add({**payload, **body})
+        return _result(
+            row, payload, "created",
+            SupplierId=body.get("SupplierId"),
+            SupplierNumber=body.get("SupplierNumber")
+        )
+    # 4xx is the payload's fault; 5xx / unreachable can be retried on resume
+    status = "rejected" if 400 <= http_status < 500 and http_status != 429 else "failed"
+    return _result(row, payload, status, http_status=http_status, error=body)
+
+
+def submit_one(row, payload, limiter, job_id):
+    limiter.acquire()
+    http_status, body = create_supplier(payload, idempotency_key=f"bulk:{job_id}:{row}")
+    return [_outcome(row, payload, http_status, body)]
+
+
+def resubmit_one(row, payload, limiter, job_id):
+    """
+    A row that failed in an earlier run (timeout, lost batch part) may have
+    been created anyway: look it up before POSTing it again.
+    """
+    limiter.acquire()
+    try:
+        existing = find_supplier(payload["Supplier"])
+    except (CircuitOpenError, requests.RequestException, ValueError) as e:
+        return [_result(row, payload, "failed", http_status=503, error=f"lookup before retry failed: {e}")]
+    if existing:
+        result = _outcome(row, payload, 201, existing)
+        result["already_created"] = True
+        return [result]
+    return submit_one(row, payload, limiter, job_id)
+
+
+def submit_batch(items, limiter, job_id):
+    """
+    One Fusion batch request for `items` [(row, payload)]. Fusion runs a batch
+    as a single transaction, so if it fails the rows are retried one by one.
+    """
+    body = {
+        "parts": [
+            {"id": str(row), "path": BATCH_PART_PATH, "operation": "create", "payload": payload}
+            for row, payload in items
+        ]
+    }
+    limiter.acquire()
+    try:
+        response = get_fusion_client().post(
+            BATCH_ENDPOINT,
+            data=json.dumps(body),
+            headers={"Content-Type": BATCH_CONTENT_TYPE}
+        )
+    except (CircuitOpenError, requests.RequestException) as e:
+        return [_result(row, payload, "failed", http_status=503, error=str(e)) for row, payload in items]
+
+    if response.status_code == 200:
+        try:
+            parts = {p.get("id"): p for p in response.json().get("parts", [])}
+        except (ValueError, AttributeError) as e:
+            # the batch may have committed; rows are looked up before a resume retries them
+            logger.warning("Unreadable batch response for %s rows: %s", len(items), e)
+            return [
+                _result(row, payload, "failed", http_status=200, error="unreadable batch response")
+                for row, payload in items
+            ]
+        results = []
+        for row, payload in items:
+            created = (parts.get(str(row)) or {}).get("payload")
+            if created and created.get("SupplierId"):
+                results.append(_outcome(row, payload, 201, created))
+            else:
+                results.append(_result(row, payload, "failed", http_status=200, error="missing batch part"))
+        return results
+
+    if response.status_code >= 500 or response.status_code == 429:
+        return [_outcome(row, payload, response.status_code, response.text) for row, payload in items]
+
+    # one bad row rolls back the whole batch; find it by creating one by one
+    logger.warning("Batch of %s rejected (%s), falling back to single creates", len(items), response.status_code)
+    results = []
+    for row, payload in items:
+        results.extend(submit_one(row, payload, limiter, job_id))
+    return results
+
+
+def run_job(rows, job_id="cli", checkpoint_path=None,
+            concurrency=BULK_CONCURRENCY, rate=BULK_RATE_LIMIT, batch_size=BULK_BATCH_SIZE):
+    """
+    Streams one result dict per input row (completion order, not input order).
+
+    rows: iterable of (row_number, dict), e.g. from read_rows().
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    limiter = RateLimiter(rate)
+    # bounded in-flight window so a huge file is never fully buffered
+    max_inflight = max(1, concurrency) * 2
+    batch = []
+    seen = {}       # duplicate keys inside this file
+
+    def emit(result):
+        checkpoint.record(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="bulk") as pool:
+        inflight = set()
+
+        def drain(block):
+            nonlocal inflight
+            if block:
+                done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            else:
+                done = {f for f in inflight if f.done()}
+                inflight -= done
+            results = []
+            for future in done:
+                results.extend(future.result())
+            return results
+
+        def submit(fn, *args):
+            inflight.add(pool.submit(fn, *args))
+
+        try:
+            for row, raw in rows:
+                if row in checkpoint.done:
+                    continue
+
+                payload, errors = prepare_row(raw)
+                if errors:
+                    yield emit(_result(row, payload, "invalid", errors=errors))
+                    continue
+
+                name_key = payload["Supplier"].casefold()
+                if name_key in seen:
+                    yield emit(_result(row, payload, "duplicate", errors=[f"Supplier repeats row {seen[name_key]}"]))
+                    continue
+                # a retried row may match the supplier its own earlier attempt created
+                duplicates = {} if row in checkpoint.attempted else supplier_index.find_duplicates(payload)
+                if duplicates:
+                    yield emit(_result(row, payload, "duplicate", errors=[
+                        f"{field} matches existing supplier {s['Supplier']}" for field, s in duplicates.items()
+                    ]))
+                    continue
+                seen[name_key] = row
+
+                if row in checkpoint.attempted:
+                    submit(resubmit_one, row, payload, limiter, job_id)
+                elif batch_size and batch_size > 1:
+                    batch.append((row, payload))
+                    if len(batch) < batch_size:
+                        continue
+                    submit(submit_batch, batch, limiter, job_id)
+                    batch = []
+                else:
+                    submit(submit_one, row, payload, limiter, job_id)
+
+                for result in drain(block=False):
+                    yield emit(result)
+                while len(inflight) >= max_inflight:
+                    for result in drain(block=True):
+                        yield emit(result)
+
+            if batch:
+                submit(submit_batch, batch, limiter, job_id)
+            while inflight:
+                for result in drain(block=True):
+                    yield emit(result)
+        finally:
+            checkpoint.close()
+
+
+# ------------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-create Fusion suppliers from CSV / JSONL")
+    parser.add_argument("input", help="CSV or JSONL file, '-' for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--checkpoint", help="resume file; finished rows are skipped on re-run")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=BULK_RATE_LIMIT, help="max Fusion requests per second")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="rows per Fusion batch request (0 = off)")
+    parser.add_argument("--output", help="NDJSON results file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    fmt = args.format or detect_format(args.input)
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    out = open(args.output, "a") if args.output else sys.stdout
+
+    counts = {}
+    try:
+        for result in run_job(
+            read_rows(stream, fmt),
+            job_id=os.path.basename(args.checkpoint or args.input),
+            checkpoint_path=args.checkpoint,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            batch_size=args.batch_size
+        ):
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if out is not sys.stdout:
+            out.close()
+
+    logger.info("Bulk job finished: %s", counts)
+    return 0 if not counts.get("failed") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,48 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# only pay for python-dotenv when there is actually a .env to read
+# (Render injects real environment variables)
+_ENV_FILES = [
+    os.path.join(os.getcwd(), ".env"),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+]
+if any(os.path.exists(p) for p in _ENV_FILES):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
+# override only to point at a proxy / the benchmark stub
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+GEMINI_FALLBACK_MODEL = os.getenv("GEMINI_FALLBACK_MODEL", "models/gemini-2.5-flash-lite")
+# response-schema, field-scoped extraction ("false" -> legacy free-form prompt)
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Gemini scheduling (quota, queueing, hedging, deadline)
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "50"))
+GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "true").lower() == "true"
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "1.0"))
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", "8"))
+GEMINI_FALLBACK_DEADLINE = float(os.getenv("GEMINI_FALLBACK_DEADLINE", "4"))
+
+# LLM extraction cache (EXTRACTION_CACHE_DB empty -> memory only)
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "5000"))
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", "86400"))
+EXTRACTION_CACHE_DB = os.getenv("EXTRACTION_CACHE_DB", "")
+
+# Logging (JSON lines written off the request thread)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+# Conversation session store: "memory" (single worker) or "sqlite" (shared)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "3600"))
 
 FUSION_BASE_URL = os.getenv("FUSION_BASE_URL")
 FUSION_USERNAME = os.getenv("FUSION_USERNAME")
@@ -13,6 +52,25 @@ SUPPLIER_ENDPOINT = (
     "/fscmRestApi/resources/11.13.18.05/suppliers"
 )
 
+# Fusion HTTP client (pooling / timeouts / retries / circuit breaker)
+FUSION_CONNECT_TIMEOUT = float(os.getenv("FUSION_CONNECT_TIMEOUT", "5"))
+FUSION_READ_TIMEOUT = float(os.getenv("FUSION_READ_TIMEOUT", "60"))
+FUSION_POOL_SIZE = int(os.getenv("FUSION_POOL_SIZE", "20"))
+FUSION_MAX_RETRIES = int(os.getenv("FUSION_MAX_RETRIES", "3"))
+FUSION_BACKOFF_BASE = float(os.getenv("FUSION_BACKOFF_BASE", "0.5"))
+FUSION_BACKOFF_MAX = float(os.getenv("FUSION_BACKOFF_MAX", "10"))
+FUSION_BREAKER_THRESHOLD = int(os.getenv("FUSION_BREAKER_THRESHOLD", "5"))
+FUSION_BREAKER_RESET_SECONDS = float(os.getenv("FUSION_BREAKER_RESET_SECONDS", "30"))
+# per-tenant isolation: requests / second (0 = unlimited) and concurrent requests
+# (0 = FUSION_POOL_SIZE); past the cap callers fail fast instead of queueing
+FUSION_RATE_LIMIT = float(os.getenv("FUSION_RATE_LIMIT", "0"))
+FUSION_MAX_IN_FLIGHT = int(os.getenv("FUSION_MAX_IN_FLIGHT", "0"))
+
+# Multi-tenant routing (config/tenants.py); "" -> one tenant from FUSION_BASE_URL / credentials
+FUSION_TENANTS_FILE = os.getenv("FUSION_TENANTS_FILE", "")
+# how often (seconds) the file's mtime is checked for a hot reload
+FUSION_TENANTS_RELOAD_SECONDS = float(os.getenv("FUSION_TENANTS_RELOAD_SECONDS", "5"))
+
 REQUIRED_FIELDS = [
     "Supplier",
     "TaxOrganizationType",
@@ -37,8 +95,133 @@ FIELD_QUESTIONS = {
     "DUNSNumber": "Please provide the 9-digit DUNS Number"
 }
 
+# Supplier child resources, POSTed to {SUPPLIER_ENDPOINT}/{SupplierId}/child/<name>
+# once the supplier exists (supplier_children.py).
+#   fields:   asked in the chat after REQUIRED_FIELDS, in this order
+#   header:   child attribute <- supplier field
+#   links:    child attribute <- "<resource>.<attribute>" of another child's create
+#             response; that resource is created first (a dependency)
+#   defaults: sent as-is
+SUPPLIER_CHILD_RESOURCES = {
+    "addresses": {
+        "fields": {
+            "AddressName": "What should the supplier address be called? (Ex:Headquarters)",
+            "AddressLine1": "What is the street address?",
+            "City": "Which city is the address in?",
+            "PostalCode": "What is the postal code?"
+        },
+        "header": {"Country": "TaxpayerCountry"},
+        "defaults": {"AddressPurposeOrderingFlag": True, "AddressPurposeRemitToFlag": True}
+    },
+    "sites": {
+        "fields": {
+            "SupplierSite": "What is the supplier site name?",
+            "ProcurementBU": "Which Procurement BU is the site for?"
+        },
+        "links": {"SupplierAddressId": "addresses.SupplierAddressId"},
+        "defaults": {"SitePurposePurchasingFlag": True}
+    },
+    "contacts": {
+        "fields": {
+            "FirstName": "What is the supplier contact's first name?",
+            "LastName": "What is the supplier contact's last name?",
+            "Email": "What is the supplier contact's email?"
+        }
+    }
+}
+
+# resources collected per supplier, e.g. "addresses,sites,contacts"; opt-in, since
+# every enabled field is one more required question in the chat.
+# "" (default) -> supplier header only
+SUPPLIER_CHILDREN = [
+    r.strip() for r in os.getenv("SUPPLIER_CHILDREN", "").split(",") if r.strip()
+]
+# parallel child POSTs per supplier (resources in the same dependency level)
+SUPPLIER_CHILD_CONCURRENCY = int(os.getenv("SUPPLIER_CHILD_CONCURRENCY", "4"))
+
+# chat keys "<resource>.<field>", e.g. "addresses.City"
+CHILD_FIELDS = [
+    f"{r}.{f}" for r in SUPPLIER_CHILDREN for f in SUPPLIER_CHILD_RESOURCES[r]["fields"]
+]
+COLLECTED_FIELDS = REQUIRED_FIELDS + CHILD_FIELDS
+
+# format checks on child answers (fusion_validator.py, batch_validator.py);
+# other child fields are free text. Only enabled resources are checked.
+CHILD_FIELD_FORMATS = {
+    "addresses.PostalCode": {"pattern": r"[A-Za-z0-9][A-Za-z0-9 -]{0,8}[A-Za-z0-9]",
+                             "label": "a postal code (letters, digits, spaces or dashes)"},
+    "contacts.Email": {"pattern": r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}",
+                       "label": "an email address (name@example.com)"},
+}
+CHILD_FIELD_RULES = {field: rule for field, rule in CHILD_FIELD_FORMATS.items() if field in CHILD_FIELDS}
+FIELD_QUESTIONS.update({
+    f"{r}.{f}": question
+    for r in SUPPLIER_CHILDREN
+    for f, question in SUPPLIER_CHILD_RESOURCES[r]["fields"].items()
+})
+
+# seed / fallback LOVs; the live values come from Fusion (utils/lov_cache.py)
 FUSION_ALLOWED_VALUES = {
     "TaxOrganizationType": ["Corporation"],
     "SupplierType": ["Services"],
     "BusinessRelationship": ["Prospective"],
     }
+
+# what "default" / "use default" means for an LOV question (matches FIELD_QUESTIONS);
+# looked up in the live LOVs, never taken from the order Fusion returns them in
+LOV_DEFAULTS = {
+    "TaxOrganizationType": "Corporation",
+    "SupplierType": "Services",
+}
+
+# Fusion lookup types backing each LOV field
+LOV_ENDPOINT = "/fscmRestApi/resources/11.13.18.05/standardLookupsLOV"
+LOV_LOOKUP_TYPES = {
+    "TaxOrganizationType": os.getenv("LOV_TAX_ORG_TYPE_LOOKUP", "POZ_ORGANIZATION_TYPE"),
+    "SupplierType": os.getenv("LOV_SUPPLIER_TYPE_LOOKUP", "POZ_VENDOR_TYPE"),
+    "BusinessRelationship": os.getenv("LOV_BUSINESS_RELATIONSHIP_LOOKUP", "POZ_BUSINESS_RELATIONSHIP"),
+}
+LOV_CACHE_PATH = os.getenv("LOV_CACHE_PATH", "lov_cache.json")
+LOV_TTL = int(os.getenv("LOV_TTL", "86400"))
+# "false" -> never call Fusion, just use FUSION_ALLOWED_VALUES
+LOV_REMOTE_ENABLED = os.getenv("LOV_REMOTE_ENABLED", "true").lower() == "true"
+
+# Local duplicate-supplier index (utils/supplier_index.py)
+SUPPLIER_INDEX_ENABLED = os.getenv("SUPPLIER_INDEX_ENABLED", "true").lower() == "true"
+SUPPLIER_INDEX_PAGE_SIZE = int(os.getenv("SUPPLIER_INDEX_PAGE_SIZE", "500"))
+SUPPLIER_INDEX_SYNC_INTERVAL = int(os.getenv("SUPPLIER_INDEX_SYNC_INTERVAL", "300"))
+
+# Idempotency: redelivered activities / repeated confirms (utils/idempotency.py)
+IDEMPOTENCY_WINDOW = int(os.getenv("IDEMPOTENCY_WINDOW", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "50000"))
+
+# Durable outbox for confirmed supplier creates (utils/outbox.py)
+# "false" -> create inline on "yes" as before
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "outbox.db")
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "2"))
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "300"))
+# must outlast one create incl. FusionClient's own retries
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "600"))
+
+# Bulk onboarding (bulk_onboarding.py, POST /bulk/suppliers)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_RATE_LIMIT = float(os.getenv("BULK_RATE_LIMIT", "5"))       # Fusion requests / second
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "0"))         # rows per batch request, 0 = off
+BULK_CHECKPOINT_DIR = os.getenv("BULK_CHECKPOINT_DIR", "bulk_jobs")
+# uploads are spooled: kept in memory up to BULK_SPOOL_BYTES, then a temp file
+BULK_SPOOL_BYTES = int(os.getenv("BULK_SPOOL_BYTES", str(1024 * 1024)))
+BULK_MAX_UPLOAD_BYTES = int(os.getenv("BULK_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))   # 0 = no limit
+
+# TaxpayerId format per TaxpayerCountry (fusion_validator.py, batch_validator.py); separators
+# "-", " ", "." are ignored. Countries not listed are not format-checked.
+TAXPAYER_ID_RULES = {
+    "United States": {"length": 9, "charset": "digits", "label": "a 9-digit EIN (xx-xxxxxxx)",
+                      "format": "##-#######"},
+    "Canada": {"length": 9, "charset": "digits", "label": "a 9-digit Business Number"},
+    "India": {"length": 10, "charset": "alnum", "label": "a 10-character PAN"},
+    "United Kingdom": {"length": 10, "charset": "digits", "label": "a 10-digit UTR"},
+    "Australia": {"length": 11, "charset": "digits", "label": "an 11-digit ABN"},
+}
@@ -0,0 +1,203 @@
+#tenant registry: which Fusion pod serves which conversation / channel
+#
+# FUSION_TENANTS_FILE (JSON), re-read when its mtime changes:
+#
+# {
+#   "default": "prod",
+#   "tenants": {
+#     "prod": {
+#       "base_url": "https://prod.fa.ocs.oraclecloud.com",
+#       "username": "svc_supplier_agent",
+#       "password_env": "FUSION_PROD_PASSWORD",
+#       "rate_limit": 10, "max_in_flight": 16, "pool_size": 16,
+#       "tenant_ids": ["<Entra tenant id>"],
+#       "channels": ["msteams"]
+#     },
+#     "test": {"base_url": "...", "username": "...", "password_env": "...", "channels": ["direct"]}
+#   }
+# }
+#
+# Passwords come from the environment ("password_env"), not the file.
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config.fusion_settings import (
+    FUSION_BASE_URL,
+    FUSION_USERNAME,
+    FUSION_PASSWORD,
+    FUSION_RATE_LIMIT,
+    FUSION_MAX_IN_FLIGHT,
+    FUSION_TENANTS_FILE,
+    FUSION_TENANTS_RELOAD_SECONDS
+)
+
+logger = logging.getLogger("tenants")
+
+DEFAULT_TENANT = "default"
+
+# FusionClient settings a tenant entry may override
+CLIENT_KEYS = (
+    "base_url", "username", "password", "rate_limit", "max_in_flight",
+    "pool_size", "connect_timeout", "read_timeout", "max_retries"
+)
+
+# tenant of the current turn; copied into executor threads by utils.executor.run_blocking
+current_tenant = contextvars.ContextVar("fusion_tenant", default=None)
+
+
+@contextmanager
+def use_tenant(name):
+    # for worker threads (outbox, child pool) that run outside a turn's context
+    token = current_tenant.set(name)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+class TenantRegistry:
+    """
+    Tenant configs loaded once, reloaded without a restart when the file changes.
+
+    A broken file (bad JSON, missing base_url) is logged and ignored: the last
+    good registry stays in use.
+    """
+
+    def __init__(self, path=FUSION_TENANTS_FILE, reload_interval=FUSION_TENANTS_RELOAD_SECONDS):
+        self.path = path
+        self.reload_interval = reload_interval
+
+        self._tenants = {}
+        self._default = DEFAULT_TENANT
+        self._by_tenant_id = {}
+        self._by_channel = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        self.reloads = 0
+        self.reload_errors = 0
+
+        if path:
+            self._maybe_reload(force=True)
+        if not self._tenants:
+            # single-pod deployment: the FUSION_* environment, as before
+            self._tenants = {DEFAULT_TENANT: {
+                "base_url": FUSION_BASE_URL,
+                "username": FUSION_USERNAME,
+                "password": FUSION_PASSWORD,
+                "rate_limit": FUSION_RATE_LIMIT,
+                "max_in_flight": FUSION_MAX_IN_FLIGHT
+            }}
+
+    # --------------------------------------------------------------
+    # Loading
+    # --------------------------------------------------------------
+    def _maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not self.path or (not force and now - self._checked_at < self.reload_interval):
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as e:
+                if self._mtime is not None or force:
+                    logger.error("Tenant file %s unavailable, keeping current tenants: %s", self.path, e)
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._set(json.load(f))
+            except (ValueError, KeyError, TypeError) as e:
+                self.reload_errors += 1
+                logger.error("Tenant file %s rejected, keeping current tenants: %s", self.path, e)
+                return
+            self.reloads += 1
+            logger.info("Loaded %s Fusion tenants from %s", len(self._tenants), self.path)
+
+    def _set(self, data):
+        tenants, by_tenant_id, by_channel = {}, {}, {}
+        for name, entry in data["tenants"].items():
+            if not entry.get("base_url"):
+                raise KeyError(f"tenant {name!r} has no base_url")
+            config = {"username": None, "password": None}
+            config.update((k, entry[k]) for k in CLIENT_KEYS if k in entry)
+            if "password_env" in entry:
+                config["password"] = os.getenv(entry["password_env"])
+            config.setdefault("rate_limit", FUSION_RATE_LIMIT)
+            config.setdefault("max_in_flight", FUSION_MAX_IN_FLIGHT)
+            tenants[name] = config
+
+            for tenant_id in entry.get("tenant_ids", []):
+                by_tenant_id[tenant_id] = name
+            for channel in entry.get("channels", []):
+                by_channel[channel] = name
+
+        default = data.get("default", DEFAULT_TENANT)
+        if default not in tenants:
+            raise KeyError(f"default tenant {default!r} is not defined")
+
+        # swap everything at once; readers never see half a registry
+        self._tenants, self._default = tenants, default
+        self._by_tenant_id, self._by_channel = by_tenant_id, by_channel
+
+    # --------------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------------
+    def names(self):
+        self._maybe_reload()
+        return list(self._tenants)
+
+    def get(self, name=None):
+        """
+        (name, FusionClient settings); None -> the current turn's tenant,
+        then the default. Unknown names fall back to the default tenant.
+        """
+        self._maybe_reload()
+        name = name or current_tenant.get() or self._default
+        if name not in self._tenants:
+            name = self._default
+        return name, self._tenants[name]
+
+    def resolve(self, activity):
+        """
+        Tenant for a Bot Framework / direct activity:
+          1. channelData.fusionTenant (explicit name, e.g. from /chat)
+          2. channelData.tenant.id or conversation.tenantId (Teams / Entra tenant)
+          3. channelId ("msteams", "webchat", "direct", ...)
+          4. the default tenant
+        """
+        self._maybe_reload()
+        channel_data = activity.get("channelData") or {}
+
+        explicit = channel_data.get("fusionTenant")
+        if explicit in self._tenants:
+            return explicit
+
+        tenant_id = (channel_data.get("tenant") or {}).get("id") \
+            or (activity.get("conversation") or {}).get("tenantId")
+        if tenant_id in self._by_tenant_id:
+            return self._by_tenant_id[tenant_id]
+
+        return self._by_channel.get(activity.get("channelId"), self._default)
+
+    def stats(self):
+        return {
+            "tenants": len(self._tenants),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+tenants = TenantRegistry()
@@ -0,0 +1,258 @@
+#async, quota-aware front end for gemini_agent.extract_supplier_payload
+import asyncio
+import logging
+import time
+from collections import deque, defaultdict
+
+from config.fusion_settings import (
+    GEMINI_MODEL,
+    GEMINI_FALLBACK_MODEL,
+    GEMINI_RPM,
+    GEMINI_BURST,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_QUEUE,
+    GEMINI_HEDGE_ENABLED,
+    GEMINI_HEDGE_MIN_DELAY,
+    GEMINI_DEADLINE,
+    GEMINI_FALLBACK_DEADLINE
+)
+from gemini_agent import (
+    extract_supplier_payload,
+    extraction_cache,
+    cache_key,
+    GeminiQuotaError
+)
+from utils.executor import run_blocking
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16)
+
+
+# ------------------------------------------------------------------
+# Token bucket sized to the Gemini quota
+# ------------------------------------------------------------------
+class AsyncTokenBucket:
+
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+    def try_acquire(self):
+        now = self._refill()
+        if now < self._paused_until or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.try_acquire():
+                return True
+            now = time.monotonic()
+            wait = max((1 - self._tokens) / self.rate, self._paused_until - now, 0.01)
+            if now + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        # upstream said 429: stop spending tokens for a while
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+
+# ------------------------------------------------------------------
+# Per-model latency (histogram + rolling window for p95)
+# ------------------------------------------------------------------
+class ModelLatency:
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "count": self.count,
+            "sum": round(self.total, 4),
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p95": round(p95, 4) if p95 is not None else None,
+            "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.buckets)),
+        }
+
+
+# ------------------------------------------------------------------
+# Extraction service
+# ------------------------------------------------------------------
+class GeminiExtractionService:
+    """
+    extract() never raises: it returns Gemini's fields, the fallback model's
+    fields, or {} (caller assigns the raw text) once the deadline has passed.
+    """
+
+    def __init__(self, model=GEMINI_MODEL, fallback_model=GEMINI_FALLBACK_MODEL,
+                 rpm=GEMINI_RPM, burst=GEMINI_BURST,
+                 max_concurrency=GEMINI_MAX_CONCURRENCY, max_queue=GEMINI_MAX_QUEUE,
+                 hedge_enabled=GEMINI_HEDGE_ENABLED, hedge_min_delay=GEMINI_HEDGE_MIN_DELAY,
+                 deadline=GEMINI_DEADLINE, fallback_deadline=GEMINI_FALLBACK_DEADLINE,
+                 quota_backoff=10.0):
+        self.model = model
+        self.fallback_model = fallback_model
+        self.bucket = AsyncTokenBucket(rpm / 60.0, burst)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.deadline = deadline
+        self.fallback_deadline = fallback_deadline
+        self.quota_backoff = quota_backoff
+
+        self._slots = None
+        self._waiting = 0
+        self.latency = defaultdict(ModelLatency)
+        self.counters = defaultdict(int)
+
+    async def extract(self, user_input, fields=None):
+        self.counters["requests"] += 1
+
+        # cache hits skip admission entirely (no quota spent)
+        cached = extraction_cache.get(cache_key(user_input, self.model, fields))
+        if cached is not None:
+            self.counters["cache_hits"] += 1
+            return dict(cached)
+
+        result = await self._run(self.model, user_input, fields, self.deadline, self.hedge_enabled)
+        if result is not None:
+            return result
+
+        if self.fallback_model and self.fallback_model != self.model:
+            self.counters["fallback_model"] += 1
+            result = await self._run(self.fallback_model, user_input, fields, self.fallback_deadline, False)
+            if result is not None:
+                return result
+
+        self.counters["raw_text_fallback"] += 1
+        return {}
+
+    # --------------------------------------------------------------
+    # Admission: bounded wait queue -> token bucket -> concurrency slot
+    # --------------------------------------------------------------
+    async def _run(self, model, user_input, fields, deadline, hedge):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        deadline_at = time.monotonic() + deadline
+
+        if self._waiting >= self.max_queue:
+            self.counters["queue_rejected"] += 1
+            return None
+
+        self._waiting += 1
+        try:
+            if not await self.bucket.acquire(timeout=deadline):
+                self.counters["rate_limited"] += 1
+                return None
+            try:
+                await asyncio.wait_for(self._slots.acquire(), deadline_at - time.monotonic())
+            except asyncio.TimeoutError:
+                self.counters["deadline_exceeded"] += 1
+                return None
+        finally:
+            self._waiting -= 1
+
+        try:
+            return await self._hedged(model, user_input, fields, deadline_at, hedge)
+        finally:
+            self._slots.release()
+
+    # --------------------------------------------------------------
+    # Hedging: fire a duplicate once the primary is slower than p95
+    # --------------------------------------------------------------
+    async def _hedged(self, model, user_input, fields, deadline_at, hedge):
+        primary = asyncio.ensure_future(self._call(model, user_input, fields, coalesce=True))
+        pending = {primary}
+
+        hedge_delay = max(self.hedge_min_delay, self.latency[model].percentile(0.95) or 0)
+        if hedge and time.monotonic() + hedge_delay < deadline_at:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done and self.bucket.try_acquire():
+                self.counters["hedges"] += 1
+                pending.add(asyncio.ensure_future(self._call(model, user_input, fields, coalesce=False)))
+
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                try:
+                    result = task.result()
+                except GeminiQuotaError:
+                    self.counters["quota_errors"] += 1
+                    self.bucket.pause(self.quota_backoff)
+                    continue
+                except Exception:
+                    logging.exception("Gemini extraction failed (%s)", model)
+                    self.counters["errors"] += 1
+                    continue
+                if task is not primary:
+                    self.counters["hedge_wins"] += 1
+                return result
+        else:
+            # every attempt failed before the deadline
+            return None
+
+        # the executor threads finish on their own; we just stop waiting
+        for task in pending:
+            task.cancel()
+        self.counters["deadline_exceeded"] += 1
+        return None
+
+    async def _call(self, model, user_input, fields, coalesce):
+        started = time.monotonic()
+        try:
+            return await run_blocking(
+                extract_supplier_payload, user_input,
+                model=model, fields=fields, raise_on_quota=True, coalesce=coalesce
+            )
+        finally:
+            self.latency[model].observe(time.monotonic() - started)
+
+    def stats(self):
+        return {
+            "waiting": self._waiting,
+            "counters": dict(self.counters),
+            "latency": {model: h.stats() for model, h in self.latency.items()},
+        }
+
+
+extraction_service = GeminiExtractionService()
@@ -1,37 +1,335 @@
-import requests
-from requests.auth import HTTPBasicAuth
-from config.fusion_settings import FUSION_BASE_URL, FUSION_USERNAME, FUSION_PASSWORD, SUPPLIER_ENDPOINT
+import threading
+import time
 import logging
 
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.fusion_settings import (
+    SUPPLIER_ENDPOINT,
+    FUSION_CONNECT_TIMEOUT,
+    FUSION_READ_TIMEOUT,
+    FUSION_POOL_SIZE,
+    FUSION_MAX_RETRIES,
+    FUSION_BACKOFF_BASE,
+    FUSION_BACKOFF_MAX,
+    FUSION_BREAKER_THRESHOLD,
+    FUSION_BREAKER_RESET_SECONDS,
+    FUSION_RATE_LIMIT,
+    FUSION_MAX_IN_FLIGHT,
+    LOG_PAYLOAD_SAMPLE_RATE,
+    IDEMPOTENCY_WINDOW
+)
+from config.tenants import tenants
+from utils.auth import get_basic_auth_header
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.http_retry import NOT_PROCESSED_STATUSES, RETRY_STATUSES, retry_delay
+from utils.idempotency import IdempotentResults
+from utils.metrics import REGISTRY, track_stage
+from utils.log_setup import log_payload
+from utils.rate_limit import RateLimiter
+from utils.startup_report import startup_report
+
+logger = logging.getLogger("fusion_client")
+
+FUSION_REQUEST_SECONDS = REGISTRY.histogram(
+    "agent_fusion_request_seconds",
+    "Fusion REST round-trips per tenant",
+    ("tenant", "method", "outcome")
+)
+
+
+class FusionBusyError(requests.RequestException):
+    """This tenant already has max_in_flight requests open."""
+
+
+class FusionClient:
+    """
+    Shared Fusion REST client.
+
+    - one keep-alive connection pool, Basic auth header built once
+    - (connect, read) timeouts instead of a flat 60s
+    - jittered exponential backoff on 429/502/503/504, honoring Retry-After
+    - circuit breaker so callers fail fast while Fusion is down
+    - per tenant: own pool / breaker, optional rate limit and a cap on
+      concurrent requests, so one slow pod can't tie up every worker thread
+    """
+
+    def __init__(self, base_url, username, password,
+                 connect_timeout=FUSION_CONNECT_TIMEOUT,
+                 read_timeout=FUSION_READ_TIMEOUT,
+                 pool_size=FUSION_POOL_SIZE,
+                 max_retries=FUSION_MAX_RETRIES,
+                 backoff_base=FUSION_BACKOFF_BASE,
+                 backoff_max=FUSION_BACKOFF_MAX,
+                 rate_limit=FUSION_RATE_LIMIT,
+                 max_in_flight=FUSION_MAX_IN_FLIGHT,
+                 tenant="default",
+                 breaker=None):
+        self.base_url = (base_url or "").rstrip("/")
+        self.username = username
+        self.password = password
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tenant = tenant
+        self.max_in_flight = max_in_flight or pool_size
+        self._limiter = RateLimiter(rate_limit)
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self.breaker = breaker or CircuitBreaker(
+            f"fusion:{tenant}",
+            failure_threshold=FUSION_BREAKER_THRESHOLD,
+            reset_timeout=FUSION_BREAKER_RESET_SECONDS
+        )
+
+        self.requests = 0
+        self.retries = 0
+        self.busy = 0
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    # --------------------------------------------------------------
+    # Connection pool
+    # --------------------------------------------------------------
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    t0 = time.perf_counter()
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        max_retries=0
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "Authorization": get_basic_auth_header(self.username, self.password),
+                        "Content-Type": "application/json",
+                        "Accept": "application/json"
+                    })
+                    self._session = session
+                    startup_report.record("fusion_session", time.perf_counter() - t0)
+        return self._session
+
+    def warm_up(self):
+        # open one pooled TLS connection ahead of the first create
+        if not self.base_url:
+            return
+        try:
+            self.session.head(self.base_url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.info("Fusion warm-up request failed: %s", e)
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    # --------------------------------------------------------------
+    # Requests
+    # --------------------------------------------------------------
+    def request(self, method, path, **kwargs):
+        """
+        Raises CircuitOpenError when the breaker is open, otherwise returns
+        the final requests.Response (or re-raises the last network error).
+        """
+        self.breaker.before_call()
+        try:
+            # wait at most a connect timeout for a slot, then fail fast
+            if not self._in_flight.acquire(timeout=self.timeout[0]):
+                self.busy += 1
+                raise FusionBusyError(f"Fusion tenant {self.tenant} has {self.max_in_flight} requests in flight")
+            try:
+                response = self._request(method, path, **kwargs)
+            finally:
+                self._in_flight.release()
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # every path must settle the breaker, or a half-open trial never ends
+            self.breaker.release()
+            raise
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _request(self, method, path, **kwargs):
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+        # a POST is only resent when Fusion says it didn't process it
+        retry_statuses = RETRY_STATUSES if idempotent else NOT_PROCESSED_STATUSES
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.requests += 1
+            self._limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(method, started, "error")
+                # a read timeout on a POST may already have created the record
+                retryable = idempotent or not isinstance(e, requests.ReadTimeout)
+                if retryable and attempt <= self.max_retries:
+                    self._sleep_before_retry(attempt, None)
+                    continue
+                raise
+            self._observe(method, started, f"{response.status_code // 100}xx")
+
+            if response.status_code in retry_statuses and attempt <= self.max_retries:
+                self._sleep_before_retry(attempt, response.headers.get("Retry-After"))
+                continue
+            return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
 
-def create_supplier(payload: dict):
-    url = f"{FUSION_BASE_URL}{SUPPLIER_ENDPOINT}"
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
 
-    response = requests.post(
-        url,
-        json=payload,
-        auth=HTTPBasicAuth(FUSION_USERNAME, FUSION_PASSWORD),
-        headers={
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        },
-        timeout=60
+    def _observe(self, method, started, outcome):
+        FUSION_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, tenant=self.tenant, method=method.upper(), outcome=outcome
+        )
+
+    def _sleep_before_retry(self, attempt, retry_after):
+        self.retries += 1
+        delay = retry_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+        logger.warning("Fusion request retry #%s in %.2fs", attempt, delay)
+        time.sleep(delay)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "busy": self.busy,
+            "breaker": self.breaker.stats(),
+        }
+
+
+# ------------------------------------------------------------------
+# One client per tenant (config/tenants.py)
+# ------------------------------------------------------------------
+_clients = {}       # tenant -> (settings, FusionClient)
+_client_lock = threading.Lock()
+
+
+def get_fusion_client(tenant=None):
+    """
+    Client for `tenant`, or for the current turn's tenant (default tenant
+    outside a turn). Rebuilt when the tenant's settings change on reload.
+    """
+    name, settings = tenants.get(tenant)
+    entry = _clients.get(name)
+    if entry is None or entry[0] != settings:
+        with _client_lock:
+            entry = _clients.get(name)
+            if entry is None or entry[0] != settings:
+                # the old client may still be serving requests; it is dropped, not closed
+                entry = _clients[name] = (settings, FusionClient(tenant=name, **settings))
+    return entry[1]
+
+
+def fusion_stats():
+    return {name: client.stats() for name, (_, client) in list(_clients.items())}
+
+
+# first successful create per idempotency key; failures are not kept so they can be retried
+create_results = IdempotentResults(
+    ttl=IDEMPOTENCY_WINDOW,
+    should_cache=lambda result: 200 <= result[0] < 300
+)
+
+
+def create_supplier(payload: dict, idempotency_key=None):
+    """
+    idempotency_key: repeat calls with the same key (and payload) return the
+    first successful result instead of POSTing a second supplier.
+    """
+    if idempotency_key is None:
+        return _create_supplier(payload)
+    key = IdempotentResults.make_key(idempotency_key, payload=payload)
+    return create_results.run(key, lambda: _create_supplier(payload))
+
+
+def _create_supplier(payload: dict):
+    return _post(SUPPLIER_ENDPOINT, payload, "fusion_create", "create")
+
+
+def create_child(supplier_id, resource, payload: dict):
+    """
+    POST one child resource (addresses / sites / contacts) of an existing supplier.
+    """
+    return _post(
+        f"{SUPPLIER_ENDPOINT}/{supplier_id}/child/{resource}",
+        payload,
+        "fusion_create_child",
+        f"create {resource}"
     )
 
-    logging.info("--- FUSION DEBUG START ---")
-    logging.info(f"Status: {response.status_code}")
+
+def _post(path, payload: dict, stage, label):
+    with track_stage(stage) as t:
+        try:
+            response = get_fusion_client().post(path, json=payload)
+        except CircuitOpenError as e:
+            t.outcome = "circuit_open"
+            logger.warning("%s", e)
+            return 503, "Fusion is temporarily unavailable, please try again shortly."
+        except requests.RequestException as e:
+            t.outcome = "unreachable"
+            logger.error("Fusion request failed: %s", e)
+            return 503, f"Could not reach Fusion: {e}"
+        t.outcome = f"{response.status_code // 100}xx"
 
     try:
         body = response.json()
-        logging.info(f"Raw Response: {body}")
     except ValueError:
         body = None
-        logging.info(f"Raw Response Text: {response.text}")
 
-    logging.info("--- FUSION DEBUG END ---")
+    # failures are always logged, successes only sampled
+    log_payload(
+        logger,
+        f"Fusion {label} status={response.status_code}",
+        body if body is not None else response.text,
+        rate=1.0 if response.status_code >= 300 else LOG_PAYLOAD_SAMPLE_RATE,
+        level=logging.WARNING if response.status_code >= 300 else logging.INFO
+    )
 
     # 🔴 IMPORTANT: return TEXT if JSON is empty
     if not body:
         return response.status_code, response.text.strip()
 
     return response.status_code, body
+
+
+def find_supplier(name):
+    """
+    Existing supplier with exactly this name, or None. Used before re-submitting
+    a create whose earlier attempt may already have landed.
+    """
+    response = get_fusion_client().get(
+        SUPPLIER_ENDPOINT,
+        params={
+            "q": "Supplier='{}'".format(str(name).replace("'", "''")),
+            "fields": "SupplierId,Supplier,SupplierNumber",
+            "limit": 1,
+            "onlyData": "true"
+        }
+    )
+    response.raise_for_status()
+    items = response.json().get("items", [])
+    return items[0] if items else None
@@ -1,17 +1,112 @@
-from config.fusion_settings import FUSION_ALLOWED_VALUES
+#per-dict supplier validation (chat turns, bulk rows); batch_validator.py runs
+#the same rules over numpy columns for large files
+import re
+
+from config.fusion_settings import CHILD_FIELD_RULES, TAXPAYER_ID_RULES
+from utils.lov_cache import get_lov_index
+from utils.metrics import track_stage
+
+RULE_LOV = "lov"
+RULE_DUNS = "duns_9_digits"
+RULE_TAXPAYER_ID = "taxpayer_id_format"
+RULE_CHILD_FORMAT = "child_field_format"
+RULES = [RULE_LOV, RULE_DUNS, RULE_TAXPAYER_ID, RULE_CHILD_FORMAT]
+
+TAXPAYER_ID_SEPARATORS = ("-", " ", ".")
+
+# TAXPAYER_ID_RULES -> (length, charset check), built once; the checks are the
+# str methods numpy's np.char.isdigit / isalnum apply per element
+TAXPAYER_ID_CHECKS = {
+    country: (rule["length"], str.isdigit if rule["charset"] == "digits" else str.isalnum)
+    for country, rule in TAXPAYER_ID_RULES.items()
+}
+
+CHILD_FIELD_PATTERNS = {field: re.compile(rule["pattern"]) for field, rule in CHILD_FIELD_RULES.items()}
+
+
+# ------------------------------------------------------------------
+# Rules (shared with batch_validator)
+# ------------------------------------------------------------------
+def compact_taxpayer_id(value):
+    for sep in TAXPAYER_ID_SEPARATORS:
+        value = value.replace(sep, "")
+    return value
+
+
+def duns_ok(value):
+    return len(value) == 9 and value.isdigit()
+
+
+def taxpayer_id_ok(country, value):
+    check = TAXPAYER_ID_CHECKS.get(country)
+    if check is None:
+        return True
+    length, charset_ok = check
+    value = compact_taxpayer_id(value)
+    return len(value) == length and charset_ok(value)
+
+
+def child_field_ok(field, value):
+    return CHILD_FIELD_PATTERNS[field].fullmatch(value) is not None
 
-def validate_against_fusion(payload):
-    errors = []
 
-    for field, allowed in FUSION_ALLOWED_VALUES.items():
-        if payload.get(field) and payload[field] not in allowed:
-            errors.append(
-                f"{field} must be one of {allowed}. "
-                f"Received: {payload.get(field)}"
-            )
+def rule_message(rule, field, value, allowed=None, country=None):
+    if rule == RULE_LOV:
+        return f"{field} must be one of {allowed}. Received: {value}"
+    if rule == RULE_DUNS:
+        return "DUNSNumber must be exactly 9 digits"
+    if rule == RULE_CHILD_FORMAT:
+        return f"{field} must be {CHILD_FIELD_RULES[field]['label']}. Received: {value}"
+    return f"TaxpayerId must be {TAXPAYER_ID_RULES[country]['label']} for {country}. Received: {value}"
+
+
+def _text(value):
+    # same view of a value as the columnar loader: None -> "", else str()
+    return "" if value is None else str(value)
+
+
+def _errors(payload):
+    errors = {}
+    lov = get_lov_index()
+
+    for field in lov.fields:
+        value = _text(payload.get(field))
+        if value and not lov.is_allowed(field, value):
+            errors[field] = [rule_message(RULE_LOV, field, value, allowed=lov.allowed(field))]
+
+    duns = _text(payload.get("DUNSNumber"))
+    if duns and not duns_ok(duns):
+        errors["DUNSNumber"] = [rule_message(RULE_DUNS, "DUNSNumber", duns)]
+
+    taxpayer_id = _text(payload.get("TaxpayerId"))
+    country = _text(payload.get("TaxpayerCountry"))
+    if taxpayer_id and not taxpayer_id_ok(country, taxpayer_id):
+        errors["TaxpayerId"] = [rule_message(RULE_TAXPAYER_ID, "TaxpayerId", taxpayer_id, country=country)]
+
+    for field in CHILD_FIELD_RULES:
+        value = _text(payload.get(field))
+        if value and not child_field_ok(field, value):
+            errors[field] = [rule_message(RULE_CHILD_FORMAT, field, value)]
+
+    return errors
+
+
+# ------------------------------------------------------------------
+# Entry points
+# ------------------------------------------------------------------
+def validate_against_fusion(payload):
+    with track_stage("validate") as t:
+        errors = [m for messages in _errors(payload).values() for m in messages]
+        t.outcome = "invalid" if errors else "ok"
+    return errors
 
-    if payload.get("DUNSNumber"):
-        if not payload["DUNSNumber"].isdigit() or len(payload["DUNSNumber"]) != 9:
-            errors.append("DUNSNumber must be exactly 9 digits")
 
+def validate_fields(payload, fields):
+    """
+    Errors for `fields` only, {field: [messages]}; run as soon as they are filled.
+    """
+    with track_stage("validate_field") as t:
+        errors = _errors(payload)
+        errors = {f: errors[f] for f in fields if f in errors}
+        t.outcome = "invalid" if errors else "ok"
     return errors
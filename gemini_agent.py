@@ -1,8 +1,40 @@
-from google import genai
-from config.fusion_settings import GEMINI_API_KEY
+import threading
+from config.fusion_settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_BASE_URL,
+    GEMINI_STRUCTURED_OUTPUT,
+    EXTRACTION_CACHE_SIZE,
+    EXTRACTION_CACHE_TTL,
+    EXTRACTION_CACHE_DB,
+    REQUIRED_FIELDS,
+    DEFAULT_VALUES
+)
+from utils.extraction_cache import ExtractionCache
+from utils.metrics import track_stage
+from utils.startup_report import startup_report
 import json
 
-client = genai.Client(api_key=GEMINI_API_KEY)
+# ------------------------------------------------------------------
+# Gemini client (created on first use; the SDK import is slow)
+# ------------------------------------------------------------------
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                with startup_report.track("gemini_client"):
+                    from google import genai
+                    from google.genai import types
+                    _client = genai.Client(
+                        api_key=GEMINI_API_KEY,
+                        http_options=types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+                    )
+    return _client
 
 SYSTEM_PROMPT = """
 Extract Oracle Fusion Supplier fields from user input.
@@ -23,34 +55,164 @@ TaxpayerId
 DUNSNumber
 """
 
-import json
+# fields the user is asked for (defaults like BusinessRelationship are not)
+EXTRACTABLE_FIELDS = [f for f in REQUIRED_FIELDS if f not in DEFAULT_VALUES]
+
+FIELD_HINTS = {
+    "Supplier": "supplier / company name",
+    "TaxOrganizationType": "tax organization type, e.g. Corporation",
+    "SupplierType": "supplier type, e.g. Services",
+    "TaxpayerCountry": "country the taxpayer is based in",
+    "TaxpayerId": "taxpayer ID, e.g. 12-3456789",
+    "DUNSNumber": "9-digit DUNS number"
+}
+
+SCOPED_PROMPT = """
+Extract Oracle Fusion Supplier fields from user input.
+
+Rules:
+- Extract ONLY fields explicitly mentioned
+- Do NOT guess values
+- Do NOT normalize
+- Omit fields that are not mentioned
+
+Fields:
+{fields}
+"""
+
+# bump whenever a prompt / schema changes so cached answers are not reused
+PROMPT_VERSION = "2"
+
+extraction_cache = ExtractionCache(
+    max_entries=EXTRACTION_CACHE_SIZE,
+    ttl=EXTRACTION_CACHE_TTL,
+    db_path=EXTRACTION_CACHE_DB or None
+)
+
 import logging
-from google.genai.errors import ClientError
 
-def extract_supplier_payload(user_input: str) -> dict:
+class GeminiQuotaError(Exception):
+    """Gemini answered 429 / RESOURCE_EXHAUSTED."""
+
+
+# ------------------------------------------------------------------
+# Field-scoped prompt + response schema
+# ------------------------------------------------------------------
+def scope_fields(fields=None) -> list:
+    if not fields:
+        return list(EXTRACTABLE_FIELDS)
+    # keep REQUIRED_FIELDS order so identical scopes share a cache key
+    wanted = set(fields)
+    return [f for f in EXTRACTABLE_FIELDS if f in wanted] or list(EXTRACTABLE_FIELDS)
+
+
+def build_prompt(fields: list) -> str:
+    return SCOPED_PROMPT.format(
+        fields="\n".join(f"{f}: {FIELD_HINTS.get(f, f)}" for f in fields)
+    )
+
+
+def build_response_schema(fields: list) -> dict:
+    return {
+        "type": "OBJECT",
+        "properties": {f: {"type": "STRING", "nullable": True} for f in fields}
+    }
+
+
+def _parse_json(text: str):
+    text = text.strip()
+
+    # 🔒 Strip a markdown fence if present (free-form mode only)
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+
+    return json.loads(text)
+
+
+# ------------------------------------------------------------------
+# Extraction
+# ------------------------------------------------------------------
+def _scope(fields):
+    return scope_fields(fields) if GEMINI_STRUCTURED_OUTPUT else None
+
+
+def cache_key(user_input: str, model: str = GEMINI_MODEL, fields: list = None) -> str:
+    return ExtractionCache.make_key(user_input, PROMPT_VERSION, model, ",".join(_scope(fields) or []))
+
+
+def extract_supplier_payload(user_input: str, model: str = GEMINI_MODEL, fields: list = None,
+                             raise_on_quota: bool = False, coalesce: bool = True) -> dict:
+    scoped = _scope(fields)
+    key = cache_key(user_input, model, fields)
+    with track_stage("gemini_extract") as t:
+        try:
+            # failures come back as {} and are not cached
+            if coalesce:
+                result = extraction_cache.get_or_compute(key, lambda: _call_gemini(user_input, model, scoped))
+            else:
+                # hedged duplicate: must not wait on the in-flight call it is racing
+                result = _call_gemini(user_input, model, scoped)
+                if result:
+                    extraction_cache.put(key, result)
+        except GeminiQuotaError:
+            t.outcome = "quota"
+            if raise_on_quota:
+                raise
+            return {}
+        t.outcome = "ok" if result else "empty"
+    return dict(result)
+
+
+def _call_gemini(user_input: str, model: str, fields: list = None) -> dict:
+    client = get_client()
+    from google.genai import types
+    from google.genai.errors import ClientError
+
     try:
-        response = client.models.generate_content(
-            model="models/gemini-2.5-flash",
-            contents=f"{SYSTEM_PROMPT}\n\nUser input:\n{user_input}"
-        )
+        if fields:
+            response = client.models.generate_content(
+                model=model,
+                contents=f"User input:\n{user_input}",
+                config=types.GenerateContentConfig(
+                    system_instruction=build_prompt(fields),
+                    response_mime_type="application/json",
+                    response_schema=build_response_schema(fields)
+                )
+            )
+        else:
+            response = client.models.generate_content(
+                model=model,
+                contents=f"{SYSTEM_PROMPT}\n\nUser input:\n{user_input}"
+            )
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            logging.info(
+                "Gemini tokens model=%s fields=%s prompt=%s output=%s",
+                model, len(fields or EXTRACTABLE_FIELDS),
+                usage.prompt_token_count, usage.candidates_token_count
+            )
 
         if not response or not response.text:
             return {}
 
-        text = response.text.strip()
-
-        # 🔒 Strip markdown if present
-        if text.startswith("```"):
-            text = text.strip("```").replace("json", "").strip()
+        parsed = getattr(response, "parsed", None) if fields else None
+        if not isinstance(parsed, dict):
+            parsed = _parse_json(response.text)
 
-        parsed = json.loads(text)
         if isinstance(parsed, dict):
-            return parsed
+            allowed = set(fields or EXTRACTABLE_FIELDS)
+            return {
+                k: v for k, v in parsed.items()
+                if k in allowed and v not in (None, "")
+            }
 
     except ClientError as e:
         # 🔥 Gemini quota / rate-limit / auth errors
-        logging.error("Gemini API error (quota / auth / rate limit)")
-        logging.error(str(e))
+        logging.error("Gemini API error (quota / auth / rate limit): %s", e)
+        if getattr(e, "code", None) == 429:
+            raise GeminiQuotaError(str(e)) from e
 
     except json.JSONDecodeError:
         logging.warning("Gemini returned non-JSON response")
@@ -1,7 +1,10 @@
+import os
+
 import streamlit as st
 import requests
 
-API_URL = "http://localhost:8009/supplier-agent"
+# direct chat API: reply comes back in the HTTP response (no Bot Framework hop)
+API_URL = os.getenv("SUPPLIER_AGENT_CHAT_URL", "http://localhost:8009/chat")
 
 st.set_page_config(page_title="Supplier Agent Chat", layout="centered")
 
@@ -0,0 +1,189 @@
+#supplier child resources (addresses, sites, contacts) created after the supplier header
+import contextvars
+import json
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from config.fusion_settings import (
+    SUPPLIER_CHILD_RESOURCES,
+    SUPPLIER_CHILDREN,
+    SUPPLIER_CHILD_CONCURRENCY
+)
+from fusion_client import create_child, create_results, create_supplier
+from utils.idempotency import IdempotentResults
+
+logger = logging.getLogger("supplier_children")
+
+
+# ------------------------------------------------------------------
+# Dependency plan (from the "links" in SUPPLIER_CHILD_RESOURCES)
+# ------------------------------------------------------------------
+def dependencies(name):
+    links = SUPPLIER_CHILD_RESOURCES[name].get("links", {})
+    return sorted({source.split(".", 1)[0] for source in links.values()})
+
+
+def plan_levels(names):
+    """
+    [[level 0 resources], [level 1 resources], ...]: every resource sits one
+    level below the deepest resource it links to; one level = one round-trip.
+    """
+    levels, placed, pending = [], set(), list(names)
+    while pending:
+        level = [n for n in pending if set(dependencies(n)) <= placed]
+        if not level:
+            raise ValueError(
+                f"SUPPLIER_CHILDREN={names}: {pending} depend on resources that are not enabled"
+            )
+        levels.append(level)
+        placed.update(level)
+        pending = [n for n in pending if n not in placed]
+    return levels
+
+
+LEVELS = plan_levels(SUPPLIER_CHILDREN)
+
+_pool = ThreadPoolExecutor(max_workers=SUPPLIER_CHILD_CONCURRENCY, thread_name_prefix="fusion-child")
+
+_counts = defaultdict(int)      # "<resource>_<created|failed|skipped>"
+_counts_lock = threading.Lock()
+
+
+def _count(name, outcome):
+    with _counts_lock:
+        _counts[f"{name}_{outcome}"] += 1
+
+
+# ------------------------------------------------------------------
+# Payloads
+# ------------------------------------------------------------------
+def split_payload(session: dict):
+    """
+    Chat session -> (supplier header, {resource: {field: value}}).
+    """
+    header, children = {}, {}
+    for key, value in session.items():
+        if "." in key:
+            resource, field = key.split(".", 1)
+            if value is not None:
+                children.setdefault(resource, {})[field] = value
+        else:
+            header[key] = value
+    return header, children
+
+
+def child_payload(name, values, header, created):
+    schema = SUPPLIER_CHILD_RESOURCES[name]
+    payload = dict(schema.get("defaults", {}))
+    for field, source in schema.get("header", {}).items():
+        if header.get(source) is not None:
+            payload[field] = header[source]
+    for field, source in schema.get("links", {}).items():
+        resource, attribute = source.split(".", 1)
+        payload[field] = created[resource].get(attribute)
+    payload.update(values)
+    return payload
+
+
+# ------------------------------------------------------------------
+# Creation
+# ------------------------------------------------------------------
+def create_children(supplier_id, header, children, idempotency_key=None):
+    """
+    POSTs the collected child resources level by level; resources in the same
+    level go out concurrently. Nothing is rolled back (Fusion's REST API
+    can't delete a supplier); the report says what landed and what didn't:
+
+      {"created": {resource: response}, "failed": {resource: [status, response]},
+       "skipped": {resource: dependency that did not get created}}
+    """
+    report = {"created": {}, "failed": {}, "skipped": {}}
+
+    for level in LEVELS:
+        futures = {}
+        for name in level:
+            if name not in children:
+                continue
+            missing = next((d for d in dependencies(name) if d not in report["created"]), None)
+            if missing:
+                report["skipped"][name] = missing
+                _count(name, "skipped")
+                continue
+            payload = child_payload(name, children[name], header, report["created"])
+            # carry the turn's tenant (and trace id) into the pool thread
+            futures[name] = _pool.submit(
+                contextvars.copy_context().run, _create_one, supplier_id, name, payload, idempotency_key
+            )
+
+        for name, future in futures.items():
+            status, response = future.result()
+            if 200 <= status < 300 and isinstance(response, dict):
+                report["created"][name] = response
+                _count(name, "created")
+            else:
+                report["failed"][name] = [status, response]
+                _count(name, "failed")
+
+    if report["failed"] or report["skipped"]:
+        logger.warning(
+            "Supplier %s children incomplete: failed=%s skipped=%s",
+            supplier_id, list(report["failed"]), list(report["skipped"])
+        )
+    return report
+
+
+def _create_one(supplier_id, name, payload, idempotency_key):
+    if idempotency_key is None:
+        return create_child(supplier_id, name, payload)
+    # a retried confirm / outbox attempt doesn't post the same child twice
+    key = IdempotentResults.make_key(idempotency_key, supplier_id, name, payload=payload)
+    return create_results.run(key, lambda: create_child(supplier_id, name, payload))
+
+
+def create_supplier_with_children(session: dict, idempotency_key=None, existing=None):
+    """
+    Supplier header first (or `existing`, a supplier an earlier attempt already
+    created), then its children. On success the response carries the
+    child report under "children".
+    """
+    header, children = split_payload(session)
+    if existing:
+        status, response = 201, existing
+    else:
+        status, response = create_supplier(header, idempotency_key=idempotency_key)
+
+    if status == 201 and isinstance(response, dict) and children:
+        report = create_children(response.get("SupplierId"), header, children, idempotency_key)
+        response = {**response, "children": report}
+    return status, response
+
+
+# ------------------------------------------------------------------
+# Chat message
+# ------------------------------------------------------------------
+def children_message(report):
+    if not report:
+        return ""
+    lines = []
+    for name in report["created"]:
+        lines.append(f"✅ {name.capitalize()} created")
+    for name, (status, response) in report["failed"].items():
+        detail = json.dumps(response) if isinstance(response, dict) else str(response)
+        lines.append(f"❌ {name.capitalize()} failed ({status}): {detail[:300]}")
+    for name, dependency in report["skipped"].items():
+        lines.append(f"⏭️ {name.capitalize()} not sent: needs {dependency}")
+
+    if report["failed"] or report["skipped"]:
+        lines.append(
+            "\n⚠️ Nothing was rolled back: the supplier and the items marked ✅ stay in Fusion. "
+            "Add the remaining items to this supplier in Fusion."
+        )
+    return "\n".join(lines)
+
+
+def stats():
+    with _counts_lock:
+        counts = dict(_counts)
+    return {"levels": len(LEVELS), "concurrency": SUPPLIER_CHILD_CONCURRENCY, **counts}
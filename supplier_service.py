@@ -1,25 +1,18 @@
 #the script that calls the fusion rest api
 import requests
-from config.fusion_settings import (
-    FUSION_BASE_URL,
-    SUPPLIER_ENDPOINT,
-    FUSION_USERNAME,
-    FUSION_PASSWORD
-)
-from utils.auth import get_basic_auth_header
+from config.fusion_settings import SUPPLIER_ENDPOINT
+from fusion_client import get_fusion_client
+from utils.circuit_breaker import CircuitOpenError
 
 def create_supplier(payload: dict):
-    url = FUSION_BASE_URL + SUPPLIER_ENDPOINT
-
-    headers = {
-        "Authorization": get_basic_auth_header(
-            FUSION_USERNAME, FUSION_PASSWORD
-        ),
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-
-    response = requests.post(url, headers=headers, json=payload)
+    try:
+        response = get_fusion_client().post(SUPPLIER_ENDPOINT, json=payload)
+    except (CircuitOpenError, requests.RequestException) as e:
+        return {
+            "status": "FAILED",
+            "httpStatus": 503,
+            "error": str(e)
+        }
 
     if response.status_code == 201:
         data = response.json()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# no background Fusion traffic from module-level singletons
+os.environ.setdefault("LOV_REMOTE_ENABLED", "false")
+os.environ.setdefault("SUPPLIER_INDEX_ENABLED", "false")
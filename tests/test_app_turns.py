@@ -0,0 +1,205 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("google.genai")
+
+os.environ.setdefault("OUTBOX_ENABLED", "false")
+os.environ.setdefault("SESSION_STORE", "memory")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+from utils.bot_sender import SendQueueFull  # noqa: E402
+from utils.session_store import SessionConflict  # noqa: E402
+
+ACTIVITY = {
+    "type": "message",
+    "id": "a1",
+    "text": "Acme",
+    "channelId": "msteams",
+    "conversation": {"id": "c1"},
+}
+
+
+# ------------------------------------------------------------------
+# Session conflicts between workers
+# ------------------------------------------------------------------
+def run_turn_with_conflicts(monkeypatch, conflicts):
+    calls, replies = [], []
+
+    async def handle_activity(activity_json, send=None, direct=False):
+        calls.append(activity_json)
+        if len(calls) <= conflicts:
+            raise SessionConflict(activity_json["conversation"]["id"])
+
+    async def reply(activity, text):
+        replies.append(text)
+
+    monkeypatch.setattr(app, "handle_activity", handle_activity)
+    monkeypatch.setattr(app, "reply", reply)
+    asyncio.run(app.process_turn(ACTIVITY))
+    return calls, replies
+
+
+def test_conflicting_turn_runs_again_on_fresh_state(monkeypatch):
+    calls, replies = run_turn_with_conflicts(monkeypatch, conflicts=1)
+    assert len(calls) == 2
+    assert replies == []
+
+
+def test_repeated_conflict_asks_the_user_to_resend(monkeypatch):
+    calls, replies = run_turn_with_conflicts(monkeypatch, conflicts=2)
+    assert len(calls) == 2
+    assert replies == ["Sorry, I lost track of that message. Please send it again."]
+
+
+# ------------------------------------------------------------------
+# Outbox results are never dropped on a full send queue
+# ------------------------------------------------------------------
+class FullThenFreeSender:
+
+    def __init__(self, full_for):
+        self.full_for = full_for
+        self.submitted = []
+
+    def submit(self, activity, text, block=True):
+        if self.full_for:
+            self.full_for -= 1
+            raise SendQueueFull("full")
+        self.submitted.append(text)
+        return True
+
+
+def test_outbox_result_waits_for_room(monkeypatch):
+    sender = FullThenFreeSender(full_for=3)
+    monkeypatch.setattr(app, "bot_sender", sender)
+
+    app.send_activity(ACTIVITY, "✅ Supplier created")
+    assert sender.submitted == ["✅ Supplier created"]
+
+
+# ------------------------------------------------------------------
+# /bulk/suppliers query parameters
+# ------------------------------------------------------------------
+@pytest.fixture
+def bulk_jobs(monkeypatch):
+    jobs = []
+
+    def run_job(rows, **kwargs):
+        jobs.append(kwargs)
+        return iter(())
+
+    monkeypatch.setattr(app.bulk_onboarding, "run_job", run_job)
+    return jobs
+
+
+@pytest.mark.parametrize("rate", ["0", "-1", "nan"])
+def test_bulk_rate_cannot_switch_the_limiter_off(bulk_jobs, rate):
+    response = TestClient(app.app).post(f"/bulk/suppliers?rate={rate}", content=b"")
+    assert response.status_code == 400
+    assert bulk_jobs == []
+
+
+def test_bulk_rate_is_capped_at_the_configured_limit(bulk_jobs):
+    client = TestClient(app.app)
+    client.post(f"/bulk/suppliers?rate={app.BULK_RATE_LIMIT * 10}", content=b"")
+    client.post("/bulk/suppliers?rate=0.5", content=b"")
+    assert [job["rate"] for job in bulk_jobs] == [app.BULK_RATE_LIMIT, 0.5]
+
+
+# ------------------------------------------------------------------
+# COLLECTING / CONFIRM / EDIT state machine (Gemini past its deadline)
+# ------------------------------------------------------------------
+ANSWERS = {
+    "Supplier": "Acme Industrial",
+    "TaxOrganizationType": "Corporation",
+    "SupplierType": "Services",
+    "TaxpayerCountry": "Germany",
+    "TaxpayerId": "DE123456",
+    "DUNSNumber": "123456789",
+    "addresses.PostalCode": "10115",
+    "contacts.Email": "ap@acme.example",
+}
+
+
+class Chat:
+
+    def __init__(self, monkeypatch, name):
+        async def extract(text, fields=None):
+            return {}
+        monkeypatch.setattr(app.extraction_service, "extract", extract)
+        self.client = TestClient(app.app)
+        self.session_id = name
+
+    def say(self, message):
+        response = self.client.post("/chat", json={"message": message, "sessionId": self.session_id})
+        assert response.status_code == 200
+        return response.json()["reply"]
+
+    @property
+    def state(self):
+        return app.sessions.get(f"direct:{self.session_id}")
+
+    def fill_in(self):
+        reply = None
+        while self.state["state"] == "COLLECTING":
+            reply = self.say(ANSWERS.get(self.state["current_field"], "Main"))
+        return reply
+
+
+def test_collects_every_field_then_asks_to_confirm(monkeypatch):
+    chat = Chat(monkeypatch, "collect")
+    assert chat.say("create supplier") == "What is the supplier name?"
+    summary = chat.fill_in()
+
+    assert chat.state["state"] == "CONFIRM"
+    assert "1. Supplier: Acme Industrial" in summary
+    assert "5. TaxpayerCountry: Germany" in summary
+
+
+def test_rejected_answer_is_asked_again(monkeypatch):
+    chat = Chat(monkeypatch, "reject")
+    chat.say("create supplier")
+    while chat.state["current_field"] != "DUNSNumber":
+        chat.say(ANSWERS[chat.state["current_field"]])
+
+    reply = chat.say("12345")
+    assert reply.startswith("Validation failed:\nDUNSNumber must be exactly 9 digits")
+    assert chat.state["current_field"] == "DUNSNumber"
+    assert chat.state["session"]["DUNSNumber"] is None
+
+
+def test_edit_replaces_a_value_nothing_could_parse(monkeypatch):
+    chat = Chat(monkeypatch, "edit")
+    chat.say("create supplier")
+    chat.fill_in()
+
+    assert chat.say("edit").startswith("Which field do you want to edit?")
+    assert chat.say("1") == "What is the supplier name?"
+    summary = chat.say("Beta Holdings")
+
+    assert chat.state["state"] == "CONFIRM"
+    assert "1. Supplier: Beta Holdings" in summary
+
+
+def test_unclear_answers_keep_the_mode_and_count_turns(monkeypatch):
+    chat = Chat(monkeypatch, "turns")
+    chat.say("create supplier")
+    chat.fill_in()
+    turns = chat.state["turns"]
+
+    assert chat.say("maybe") == "Please type: yes, edit, or cancel."
+    chat.say("edit")
+    assert chat.say("99") == "Invalid choice. Try again."
+    assert chat.state["state"] == "EDIT"
+    assert chat.state["turns"] == turns + 3
+
+
+def test_cancel_drops_the_session(monkeypatch):
+    chat = Chat(monkeypatch, "cancel")
+    chat.say("create supplier")
+    chat.fill_in()
+    assert chat.say("cancel") == "❌ Supplier creation cancelled."
+    assert chat.state is None
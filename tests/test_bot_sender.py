@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from utils.bot_sender import BotSender, SendQueueFull
+
+
+def activity(conversation_id):
+    return {"conversation": {"id": conversation_id}}
+
+
+def make_sender(send, **kwargs):
+    sender = BotSender(get_token=lambda: "token", **kwargs)
+    sender.send_now = send          # no HTTP: record what the workers deliver
+    return sender
+
+
+def test_not_running_means_send_inline():
+    sender = make_sender(lambda a, t: "2xx")
+    assert sender.submit(activity("c1"), "hi") is False
+
+
+def test_replies_of_a_conversation_keep_their_order():
+    delivered, in_flight, overlaps = [], set(), []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def send(act, text):
+        conversation_id = act["conversation"]["id"]
+        with lock:
+            if conversation_id in in_flight:
+                overlaps.append(conversation_id)
+            in_flight.add(conversation_id)
+        time.sleep(0.002 * (5 - int(text)))     # earlier replies are slower
+        with lock:
+            in_flight.discard(conversation_id)
+            delivered.append((conversation_id, int(text)))
+            if len(delivered) == 15:
+                done.set()
+        return "2xx"
+
+    sender = make_sender(send, workers=4)
+    sender.start()
+    for n in range(5):
+        for conversation_id in ("a", "b", "c"):
+            sender.submit(activity(conversation_id), str(n))
+    assert done.wait(5)
+    sender.stop()
+
+    assert overlaps == []
+    for conversation_id in ("a", "b", "c"):
+        assert [n for c, n in delivered if c == conversation_id] == [0, 1, 2, 3, 4]
+
+
+@pytest.fixture
+def stalled_sender():
+    # one worker stuck on the first reply; max_queue=1 -> the queue is full
+    gate, started = threading.Event(), threading.Event()
+
+    def send(act, text):
+        started.set()
+        gate.wait(5)
+        return "2xx"
+
+    sender = make_sender(send, workers=1, max_queue=1, block_timeout=0.05)
+    sender.start()
+    sender.submit(activity("c1"), "first")
+    started.wait(5)
+    sender.submit(activity("c1"), "second")
+    yield sender, gate
+    gate.set()
+    sender.stop()
+
+
+def test_full_queue_rejects_without_sending_around_it(stalled_sender):
+    sender, _ = stalled_sender
+    with pytest.raises(SendQueueFull):
+        sender.submit(activity("c1"), "third", block=False)
+    with pytest.raises(SendQueueFull):
+        sender.submit(activity("c1"), "third")
+    assert sender.stats()["overflow"] == 1
+    assert sender.stats()["depth"] == 1
+
+
+def test_blocked_submit_gets_in_once_there_is_room(stalled_sender):
+    sender, gate = stalled_sender
+    sender.block_timeout = 5
+    threading.Timer(0.05, gate.set).start()
+    assert sender.submit(activity("c1"), "third") is True
@@ -0,0 +1,100 @@
+import pytest
+
+import bulk_onboarding
+
+
+def supplier_row(name, duns):
+    return {
+        "Supplier": name, "TaxOrganizationType": "Corporation", "SupplierType": "Services",
+        "TaxpayerCountry": "Germany", "TaxpayerId": f"DE{duns}", "DUNSNumber": duns,
+    }
+
+
+ROWS = [(1, supplier_row("Acme A", "123456781")), (2, supplier_row("Acme B", "123456782"))]
+
+
+class NoIndex:
+    def find_duplicates(self, payload):
+        return {}
+
+    def add(self, supplier, tenant=None):
+        pass
+
+
+@pytest.fixture
+def fusion(monkeypatch):
+    """Fake Fusion: `down` names fail with 503, `existing` names are found by lookup."""
+    state = {"created": [], "looked_up": [], "down": set(), "existing": {}}
+
+    def create_supplier(payload, idempotency_key=None):
+        if payload["Supplier"] in state["down"]:
+            return 503, "busy"
+        state["created"].append(payload["Supplier"])
+        return 201, {"SupplierId": len(state["created"]), "SupplierNumber": f"N{len(state['created'])}"}
+
+    def find_supplier(name):
+        state["looked_up"].append(name)
+        return state["existing"].get(name)
+
+    monkeypatch.setattr(bulk_onboarding, "create_supplier", create_supplier)
+    monkeypatch.setattr(bulk_onboarding, "find_supplier", find_supplier)
+    monkeypatch.setattr(bulk_onboarding, "supplier_index", NoIndex())
+    return state
+
+
+def run(path, rows=ROWS):
+    results = bulk_onboarding.run_job(iter(rows), job_id="t", checkpoint_path=str(path), concurrency=2, batch_size=1)
+    return {r["row"]: r for r in results}
+
+
+def test_resume_skips_finished_rows(tmp_path, fusion):
+    checkpoint = tmp_path / "t.ckpt"
+    fusion["down"] = {"Acme B"}
+    first = run(checkpoint)
+    assert first[1]["status"] == "created"
+    assert first[2]["status"] == "failed"
+
+    fusion["down"] = set()
+    second = run(checkpoint)
+    assert list(second) == [2]
+    assert second[2]["status"] == "created"
+    assert fusion["created"] == ["Acme A", "Acme B"]
+
+
+def test_failed_row_that_landed_is_not_created_twice(tmp_path, fusion):
+    checkpoint = tmp_path / "t.ckpt"
+    fusion["down"] = {"Acme B"}
+    run(checkpoint)
+
+    # the 503 was a lie: Fusion created it anyway
+    fusion["down"] = set()
+    fusion["existing"]["Acme B"] = {"SupplierId": 99, "Supplier": "Acme B", "SupplierNumber": "N99"}
+    second = run(checkpoint)
+
+    assert second[2]["status"] == "created"
+    assert second[2]["SupplierId"] == 99
+    assert second[2]["already_created"] is True
+    assert fusion["looked_up"] == ["Acme B"]
+    assert fusion["created"] == ["Acme A"]
+
+
+def test_torn_checkpoint_line_is_ignored(tmp_path, fusion):
+    checkpoint = tmp_path / "t.ckpt"
+    checkpoint.write_text('{"row": 1, "status": "created"}\n{"row": 2, "sta')
+    assert list(run(checkpoint)) == [2]
+
+
+@pytest.mark.parametrize("row, error", [
+    ([1, 2], "Row must be a JSON object"),
+    ({"_parse_error": "Expecting value"}, "Invalid JSON: Expecting value"),
+    ({**supplier_row("x", "123456789"), "Supplier": {"x": 1}}, "Supplier must be text"),
+])
+def test_bad_rows_are_reported(row, error):
+    payload, errors = bulk_onboarding.prepare_row(row)
+    assert error in errors
+
+
+def test_numeric_cells_read_like_csv_text():
+    payload, errors = bulk_onboarding.prepare_row(supplier_row("Acme", 123456789))
+    assert errors == []
+    assert payload["DUNSNumber"] == "123456789"
@@ -0,0 +1,148 @@
+import pytest
+import requests
+
+from fusion_client import FusionBusyError, FusionClient
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class FakeSession:
+    """Plays back `outcomes` (status codes or exceptions) one request at a time."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(method)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def make_client(session, threshold=2, **kwargs):
+    kwargs.setdefault("max_retries", 2)
+    client = FusionClient(
+        "http://fusion.test", "user", "secret",
+        backoff_base=0,
+        breaker=CircuitBreaker("test", failure_threshold=threshold, reset_timeout=0),
+        **kwargs
+    )
+    client._session = session
+    return client
+
+
+# ------------------------------------------------------------------
+# Breaker state machine
+# ------------------------------------------------------------------
+def test_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_half_open_allows_one_trial():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    breaker.before_call()
+    breaker.record_failure()
+
+    breaker.before_call()               # the trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()           # a second caller while it runs
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_release_frees_the_trial_without_a_verdict():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    breaker.before_call()
+    breaker.record_failure()
+
+    breaker.before_call()
+    breaker.release()
+
+    breaker.before_call()               # not stuck in half-open
+    assert breaker.opened == 1
+
+
+# ------------------------------------------------------------------
+# FusionClient settles the breaker on every path
+# ------------------------------------------------------------------
+def test_non_network_error_does_not_wedge_half_open():
+    client = make_client(FakeSession(
+        requests.ConnectionError("down"),
+        ValueError("bad url"),
+        ValueError("bad url"),
+        200,
+    ), threshold=1, max_retries=0)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get("/suppliers")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            client.get("/suppliers")
+
+    assert client.get("/suppliers").status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_busy_error_releases_the_trial():
+    client = make_client(FakeSession(200), threshold=1, max_in_flight=1, connect_timeout=0.01)
+    client.breaker.before_call()
+    client.breaker.record_failure()
+    client._in_flight.acquire()         # every slot taken
+
+    with pytest.raises(FusionBusyError):
+        client.get("/suppliers")
+    client._in_flight.release()
+
+    assert client.get("/suppliers").status_code == 200
+
+
+def test_server_errors_count_as_failures():
+    client = make_client(FakeSession(500, 500), threshold=2)
+    client.get("/suppliers")
+    client.get("/suppliers")
+    assert client.breaker.stats()["opened"] == 1
+
+
+# ------------------------------------------------------------------
+# Retries
+# ------------------------------------------------------------------
+def test_get_is_retried_on_gateway_errors():
+    session = FakeSession(502, 504, 200)
+    assert make_client(session).get("/suppliers").status_code == 200
+    assert len(session.calls) == 3
+
+
+def test_post_is_not_resent_after_gateway_error():
+    session = FakeSession(502, 201)
+    assert make_client(session).post("/suppliers", json={}).status_code == 502
+    assert len(session.calls) == 1
+
+
+def test_post_is_resent_when_not_processed():
+    session = FakeSession(503, 201)
+    assert make_client(session).post("/suppliers", json={}).status_code == 201
+    assert len(session.calls) == 2
+
+
+def test_post_is_not_resent_after_read_timeout():
+    session = FakeSession(requests.ReadTimeout("slow"), 201)
+    with pytest.raises(requests.ReadTimeout):
+        make_client(session).post("/suppliers", json={})
+    assert len(session.calls) == 1
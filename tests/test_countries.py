@@ -0,0 +1,37 @@
+import pytest
+
+from utils.countries import lookup_country, normalize_taxpayer_id
+
+
+@pytest.mark.parametrize("typed, country", [
+    ("germany", "Germany"),
+    ("DEU", "Germany"),
+    ("Côte d'Ivoire", "Cote d'Ivoire"),
+    ("republic of korea", "Korea, Republic of"),
+    ("germny", "Germany"),
+    ("Untied States", "United States"),
+    ("Frnace", "France"),
+])
+def test_names_codes_and_typos(typed, country):
+    assert lookup_country(typed) == country
+
+
+@pytest.mark.parametrize("typed", [
+    "Irak",         # Iraq / Iran
+    "Chine",        # China / Chile
+    "Nigera",       # Niger / Nigeria
+    "Austrlia",     # Australia / Austria
+])
+def test_equally_close_countries_are_not_guessed(typed):
+    assert lookup_country(typed) is None
+
+
+def test_unknown_text_is_not_a_country():
+    assert lookup_country("zzzz") is None
+    assert lookup_country("") is None
+
+
+def test_taxpayer_id_is_formatted_per_country():
+    assert normalize_taxpayer_id("United States", "123456789") == "12-3456789"
+    assert normalize_taxpayer_id("United States", "1234") == "1234"
+    assert normalize_taxpayer_id("France", "FR 123") == "FR 123"
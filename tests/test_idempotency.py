@@ -0,0 +1,96 @@
+import threading
+import time
+
+from utils.idempotency import IdempotentResults, SeenSet
+
+
+# ------------------------------------------------------------------
+# SeenSet (webhook redeliveries)
+# ------------------------------------------------------------------
+def test_redelivery_is_suppressed():
+    seen = SeenSet()
+    assert seen.check_and_add("conv|a1") is True
+    assert seen.check_and_add("conv|a1") is False
+    assert seen.stats() == {"keys": 1, "suppressed": 1}
+
+
+def test_discarded_key_is_processed_again():
+    # an activity rejected with 503 must not be swallowed on redelivery
+    seen = SeenSet()
+    seen.check_and_add("conv|a1")
+    seen.discard("conv|a1")
+    assert seen.check_and_add("conv|a1") is True
+
+
+def test_keys_expire_after_window():
+    seen = SeenSet(window=0.01)
+    seen.check_and_add("conv|a1")
+    time.sleep(0.02)
+    assert seen.check_and_add("conv|a1") is True
+
+
+def test_oldest_key_is_evicted_past_max_keys():
+    seen = SeenSet(max_keys=2)
+    for key in ("a", "b", "c"):
+        seen.check_and_add(key)
+    assert seen.check_and_add("a") is True
+    assert seen.check_and_add("c") is False
+
+
+# ------------------------------------------------------------------
+# IdempotentResults (Fusion create)
+# ------------------------------------------------------------------
+def test_repeat_returns_first_result():
+    results = IdempotentResults()
+    calls = []
+
+    def create():
+        calls.append(1)
+        return 201, {"SupplierId": len(calls)}
+
+    assert results.run("k", create) == (201, {"SupplierId": 1})
+    assert results.run("k", create) == (201, {"SupplierId": 1})
+    assert len(calls) == 1
+    assert results.replayed == 1
+
+
+def test_failures_are_not_cached():
+    results = IdempotentResults(should_cache=lambda r: 200 <= r[0] < 300)
+    outcomes = iter([(503, "busy"), (201, {"SupplierId": 1})])
+
+    assert results.run("k", lambda: next(outcomes))[0] == 503
+    assert results.run("k", lambda: next(outcomes))[0] == 201
+
+
+def test_concurrent_repeat_waits_for_the_first_call():
+    results = IdempotentResults()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_create():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 201, {"SupplierId": 1}
+
+    out = []
+    first = threading.Thread(target=lambda: out.append(results.run("k", slow_create)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: out.append(results.run("k", slow_create)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert out == [(201, {"SupplierId": 1})] * 2
+
+
+def test_make_key_depends_on_payload():
+    a = IdempotentResults.make_key("conv", payload={"Supplier": "Acme", "DUNSNumber": "1"})
+    b = IdempotentResults.make_key("conv", payload={"DUNSNumber": "1", "Supplier": "Acme"})
+    c = IdempotentResults.make_key("conv", payload={"Supplier": "Acme Ltd"})
+    assert a == b
+    assert a != c
@@ -0,0 +1,43 @@
+import json
+import logging
+
+from utils.log_setup import JsonFormatter, TextFormatter, redact
+
+
+def test_labelled_values_are_masked():
+    assert redact({"TaxpayerId": "12-3456789", "Supplier": "Acme"}) == {"TaxpayerId": "***", "Supplier": "Acme"}
+    assert redact("TaxpayerId: 12-3456789, 'password': 'hunter2'") == "TaxpayerId: ***, 'password': '***'"
+
+
+def test_bare_answers_are_masked():
+    activity = {"type": "message", "text": "12-3456789", "conversation": {"id": "c1"}}
+    assert redact(activity)["text"] == "***"
+    assert redact("Acme, EIN 12-3456789, DUNS 123456789") == "Acme, EIN ***, DUNS ***"
+    assert redact("ABN 51 824 753 556") == "ABN ***"
+
+
+def test_ordinary_numbers_are_kept():
+    for text in ("took 123.45 ms", "2026-10-17 12:00:00", "SupplierId 300000047261234", "conv 19:abc123456789def"):
+        assert redact(text) == text
+
+
+def test_long_strings_are_truncated():
+    assert redact("x" * 30, max_chars=10) == "x" * 10 + "... [20 chars truncated]"
+
+
+def make_record(msg, payload=None):
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, msg, None, None)
+    record.trace_id = "t1"
+    if payload is not None:
+        record.payload = payload
+    return record
+
+
+def test_both_formats_redact_the_payload():
+    record = make_record("AZURE PAYLOAD", {"text": "123456789", "channelId": "msteams"})
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["payload"] == {"text": "***", "channelId": "msteams"}
+
+    line = TextFormatter().format(record)
+    assert line == 'INFO:app:[t1] AZURE PAYLOAD {"text": "***", "channelId": "msteams"}'
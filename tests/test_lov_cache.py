@@ -0,0 +1,41 @@
+import pytest
+
+from utils import fast_extractor
+from utils.lov_cache import LovIndex
+
+# Fusion's own order, not the order the questions assume
+FUSION_VALUES = {
+    "TaxOrganizationType": ["Government Agency", "Individual", "Corporation"],
+    "SupplierType": ["Goods", "Services"],
+}
+FUSION_CODES = {"TaxOrganizationType": {"CORPORATION": "Corporation", "GOVERNMENT_AGENCY": "Government Agency"}}
+
+
+@pytest.fixture
+def lov(monkeypatch):
+    index = LovIndex(FUSION_VALUES, FUSION_CODES)
+    monkeypatch.setattr(fast_extractor, "get_lov_index", lambda: index)
+    return index
+
+
+def test_lookup_by_meaning_code_and_alias(lov):
+    assert lov.lookup("TaxOrganizationType", "corporation") == "Corporation"
+    assert lov.lookup("TaxOrganizationType", "government agency") == "Government Agency"
+    assert lov.lookup("TaxOrganizationType", "GOVERNMENT_AGENCY") == "Government Agency"
+    assert lov.lookup("TaxOrganizationType", "corp") == "Corporation"
+    assert lov.lookup("TaxOrganizationType", "Partnership") is None
+
+
+@pytest.mark.parametrize("field, expected", [
+    ("TaxOrganizationType", "Corporation"),
+    ("SupplierType", "Services"),
+])
+def test_default_answer_does_not_depend_on_fusion_order(lov, field, expected):
+    assert fast_extractor.fast_extract(field, "use default") == {field: expected}
+
+
+def test_default_missing_from_fusion_falls_back_to_gemini(monkeypatch):
+    index = LovIndex({"SupplierType": ["Goods"]})
+    monkeypatch.setattr(fast_extractor, "get_lov_index", lambda: index)
+    assert index.default("SupplierType") is None
+    assert fast_extractor.fast_extract("SupplierType", "default") is None
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from utils.outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), workers=1, max_attempts=3, retry_base=0)
+    yield box
+    box.stop()
+
+
+def test_repeated_confirm_is_not_enqueued_twice(outbox):
+    assert outbox.enqueue("k1", {"Supplier": "Acme"}, {}) is True
+    assert outbox.enqueue("k1", {"Supplier": "Acme"}, {}) is False
+    assert outbox.stats()["depth"] == 1
+    assert outbox.get("k1")["status"] == "pending"
+
+
+def test_retryable_result_goes_back_to_pending(outbox):
+    outbox.enqueue("k1", {"Supplier": "Acme"}, {})
+    done = []
+
+    item = outbox._claim()
+    assert item["attempts"] == 1
+    outbox._settle(item, 503, "busy", lambda *a: done.append(a))
+
+    assert outbox.get("k1")["status"] == "pending"
+    assert done == []
+
+    item = outbox._claim()
+    assert item["attempts"] == 2
+    outbox._settle(item, 201, {"SupplierId": 1}, lambda *a: done.append(a))
+
+    assert outbox.get("k1") == {"status": "done", "attempts": 2, "result": {"SupplierId": 1}}
+    assert len(done) == 1
+
+
+def test_gives_up_after_max_attempts(outbox):
+    outbox.enqueue("k1", {}, {})
+    done = []
+    for _ in range(3):
+        outbox._settle(outbox._claim(), 500, "down", lambda item, status, body: done.append(status))
+
+    assert outbox.get("k1")["status"] == "failed"
+    assert done == [500]
+
+
+def test_failed_item_is_reopened_as_a_retry(outbox):
+    outbox.enqueue("k1", {}, {"turns": 1})
+    outbox._settle(outbox._claim(), 400, "bad", lambda *a: None)
+    assert outbox.get("k1")["status"] == "failed"
+
+    assert outbox.enqueue("k1", {}, {"turns": 2}) is True
+    item = outbox._claim()
+    # counts as a retry, so the caller checks whether the create already landed
+    assert item["attempts"] == 2
+    assert item["context"] == {"turns": 2}
+
+
+def test_done_item_is_not_reopened(outbox):
+    outbox.enqueue("k1", {}, {})
+    outbox._settle(outbox._claim(), 201, {"SupplierId": 1}, lambda *a: None)
+    assert outbox.enqueue("k1", {}, {}) is False
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), workers=1, lease_seconds=-1)
+    box.enqueue("k1", {}, {})
+
+    first = box._claim()
+    second = box._claim()           # the first claimer "crashed"
+    assert second["id"] == first["id"]
+    assert second["attempts"] == 2
+
+
+def test_workers_submit_and_report(outbox):
+    finished = threading.Event()
+    results = []
+
+    def on_done(item, status, body):
+        results.append((item["key"], status, body))
+        finished.set()
+
+    outbox.start(lambda item: (201, {"SupplierId": 7}), on_done)
+    outbox.enqueue("k1", {"Supplier": "Acme"}, {})
+
+    assert finished.wait(5)
+    assert results == [("k1", 201, {"SupplierId": 7})]
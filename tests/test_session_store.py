@@ -0,0 +1,65 @@
+import pytest
+
+from utils.session_store import InMemorySessionStore, SessionConflict, SqliteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteSessionStore(str(tmp_path / "sessions.db"))
+    return InMemorySessionStore()
+
+
+def test_save_bumps_the_version(store):
+    state = {"state": "COLLECTING", "turns": 1}
+    assert store.save("c1", state) == 1
+    assert state["_version"] == 1
+
+    loaded = store.get("c1")
+    assert loaded == {"state": "COLLECTING", "turns": 1, "_version": 1}
+    loaded["turns"] = 2
+    assert store.save("c1", loaded) == 2
+
+
+def test_stale_writer_is_rejected(store):
+    store.save("c1", {"turns": 1})
+    first, second = store.get("c1"), store.get("c1")
+
+    first["turns"] = 2
+    store.save("c1", first)
+    second["turns"] = 99
+    with pytest.raises(SessionConflict):
+        store.save("c1", second)
+
+    assert store.get("c1")["turns"] == 2
+    assert store.stats()["conflicts"] == 1
+
+
+def test_two_workers_starting_the_same_conversation(store):
+    store.save("c1", {"turns": 1})
+    with pytest.raises(SessionConflict):
+        store.save("c1", {"turns": 1})      # no _version: thinks the conversation is new
+
+
+def test_get_returns_a_private_copy(store):
+    store.save("c1", {"session": {"Supplier": "Acme"}})
+    store.get("c1")["session"]["Supplier"] = "changed"
+    assert store.get("c1")["session"] == {"Supplier": "Acme"}
+
+
+def test_idle_sessions_expire(store):
+    store.idle_ttl = -1
+    store.save("c1", {"turns": 1})
+    assert store.get("c1") is None
+    assert store.stats()["expired"] == 1
+
+
+def test_purge_and_delete(store):
+    store.save("c1", {})
+    store.save("c2", {})
+    store.delete("c1")
+    assert store.count() == 1
+
+    store.idle_ttl = -1
+    assert store.purge_expired() == 1
+    assert store.count() == 0
@@ -0,0 +1,94 @@
+import pytest
+
+import supplier_children
+from supplier_children import children_message, child_payload, create_children, plan_levels, split_payload
+
+
+# ------------------------------------------------------------------
+# Dependency levels
+# ------------------------------------------------------------------
+def test_sites_wait_for_addresses():
+    assert plan_levels(["sites", "addresses", "contacts"]) == [["addresses", "contacts"], ["sites"]]
+
+
+def test_independent_resources_share_one_level():
+    assert plan_levels(["contacts", "addresses"]) == [["contacts", "addresses"]]
+
+
+def test_missing_dependency_is_rejected():
+    with pytest.raises(ValueError, match="sites"):
+        plan_levels(["sites", "contacts"])
+
+
+def test_children_are_opt_in():
+    assert plan_levels([]) == []
+    assert supplier_children.LEVELS == plan_levels(supplier_children.SUPPLIER_CHILDREN)
+
+
+# ------------------------------------------------------------------
+# Payloads and creation
+# ------------------------------------------------------------------
+SESSION = {
+    "Supplier": "Acme", "TaxpayerCountry": "Germany",
+    "addresses.AddressName": "HQ", "addresses.City": "Berlin",
+    "sites.SupplierSite": "Berlin", "sites.ProcurementBU": None,
+    "contacts.Email": "ap@acme.example",
+}
+
+
+def test_split_payload():
+    header, children = split_payload(SESSION)
+    assert header == {"Supplier": "Acme", "TaxpayerCountry": "Germany"}
+    assert children == {
+        "addresses": {"AddressName": "HQ", "City": "Berlin"},
+        "sites": {"SupplierSite": "Berlin"},
+        "contacts": {"Email": "ap@acme.example"},
+    }
+
+
+def test_child_payload_takes_header_values_links_and_defaults():
+    header, children = split_payload(SESSION)
+    address = child_payload("addresses", children["addresses"], header, {})
+    assert address["Country"] == "Germany"
+    assert address["AddressPurposeOrderingFlag"] is True
+
+    site = child_payload("sites", children["sites"], header, {"addresses": {"SupplierAddressId": 7}})
+    assert site["SupplierAddressId"] == 7
+
+
+@pytest.fixture
+def fusion_children(monkeypatch):
+    posted, failing = [], set()
+
+    def create_child(supplier_id, name, payload):
+        posted.append((name, payload))
+        if name in failing:
+            return 500, "down"
+        key = "SupplierAddressId" if name == "addresses" else "Id"
+        return 201, {key: len(posted)}
+
+    monkeypatch.setattr(supplier_children, "create_child", create_child)
+    monkeypatch.setattr(supplier_children, "LEVELS", plan_levels(["addresses", "sites", "contacts"]))
+    return posted, failing
+
+
+def test_site_links_to_the_address_created_first(fusion_children):
+    posted, _ = fusion_children
+    header, children = split_payload(SESSION)
+    report = create_children(1, header, children)
+
+    assert set(report["created"]) == {"addresses", "sites", "contacts"}
+    assert [name for name, _ in posted][-1] == "sites"
+    address_id = report["created"]["addresses"]["SupplierAddressId"]
+    assert dict(posted)["sites"]["SupplierAddressId"] == address_id
+
+
+def test_failed_dependency_skips_what_links_to_it(fusion_children):
+    _, failing = fusion_children
+    failing.add("addresses")
+    header, children = split_payload(SESSION)
+    report = create_children(1, header, children)
+
+    assert report["failed"] == {"addresses": [500, "down"]}
+    assert report["skipped"] == {"sites": "addresses"}
+    assert "Nothing was rolled back" in children_message(report)
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from config.tenants import TenantRegistry, use_tenant
+from utils import supplier_index
+
+TENANTS = {
+    "default": "prod",
+    "tenants": {
+        "prod": {
+            "base_url": "https://prod.test",
+            "tenant_ids": ["entra-1"],
+            "channels": ["msteams"]
+        },
+        "test": {"base_url": "https://test.test", "channels": ["direct"]}
+    }
+}
+
+
+def write(path, data, mtime):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))      # a distinct mtime even within one clock tick
+
+
+@pytest.fixture
+def tenant_file(tmp_path):
+    path = tmp_path / "tenants.json"
+    write(path, TENANTS, 1_000_000)
+    return path
+
+
+def test_resolve_order(tenant_file):
+    registry = TenantRegistry(str(tenant_file), reload_interval=0)
+
+    assert registry.resolve({"channelId": "msteams", "channelData": {"fusionTenant": "test"}}) == "test"
+    assert registry.resolve({"channelId": "direct", "channelData": {"tenant": {"id": "entra-1"}}}) == "prod"
+    assert registry.resolve({"channelId": "direct", "conversation": {"tenantId": "entra-1"}}) == "prod"
+    assert registry.resolve({"channelId": "direct"}) == "test"
+    assert registry.resolve({"channelId": "webchat"}) == "prod"
+
+
+def test_get_falls_back_to_default(tenant_file):
+    registry = TenantRegistry(str(tenant_file), reload_interval=0)
+
+    assert registry.get("nope")[0] == "prod"
+    assert registry.get()[1]["base_url"] == "https://prod.test"
+    with use_tenant("test"):
+        assert registry.get()[0] == "test"
+
+
+def test_file_change_is_picked_up(tenant_file):
+    registry = TenantRegistry(str(tenant_file), reload_interval=0)
+    changed = json.loads(json.dumps(TENANTS))
+    changed["tenants"]["dev"] = {"base_url": "https://dev.test"}
+    write(tenant_file, changed, 1_000_010)
+
+    assert sorted(registry.names()) == ["dev", "prod", "test"]
+    assert registry.stats()["reloads"] == 2
+
+
+def test_broken_file_keeps_the_last_good_registry(tenant_file):
+    registry = TenantRegistry(str(tenant_file), reload_interval=0)
+
+    write(tenant_file, "{not json", 1_000_010)
+    assert sorted(registry.names()) == ["prod", "test"]
+
+    write(tenant_file, {"default": "gone", "tenants": {"x": {"base_url": "https://x.test"}}}, 1_000_020)
+    assert sorted(registry.names()) == ["prod", "test"]
+    assert registry.get()[0] == "prod"
+    assert registry.stats()["reload_errors"] == 2
+
+
+def test_password_comes_from_the_environment(tenant_file, monkeypatch):
+    monkeypatch.setenv("TEST_FUSION_PASSWORD", "s3cret")
+    data = json.loads(json.dumps(TENANTS))
+    data["tenants"]["test"]["password_env"] = "TEST_FUSION_PASSWORD"
+    write(tenant_file, data, 1_000_010)
+
+    registry = TenantRegistry(str(tenant_file), reload_interval=0)
+    assert registry.get("test")[1]["password"] == "s3cret"
+
+
+# ------------------------------------------------------------------
+# Duplicate index: one set of keys per tenant
+# ------------------------------------------------------------------
+def test_duplicate_index_is_kept_per_tenant(tenant_file, monkeypatch):
+    monkeypatch.setattr(supplier_index, "tenants", TenantRegistry(str(tenant_file), reload_interval=0))
+    index = supplier_index.SupplierIndex(enabled=False)
+
+    index.add({"SupplierId": 1, "Supplier": "Acme, Inc.", "DUNSNumber": "123456789"}, tenant="prod")
+
+    with use_tenant("prod"):
+        assert set(index.find_duplicates({"Supplier": "ACME inc", "DUNSNumber": "12-345-6789"})) == {
+            "Supplier", "DUNSNumber"
+        }
+    with use_tenant("test"):
+        assert index.find_duplicates({"Supplier": "Acme Inc"}) == {}
+    # no tenant on the turn -> the default tenant ("prod")
+    assert set(index.find_duplicates({"Supplier": "acme inc"})) == {"Supplier"}
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from utils import token_manager as tm
+
+
+class FakeTokenResponse:
+    def __init__(self, token, expires_in):
+        self._body = {"access_token": token, "expires_in": expires_in}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def token_server(monkeypatch):
+    """Counts token POSTs; `delay` slows each one down."""
+    server = {"calls": 0, "delay": 0.0, "expires_in": 3600}
+    lock = threading.Lock()
+
+    def post(url, data=None, headers=None, timeout=None):
+        with lock:
+            server["calls"] += 1
+            n = server["calls"]
+        time.sleep(server["delay"])
+        return FakeTokenResponse(f"token-{n}", server["expires_in"])
+
+    monkeypatch.setattr(tm.requests, "post", post)
+    return server
+
+
+def make_manager(**kwargs):
+    return tm.TokenManager("http://login.test/token", "id", "secret", "scope", **kwargs)
+
+
+def test_fresh_token_is_served_from_memory(token_server):
+    manager = make_manager()
+    assert manager.get_token() == "token-1"
+    for _ in range(100):
+        assert manager.get_token() == "token-1"
+
+    assert token_server["calls"] == 1
+    assert manager.stats()["misses"] == 1
+
+
+def test_concurrent_misses_share_one_refresh(token_server):
+    token_server["delay"] = 0.1
+    manager = make_manager()
+    tokens = []
+
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert token_server["calls"] == 1
+    assert tokens == ["token-1"] * 10
+
+
+def test_near_expiry_refreshes_once_in_background(token_server):
+    # expires_in - skew < refresh_margin: every hit is "near expiry"
+    manager = make_manager(refresh_margin=300, expiry_skew=60)
+    token_server["expires_in"] = 200
+    manager.get_token()
+
+    token_server["delay"] = 0.1
+    token_server["expires_in"] = 3600
+    started = time.monotonic()
+    for _ in range(50):
+        assert manager.get_token() == "token-1"    # hits never wait on the refresh
+    assert time.monotonic() - started < 0.1
+
+    deadline = time.monotonic() + 5
+    while manager.get_token() == "token-1" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.get_token() == "token-2"
+    assert token_server["calls"] == 2
+
+
+def test_invalidate_forces_a_refresh(token_server):
+    manager = make_manager()
+    manager.get_token()
+    manager.invalidate()
+    assert manager.get_token() == "token-2"
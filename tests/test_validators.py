@@ -0,0 +1,90 @@
+import re
+
+import pytest
+
+import batch_validator
+import fusion_validator
+from batch_validator import validate_rows
+from config.fusion_settings import CHILD_FIELD_FORMATS
+from fusion_validator import validate_against_fusion, validate_fields
+
+ROWS = [
+    {"Supplier": "Acme", "DUNSNumber": "123456789", "TaxpayerCountry": "United States",
+     "TaxpayerId": "12-3456789", "TaxOrganizationType": "Corporation", "SupplierType": "Services"},
+    {"Supplier": "Bad DUNS", "DUNSNumber": "12345"},
+    {"Supplier": "Bad EIN", "TaxpayerCountry": "United States", "TaxpayerId": "12-34"},
+    {"Supplier": "Bad PAN", "TaxpayerCountry": "India", "TaxpayerId": "ABC-DE"},
+    {"Supplier": "No rule", "TaxpayerCountry": "France", "TaxpayerId": "anything"},
+    {"Supplier": "Bad LOV", "SupplierType": "Widgets", "DUNSNumber": "1"},
+    {"Supplier": "Numbers", "DUNSNumber": 123456789, "TaxpayerId": None},
+]
+
+
+def test_single_row_and_batch_agree():
+    matrix = validate_rows(ROWS)
+    for i, row in enumerate(ROWS):
+        assert validate_against_fusion(row) == matrix.messages(i), row["Supplier"]
+
+
+def test_rule_messages():
+    assert validate_against_fusion(ROWS[0]) == []
+    assert validate_against_fusion(ROWS[1]) == ["DUNSNumber must be exactly 9 digits"]
+    assert validate_against_fusion(ROWS[2]) == [
+        "TaxpayerId must be a 9-digit EIN (xx-xxxxxxx) for United States. Received: 12-34"
+    ]
+    assert validate_against_fusion(ROWS[3]) == ["TaxpayerId must be a 10-character PAN for India. Received: ABC-DE"]
+    assert validate_against_fusion(ROWS[4]) == []
+    assert validate_against_fusion(ROWS[6]) == []
+
+
+def test_lov_errors_come_first():
+    assert validate_against_fusion(ROWS[5]) == [
+        "SupplierType must be one of ['Services']. Received: Widgets",
+        "DUNSNumber must be exactly 9 digits",
+    ]
+
+
+def test_invalid_rows():
+    assert list(validate_rows(ROWS).invalid_rows()) == [1, 2, 3, 5]
+
+
+def test_validate_fields_only_reports_requested_fields():
+    payload = {"DUNSNumber": "1", "TaxpayerCountry": "Canada", "TaxpayerId": "1"}
+    assert list(validate_fields(payload, ["DUNSNumber", "TaxpayerId"])) == ["DUNSNumber", "TaxpayerId"]
+    assert validate_fields(payload, ["Supplier"]) == {}
+
+
+# ------------------------------------------------------------------
+# Child answers (SUPPLIER_CHILDREN is opt-in; turn every format on)
+# ------------------------------------------------------------------
+@pytest.fixture
+def child_rules(monkeypatch):
+    patterns = {field: re.compile(rule["pattern"]) for field, rule in CHILD_FIELD_FORMATS.items()}
+    monkeypatch.setattr(fusion_validator, "CHILD_FIELD_RULES", CHILD_FIELD_FORMATS)
+    monkeypatch.setattr(fusion_validator, "CHILD_FIELD_PATTERNS", patterns)
+    monkeypatch.setattr(batch_validator, "CHILD_FIELD_RULES", CHILD_FIELD_FORMATS)
+
+
+CHILD_ROWS = [
+    {"Supplier": "Good", "addresses.PostalCode": "SW1A 1AA", "contacts.Email": "ap@acme.example"},
+    {"Supplier": "Bad email", "contacts.Email": "not-an-email"},
+    {"Supplier": "Bad postcode", "addresses.PostalCode": "!!"},
+    {"Supplier": "Numbers", "addresses.PostalCode": 10115},
+]
+
+
+def test_child_answers_are_checked(child_rules):
+    assert validate_against_fusion(CHILD_ROWS[0]) == []
+    assert validate_against_fusion(CHILD_ROWS[1]) == [
+        "contacts.Email must be an email address (name@example.com). Received: not-an-email"
+    ]
+    assert validate_against_fusion(CHILD_ROWS[2]) == [
+        "addresses.PostalCode must be a postal code (letters, digits, spaces or dashes). Received: !!"
+    ]
+    assert validate_against_fusion(CHILD_ROWS[3]) == []
+
+
+def test_child_rules_agree_in_batch(child_rules):
+    matrix = validate_rows(CHILD_ROWS)
+    for i, row in enumerate(CHILD_ROWS):
+        assert validate_against_fusion(row) == matrix.messages(i), row["Supplier"]
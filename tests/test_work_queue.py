@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from utils.work_queue import ConversationWorkQueue
+
+
+def test_submit_before_start_is_an_error():
+    queue = ConversationWorkQueue(lambda item: None)
+    with pytest.raises(RuntimeError):
+        queue.submit("c1", "turn")
+
+
+def test_rejects_past_max_depth():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(item):
+            await gate.wait()
+
+        queue = ConversationWorkQueue(handler, workers=1, max_depth=2)
+        queue.start()
+        accepted = [queue.submit("c1", i) for i in range(3)]
+        gate.set()
+        await queue.stop()
+        return accepted, queue.stats()
+
+    accepted, stats = asyncio.run(scenario())
+    assert accepted == [True, True, False]
+    assert stats["rejected"] == 1
+
+
+def test_turns_of_a_conversation_run_in_order():
+    async def scenario():
+        seen = []
+        done = asyncio.Event()
+
+        async def handler(item):
+            conversation, turn = item
+            # later turns finish first if they are allowed to overlap
+            await asyncio.sleep(0.01 * (3 - turn))
+            seen.append(item)
+            if len(seen) == 6:
+                done.set()
+
+        queue = ConversationWorkQueue(handler, workers=4)
+        queue.start()
+        for turn in range(3):
+            for conversation in ("a", "b"):
+                queue.submit(conversation, (conversation, turn))
+        await asyncio.wait_for(done.wait(), 5)
+        await queue.stop()
+        return seen
+
+    seen = asyncio.run(scenario())
+    for conversation in ("a", "b"):
+        assert [t for c, t in seen if c == conversation] == [0, 1, 2]
+
+
+def test_failed_turn_does_not_stop_the_conversation():
+    async def scenario():
+        seen = []
+        done = asyncio.Event()
+
+        async def handler(item):
+            if item == 0:
+                raise ValueError("boom")
+            seen.append(item)
+            done.set()
+
+        queue = ConversationWorkQueue(handler, workers=1)
+        queue.start()
+        queue.submit("c1", 0)
+        queue.submit("c1", 1)
+        await asyncio.wait_for(done.wait(), 5)
+        await queue.stop()
+        return seen, queue.stats()
+
+    seen, stats = asyncio.run(scenario())
+    assert seen == [1]
+    assert stats["failed"] == 1
+    assert stats["depth"] == 0
@@ -0,0 +1,255 @@
+import logging
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.http_retry import RETRY_STATUSES, retry_delay
+from utils.log_setup import log_payload
+from utils.metrics import track_stage
+
+logger = logging.getLogger("bot_sender")
+
+
+class SendQueueFull(Exception):
+    pass
+
+
+class BotSender:
+    """
+    Outbound Bot Framework messages.
+
+    - one keep-alive connection pool per serviceUrl
+    - bounded send queue drained by `workers` threads; messages of one
+      conversation are delivered in order, one request at a time
+    - a full queue makes `submit` wait up to `block_timeout` for room, then
+      reject; it never sends around the queue (that would reorder a conversation)
+    - 429/5xx retried honoring Retry-After; 401 refreshes the token once
+    - with `coalesce_window` > 0, messages queued for the same conversation
+      within that window go out as a single activity
+    """
+
+    def __init__(self, get_token, on_unauthorized=None, workers=8, max_queue=1000, block_timeout=2.0,
+                 coalesce_window=0.0, max_retries=3, pool_size=10, timeout=(5, 15)):
+        self.get_token = get_token
+        self.on_unauthorized = on_unauthorized
+        self.workers = workers
+        self.max_queue = max_queue
+        self.block_timeout = block_timeout
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        self._sessions = {}             # serviceUrl -> requests.Session
+        self._sessions_lock = threading.Lock()
+
+        self._pending = {}              # conversation_id -> [(queued_at, activity, text)]
+        self._scheduled = set()         # conversations waiting in / taken from _ready
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._depth = 0
+        self._threads = []
+
+        self.queued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failed = 0
+        self.overflow = 0
+
+    # --------------------------------------------------------------
+    # Connection pools
+    # --------------------------------------------------------------
+    def _session_for(self, service_url):
+        session = self._sessions.get(service_url)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(service_url)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._sessions[service_url] = session
+        return session
+
+    # --------------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------------
+    def start(self):
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"bot-sender-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        for _ in self._threads:
+            self._ready.put(None)
+        self._threads = []
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    # --------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------
+    def submit(self, activity, text, block=True):
+        """
+        Queue a reply; False when the sender is not running (caller sends inline).
+        Raises SendQueueFull if the queue is still full after `block_timeout`
+        (immediately with block=False).
+        """
+        if not self._threads:
+            return False
+        conversation_id = (activity.get("conversation") or {}).get("id", "")
+
+        with self._lock:
+            if self._depth >= self.max_queue:
+                if not block or not self._not_full.wait_for(
+                    lambda: self._depth < self.max_queue, self.block_timeout
+                ):
+                    if block:
+                        self.overflow += 1
+                    raise SendQueueFull(f"bot send queue full ({self.max_queue})")
+            self._pending.setdefault(conversation_id, []).append((time.monotonic(), activity, text))
+            self._depth += 1
+            self.queued += 1
+            if conversation_id not in self._scheduled:
+                self._scheduled.add(conversation_id)
+                self._ready.put(conversation_id)
+        return True
+
+    # --------------------------------------------------------------
+    # Consumer side
+    # --------------------------------------------------------------
+    def _worker(self):
+        while True:
+            conversation_id = self._ready.get()
+            if conversation_id is None:
+                return
+
+            if self.coalesce_window:
+                with self._lock:
+                    first_at = self._pending[conversation_id][0][0]
+                wait = self.coalesce_window - (time.monotonic() - first_at)
+                if wait > 0:
+                    time.sleep(wait)
+
+            with self._lock:
+                batch = self._pending.pop(conversation_id)
+                self._depth -= len(batch)
+                self._not_full.notify_all()
+
+            groups = [batch] if self.coalesce_window else [[m] for m in batch]
+            for group in groups:
+                _, activity, _ = group[0]
+                self.coalesced += len(group) - 1
+                self.send_now(activity, "\n\n".join(text for _, _, text in group))
+
+            # one sender per conversation at a time; requeue anything that
+            # arrived while we were sending
+            with self._lock:
+                if conversation_id in self._pending:
+                    self._ready.put(conversation_id)
+                else:
+                    self._scheduled.discard(conversation_id)
+
+    # --------------------------------------------------------------
+    # Delivery
+    # --------------------------------------------------------------
+    def send_now(self, activity, text):
+        with track_stage("send_activity") as t:
+            try:
+                t.outcome = self._deliver(activity, text)
+            except Exception:
+                logger.exception("Failed to send activity")
+                t.outcome = "error"
+        if t.outcome == "2xx":
+            self.sent += 1
+        else:
+            self.failed += 1
+        return t.outcome
+
+    def _deliver(self, activity, text):
+        # ✅ Normalize "from"
+        sender = activity.get("from") or activity.get("from_")
+        recipient = activity.get("recipient")
+
+        if not sender or not recipient:
+            log_payload(logger, "Invalid activity payload for sending message", activity, level=logging.ERROR)
+            return "invalid"
+
+        service_url = activity["serviceUrl"].rstrip("/")
+        url = f"{service_url}/v3/conversations/{activity['conversation']['id']}/activities"
+
+        payload = {
+            "type": "message",
+            "from": recipient,   # BOT
+            "recipient": sender, # USER
+            "conversation": activity["conversation"],
+            "replyToId": activity.get("id"),
+            "text": text
+        }
+
+        session = self._session_for(service_url)
+        reauthorized = False
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                r = session.post(
+                    url,
+                    json=payload,
+                    headers={"Authorization": f"Bearer {self.get_token()}"},
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt <= self.max_retries:
+                    self._sleep_before_retry(attempt, None)
+                    continue
+                logger.error("Bot connector unreachable: %s", e)
+                return "error"
+
+            if r.status_code == 401 and not reauthorized and self.on_unauthorized:
+                # token revoked / rotated early -> one retry with a fresh token
+                self.on_unauthorized()
+                reauthorized = True
+                continue
+
+            if r.status_code in RETRY_STATUSES and attempt <= self.max_retries:
+                self._sleep_before_retry(attempt, r.headers.get("Retry-After"))
+                continue
+
+            if r.status_code >= 300:
+                logger.warning("Bot connector returned %s: %s", r.status_code, r.text[:500])
+            return f"{r.status_code // 100}xx"
+
+    def _sleep_before_retry(self, attempt, retry_after):
+        self.retries += 1
+        delay = retry_delay(attempt, retry_after, base=0.5, cap=10.0)
+        logger.warning("Bot connector retry #%s in %.2fs", attempt, delay)
+        time.sleep(delay)
+
+    def stats(self):
+        return {
+            "depth": self._depth,
+            "conversations_pending": len(self._pending),
+            "workers": self.workers,
+            "service_urls": len(self._sessions),
+            "queued": self.queued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failed": self.failed,
+            "overflow": self.overflow,
+        }
@@ -0,0 +1,497 @@
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from config.fusion_settings import TAXPAYER_ID_RULES
+
+# ------------------------------------------------------------------
+# ISO 3166-1: alpha-2 | alpha-3 | short name (the value sent to Fusion)
+# ------------------------------------------------------------------
+ISO_3166 = """
+AF|AFG|Afghanistan
+AX|ALA|Aland Islands
+AL|ALB|Albania
+DZ|DZA|Algeria
+AS|ASM|American Samoa
+AD|AND|Andorra
+AO|AGO|Angola
+AI|AIA|Anguilla
+AQ|ATA|Antarctica
+AG|ATG|Antigua and Barbuda
+AR|ARG|Argentina
+AM|ARM|Armenia
+AW|ABW|Aruba
+AU|AUS|Australia
+AT|AUT|Austria
+AZ|AZE|Azerbaijan
+BS|BHS|Bahamas
+BH|BHR|Bahrain
+BD|BGD|Bangladesh
+BB|BRB|Barbados
+BY|BLR|Belarus
+BE|BEL|Belgium
+BZ|BLZ|Belize
+BJ|BEN|Benin
+BM|BMU|Bermuda
+BT|BTN|Bhutan
+BO|BOL|Bolivia
+BQ|BES|Bonaire, Sint Eustatius and Saba
+BA|BIH|Bosnia and Herzegovina
+BW|BWA|Botswana
+BV|BVT|Bouvet Island
+BR|BRA|Brazil
+IO|IOT|British Indian Ocean Territory
+BN|BRN|Brunei Darussalam
+BG|BGR|Bulgaria
+BF|BFA|Burkina Faso
+BI|BDI|Burundi
+CV|CPV|Cabo Verde
+KH|KHM|Cambodia
+CM|CMR|Cameroon
+CA|CAN|Canada
+KY|CYM|Cayman Islands
+CF|CAF|Central African Republic
+TD|TCD|Chad
+CL|CHL|Chile
+CN|CHN|China
+CX|CXR|Christmas Island
+CC|CCK|Cocos (Keeling) Islands
+CO|COL|Colombia
+KM|COM|Comoros
+CG|COG|Congo
+CD|COD|Congo, Democratic Republic of the
+CK|COK|Cook Islands
+CR|CRI|Costa Rica
+CI|CIV|Cote d'Ivoire
+HR|HRV|Croatia
+CU|CUB|Cuba
+CW|CUW|Curacao
+CY|CYP|Cyprus
+CZ|CZE|Czech Republic
+DK|DNK|Denmark
+DJ|DJI|Djibouti
+DM|DMA|Dominica
+DO|DOM|Dominican Republic
+EC|ECU|Ecuador
+EG|EGY|Egypt
+SV|SLV|El Salvador
+GQ|GNQ|Equatorial Guinea
+ER|ERI|Eritrea
+EE|EST|Estonia
+SZ|SWZ|Eswatini
+ET|ETH|Ethiopia
+FK|FLK|Falkland Islands (Malvinas)
+FO|FRO|Faroe Islands
+FJ|FJI|Fiji
+FI|FIN|Finland
+FR|FRA|France
+GF|GUF|French Guiana
+PF|PYF|French Polynesia
+TF|ATF|French Southern Territories
+GA|GAB|Gabon
+GM|GMB|Gambia
+GE|GEO|Georgia
+DE|DEU|Germany
+GH|GHA|Ghana
+GI|GIB|Gibraltar
+GR|GRC|Greece
+GL|GRL|Greenland
+GD|GRD|Grenada
+GP|GLP|Guadeloupe
+GU|GUM|Guam
+GT|GTM|Guatemala
+GG|GGY|Guernsey
+GN|GIN|Guinea
+GW|GNB|Guinea-Bissau
+GY|GUY|Guyana
+HT|HTI|Haiti
+HM|HMD|Heard Island and McDonald Islands
+VA|VAT|Holy See
+HN|HND|Honduras
+HK|HKG|Hong Kong
+HU|HUN|Hungary
+IS|ISL|Iceland
+IN|IND|India
+ID|IDN|Indonesia
+IR|IRN|Iran
+IQ|IRQ|Iraq
+IE|IRL|Ireland
+IM|IMN|Isle of Man
+IL|ISR|Israel
+IT|ITA|Italy
+JM|JAM|Jamaica
+JP|JPN|Japan
+JE|JEY|Jersey
+JO|JOR|Jordan
+KZ|KAZ|Kazakhstan
+KE|KEN|Kenya
+KI|KIR|Kiribati
+KP|PRK|Korea, Democratic People's Republic of
+KR|KOR|Korea, Republic of
+KW|KWT|Kuwait
+KG|KGZ|Kyrgyzstan
+LA|LAO|Lao People's Democratic Republic
+LV|LVA|Latvia
+LB|LBN|Lebanon
+LS|LSO|Lesotho
+LR|LBR|Liberia
+LY|LBY|Libya
+LI|LIE|Liechtenstein
+LT|LTU|Lithuania
+LU|LUX|Luxembourg
+MO|MAC|Macao
+MG|MDG|Madagascar
+MW|MWI|Malawi
+MY|MYS|Malaysia
+MV|MDV|Maldives
+ML|MLI|Mali
+MT|MLT|Malta
+MH|MHL|Marshall Islands
+MQ|MTQ|Martinique
+MR|MRT|Mauritania
+MU|MUS|Mauritius
+YT|MYT|Mayotte
+MX|MEX|Mexico
+FM|FSM|Micronesia
+MD|MDA|Moldova
+MC|MCO|Monaco
+MN|MNG|Mongolia
+ME|MNE|Montenegro
+MS|MSR|Montserrat
+MA|MAR|Morocco
+MZ|MOZ|Mozambique
+MM|MMR|Myanmar
+NA|NAM|Namibia
+NR|NRU|Nauru
+NP|NPL|Nepal
+NL|NLD|Netherlands
+NC|NCL|New Caledonia
+NZ|NZL|New Zealand
+NI|NIC|Nicaragua
+NE|NER|Niger
+NG|NGA|Nigeria
+NU|NIU|Niue
+NF|NFK|Norfolk Island
+MK|MKD|North Macedonia
+MP|MNP|Northern Mariana Islands
+NO|NOR|Norway
+OM|OMN|Oman
+PK|PAK|Pakistan
+PW|PLW|Palau
+PS|PSE|Palestine, State of
+PA|PAN|Panama
+PG|PNG|Papua New Guinea
+PY|PRY|Paraguay
+PE|PER|Peru
+PH|PHL|Philippines
+PN|PCN|Pitcairn
+PL|POL|Poland
+PT|PRT|Portugal
+PR|PRI|Puerto Rico
+QA|QAT|Qatar
+RE|REU|Reunion
+RO|ROU|Romania
+RU|RUS|Russian Federation
+RW|RWA|Rwanda
+BL|BLM|Saint Barthelemy
+SH|SHN|Saint Helena, Ascension and Tristan da Cunha
+KN|KNA|Saint Kitts and Nevis
+LC|LCA|Saint Lucia
+MF|MAF|Saint Martin (French part)
+PM|SPM|Saint Pierre and Miquelon
+VC|VCT|Saint Vincent and the Grenadines
+WS|WSM|Samoa
+SM|SMR|San Marino
+ST|STP|Sao Tome and Principe
+SA|SAU|Saudi Arabia
+SN|SEN|Senegal
+RS|SRB|Serbia
+SC|SYC|Seychelles
+SL|SLE|Sierra Leone
+SG|SGP|Singapore
+SX|SXM|Sint Maarten (Dutch part)
+SK|SVK|Slovakia
+SI|SVN|Slovenia
+SB|SLB|Solomon Islands
+SO|SOM|Somalia
+ZA|ZAF|South Africa
+GS|SGS|South Georgia and the South Sandwich Islands
+SS|SSD|South Sudan
+ES|ESP|Spain
+LK|LKA|Sri Lanka
+SD|SDN|Sudan
+SR|SUR|Suriname
+SJ|SJM|Svalbard and Jan Mayen
+SE|SWE|Sweden
+CH|CHE|Switzerland
+SY|SYR|Syrian Arab Republic
+TW|TWN|Taiwan
+TJ|TJK|Tajikistan
+TZ|TZA|Tanzania
+TH|THA|Thailand
+TL|TLS|Timor-Leste
+TG|TGO|Togo
+TK|TKL|Tokelau
+TO|TON|Tonga
+TT|TTO|Trinidad and Tobago
+TN|TUN|Tunisia
+TR|TUR|Turkey
+TM|TKM|Turkmenistan
+TC|TCA|Turks and Caicos Islands
+TV|TUV|Tuvalu
+UG|UGA|Uganda
+UA|UKR|Ukraine
+AE|ARE|United Arab Emirates
+GB|GBR|United Kingdom
+US|USA|United States
+UM|UMI|United States Minor Outlying Islands
+UY|URY|Uruguay
+UZ|UZB|Uzbekistan
+VU|VUT|Vanuatu
+VE|VEN|Venezuela
+VN|VNM|Viet Nam
+VG|VGB|Virgin Islands, British
+VI|VIR|Virgin Islands, U.S.
+WF|WLF|Wallis and Futuna
+EH|ESH|Western Sahara
+YE|YEM|Yemen
+ZM|ZMB|Zambia
+ZW|ZWE|Zimbabwe
+"""
+
+# colloquial / former names -> alpha-2
+ALIASES = {
+    "america": "US", "united states of america": "US", "u s": "US", "u s a": "US", "the us": "US",
+    "the usa": "US", "united states america": "US",
+    "uk": "GB", "great britain": "GB", "britain": "GB", "england": "GB", "scotland": "GB",
+    "wales": "GB", "northern ireland": "GB", "united kingdom of great britain and northern ireland": "GB",
+    "uae": "AE", "emirates": "AE",
+    "south korea": "KR", "korea": "KR", "republic of korea": "KR",
+    "north korea": "KP", "dprk": "KP",
+    "russia": "RU", "holland": "NL", "the netherlands": "NL", "czechia": "CZ",
+    "ivory coast": "CI", "cape verde": "CV", "swaziland": "SZ", "burma": "MM",
+    "macedonia": "MK", "vietnam": "VN", "laos": "LA", "syria": "SY", "iran islamic republic of": "IR",
+    "bolivia plurinational state of": "BO", "venezuela bolivarian republic of": "VE",
+    "tanzania united republic of": "TZ", "moldova republic of": "MD", "micronesia federated states of": "FM",
+    "vatican": "VA", "vatican city": "VA", "brunei": "BN", "east timor": "TL", "turkiye": "TR",
+    "drc": "CD", "dr congo": "CD", "democratic republic of the congo": "CD", "congo kinshasa": "CD",
+    "republic of the congo": "CG", "congo brazzaville": "CG", "palestine": "PS",
+    "deutschland": "DE", "espana": "ES", "brasil": "BR", "nederland": "NL", "schweiz": "CH",
+    "suisse": "CH", "osterreich": "AT", "prc": "CN", "mainland china": "CN", "hongkong": "HK",
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text):
+    # "Côte d'Ivoire" -> "cote d ivoire"
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _letter_mask(key):
+    # one bit per distinct character (folded keys are ASCII, ord >= 32)
+    mask = 0
+    for ch in key:
+        mask |= 1 << (ord(ch) - 32)
+    return mask
+
+
+def _distance(a, b, limit):
+    """
+    Optimal-string-alignment distance (adjacent swaps count 1), computed only
+    inside the |i - j| <= limit band; anything past `limit` returns limit + 1.
+    """
+    # a shared prefix / suffix never adds edits: only align the middle
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    over = limit + 1
+    prev2, prev = None, list(range(m + 1))
+    for i in range(1, n + 1):
+        ai = a[i - 1]
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        cur = [over] * (m + 1)
+        if lo == 1:
+            cur[0] = i
+        row_min = cur[lo - 1]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (ai != b[j - 1])
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            cur[j] = d
+            if d < row_min:
+                row_min = d
+        if row_min > limit:
+            return over
+        prev2, prev = prev, cur
+    return min(prev[m], over)
+
+
+class CountryIndex:
+    """
+    Every ISO-3166 name, alpha-2 / alpha-3 code and common alias, built once.
+
+    lookup(text) -> Fusion country name or None
+      1. exact folded match (names, codes, aliases)   dict hit
+      2. typo: edit distance to keys of similar length   no network, no LLM
+         sharing a leading letter; two countries equally close -> None
+    """
+
+    def __init__(self, table=ISO_3166, aliases=ALIASES):
+        self.names = {}             # alpha-2 -> short name
+        self._exact = {}            # folded key -> short name
+        # folded names / aliases for typo matching, by first and by second letter
+        self._by_first = defaultdict(list)
+        self._by_second = defaultdict(list)
+        self._candidates = {}       # key[:2] -> (lengths, entries) sorted by length, built on first use
+
+        for line in table.strip().splitlines():
+            alpha2, alpha3, name = line.split("|")
+            self.names[alpha2] = name
+            self._exact[alpha2.lower()] = name
+            self._exact[alpha3.lower()] = name
+            self._add_name(fold(name), name)
+            # "Korea, Republic of" -> also "republic of korea"
+            if ", " in name:
+                head, tail = name.split(", ", 1)
+                self._add_name(fold(f"{tail} {head}"), name)
+
+        for alias, alpha2 in aliases.items():
+            self._add_name(fold(alias), self.names[alpha2])
+
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _add_name(self, key, name):
+        self._exact[key] = name
+        # very short keys ("uk", "us") only ever match exactly
+        if len(key) >= 4:
+            entry = (key, _letter_mask(key))
+            self._by_first[key[0]].append(entry)
+            self._by_second[key[1]].append(entry)
+
+    def lookup(self, text):
+        if not text:
+            return None
+        key = fold(text)
+        name = self._exact.get(key)
+        if name is not None:
+            self.exact_hits += 1
+            return name
+        name = self._fuzzy(key) if len(key) >= 4 else None
+        if name is None:
+            self.misses += 1
+        else:
+            self.fuzzy_hits += 1
+        return name
+
+    def _fuzzy(self, key):
+        limit = 1 if len(key) <= 5 else 2 if len(key) <= 10 else 3
+
+        candidates = self._candidates.get(key[:2])
+        if candidates is None:
+            # a single edit at the front (swap, insert, drop, replace) still leaves
+            # key[0] or key[1] in one of the candidate's first two positions
+            unique = {}
+            for bucket in (self._by_first, self._by_second):
+                for letter in key[:2]:
+                    for entry in bucket.get(letter, ()):
+                        unique[entry[0]] = entry
+            entries = sorted(unique.values(), key=lambda e: len(e[0]))
+            candidates = self._candidates[key[:2]] = ([len(e[0]) for e in entries], entries)
+        lengths, entries = candidates
+
+        # lengths further apart than `limit` can't match
+        lo = bisect_left(lengths, len(key) - limit)
+        hi = bisect_right(lengths, len(key) + limit)
+
+        # every letter only one side has costs at least one edit: a lower bound
+        # that drops most candidates and orders the rest (likely matches first)
+        letters = _letter_mask(key)
+        shortlist = []
+        for candidate, candidate_letters in entries[lo:hi]:
+            floor = max((letters & ~candidate_letters).bit_count(), (candidate_letters & ~letters).bit_count())
+            if floor <= limit:
+                shortlist.append((floor, candidate))
+        shortlist.sort()
+
+        best, best_distance, tied = None, limit + 1, False
+        for floor, candidate in shortlist:
+            bound = min(limit, best_distance)
+            if floor > bound:
+                break
+            distance = _distance(key, candidate, bound)
+            if distance > bound:
+                continue
+            name = self._exact[candidate]
+            if distance < best_distance:
+                best, best_distance, tied = name, distance, False
+            elif name != best:
+                tied = True     # two countries equally close ("irak": Iraq / Iran): don't guess
+        return None if tied else best
+
+    def stats(self):
+        return {
+            "keys": len(self._exact),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }
+
+
+# ------------------------------------------------------------------
+# TaxpayerId formats (TAXPAYER_ID_RULES), compiled once
+# ------------------------------------------------------------------
+_SEPARATORS = re.compile(r"[-\s.]")
+_CHARSETS = {"digits": r"\d", "alnum": r"[0-9A-Za-z]"}
+
+TAXPAYER_ID_PATTERNS = {
+    country: re.compile(rf"{_CHARSETS[rule['charset']]}{{{rule['length']}}}")
+    for country, rule in TAXPAYER_ID_RULES.items()
+}
+
+
+def normalize_taxpayer_id(country, value):
+    """
+    Strips separators / spaces; re-applies the country's display format
+    (e.g. US EIN "12-3456789") when the rule has one. Unknown countries and
+    values that don't fit the rule are only trimmed.
+    """
+    if not value:
+        return value
+    value = str(value).strip()
+    pattern = TAXPAYER_ID_PATTERNS.get(country)
+    if pattern is None:
+        return value
+    compact = _SEPARATORS.sub("", value).upper()
+    if not pattern.fullmatch(compact):
+        return value
+    fmt = TAXPAYER_ID_RULES[country].get("format")
+    if not fmt:
+        return compact
+    chars = iter(compact)
+    return "".join(next(chars) if c == "#" else c for c in fmt)
+
+
+country_index = CountryIndex()
+
+
+def lookup_country(text):
+    return country_index.lookup(text)
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------------------------------------------------
+# Bounded pool for blocking I/O (Gemini, Fusion, Bot Framework)
+# ------------------------------------------------------------------
+IO_WORKERS = int(os.getenv("AGENT_IO_WORKERS", "32"))
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=IO_WORKERS,
+            thread_name_prefix="agent-io"
+        )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking call on the bounded I/O pool so the event loop stays free.
+    """
+    loop = asyncio.get_running_loop()
+    # carry contextvars (trace id) into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(ctx.run, func, *args, **kwargs)
+    )
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
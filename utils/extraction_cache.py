@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", (text or "").strip().lower())
+
+
+class ExtractionCache:
+    """
+    Memoizes LLM extraction results.
+
+    - in-memory LRU bounded by `max_entries`, entries expire after `ttl` seconds
+    - optional SQLite tier (`db_path`) so a restart keeps the warm set
+    - identical concurrent lookups share one upstream call
+    """
+
+    def __init__(self, max_entries=5000, ttl=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+
+        self._entries = OrderedDict()   # key -> (value, expires_at, size)
+        self._inflight = {}             # key -> Future
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._open_db()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    # --------------------------------------------------------------
+    # Keys
+    # --------------------------------------------------------------
+    @staticmethod
+    def make_key(text, *parts):
+        raw = "\x1f".join([normalize_text(text), *map(str, parts)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    # --------------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------------
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove_locked(key)
+
+        value = self._db_get(key, now)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+            self._store_memory(key, value, now + self.ttl)
+            return value
+
+        return None
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl
+        self._store_memory(key, value, expires_at)
+        self._db_put(key, value, expires_at)
+
+    def get_or_compute(self, key, compute, should_cache=bool):
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+            if should_cache(value):
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # --------------------------------------------------------------
+    # Memory tier
+    # --------------------------------------------------------------
+    def _store_memory(self, key, value, expires_at):
+        size = len(json.dumps(value, default=str))
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    # --------------------------------------------------------------
+    # Disk tier (SQLite)
+    # --------------------------------------------------------------
+    def _open_db(self):
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM extraction_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error:
+            logging.exception("Extraction cache disk tier disabled")
+            self._db = None
+
+    def _db_get(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value FROM extraction_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+        except sqlite3.Error:
+            logging.exception("Extraction cache read failed")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _db_put(self, key, value, expires_at):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._db.commit()
+        except sqlite3.Error:
+            logging.exception("Extraction cache write failed")
+
+    # --------------------------------------------------------------
+    # Metrics
+    # --------------------------------------------------------------
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "disk_tier": self._db is not None,
+        }
@@ -0,0 +1,83 @@
+import re
+from collections import defaultdict
+
+from config.fusion_settings import CHILD_FIELDS
+from utils.lov_cache import get_lov_index
+from utils.countries import lookup_country
+
+# ------------------------------------------------------------------
+# Rule-based extraction for single-value answers (no LLM call)
+# ------------------------------------------------------------------
+DUNS_PATTERN = re.compile(r"^\s*(\d{2})-?(\d{3})-?(\d{4})\s*$")
+
+# one token, letters / digits / dashes, at least one digit (EIN, VAT, ...)
+TAXPAYER_ID_PATTERN = re.compile(r"^\s*(?=[A-Za-z0-9\-]*\d)([A-Za-z0-9][A-Za-z0-9\-]{3,19})\s*$")
+
+DEFAULT_ANSWERS = {"default", "use default", "the default", "yes default"}
+
+
+hits = defaultdict(int)
+misses = defaultdict(int)
+
+
+def _extract(current_field, text):
+    key = text.strip().lower().rstrip(".")
+
+    if current_field in CHILD_FIELDS:
+        # free text (address line, site name, contact): taken as typed
+        return {current_field: text.strip()}
+
+    if current_field == "DUNSNumber":
+        m = DUNS_PATTERN.match(text)
+        return {current_field: "".join(m.groups())} if m else None
+
+    if current_field == "TaxpayerId":
+        m = TAXPAYER_ID_PATTERN.match(text)
+        return {current_field: m.group(1)} if m else None
+
+    if current_field == "TaxpayerCountry":
+        country = lookup_country(key)
+        return {current_field: country} if country else None
+
+    lov = get_lov_index()
+    if current_field in lov.fields:
+        canonical = lov.lookup(current_field, key)
+        if canonical:
+            return {current_field: canonical}
+        default = lov.default(current_field) if key in DEFAULT_ANSWERS else None
+        if default:
+            return {current_field: default}
+
+    return None
+
+
+def fast_extract(current_field, text):
+    """
+    Return {current_field: value} when the answer is unambiguous,
+    or None so the caller falls back to Gemini.
+    """
+    if not current_field or not text:
+        return None
+
+    result = _extract(current_field, text)
+
+    if result is None:
+        misses[current_field] += 1
+    else:
+        hits[current_field] += 1
+
+    return result
+
+
+def stats():
+    total_hits = sum(hits.values())
+    total = total_hits + sum(misses.values())
+    return {
+        "hits": total_hits,
+        "misses": total - total_hits,
+        "hit_rate": round(total_hits / total, 4) if total else 0.0,
+        "by_field": {
+            field: {"hits": hits[field], "misses": misses[field]}
+            for field in sorted(set(hits) | set(misses))
+        },
+    }
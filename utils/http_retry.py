@@ -0,0 +1,36 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+# statuses worth retrying for any upstream we call (Fusion, Bot connector)
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# the only ones that also say the request was NOT processed: safe to resend a
+# POST; a 502/504 from a gateway may come after the create already landed
+NOT_PROCESSED_STATUSES = {429, 503}
+
+
+def parse_retry_after(value):
+    """
+    Retry-After header (delta-seconds or HTTP date) -> seconds, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, retry_after=None, base=0.5, cap=10.0):
+    """
+    Retry-After when the server sent one, else full jitter: uniform(0, base * 2^n).
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = random.uniform(0, base * (2 ** (attempt - 1)))
+    return min(delay, cap)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class SeenSet:
+    """
+    Bounded, time-windowed set of keys (Bot Framework activity ids).
+
+    check_and_add(key) -> True the first time a key is seen inside `window`
+    seconds, False for a redelivery. Oldest keys are evicted past `max_keys`.
+    """
+
+    def __init__(self, window=600, max_keys=50000):
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = OrderedDict()    # key -> first seen (monotonic)
+        self._lock = threading.Lock()
+
+        self.suppressed = 0
+
+    def check_and_add(self, key):
+        now = time.monotonic()
+
+        with self._lock:
+            # expire from the old end; insertion order == time order
+            while self._seen:
+                oldest, seen_at = next(iter(self._seen.items()))
+                if now - seen_at <= self.window:
+                    break
+                del self._seen[oldest]
+
+            if key in self._seen:
+                self.suppressed += 1
+                return False
+
+            self._seen[key] = now
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+            return True
+
+    def discard(self, key):
+        # the key's activity was not accepted after all; let its redelivery in
+        with self._lock:
+            self._seen.pop(key, None)
+
+    def stats(self):
+        return {"keys": len(self._seen), "suppressed": self.suppressed}
+
+
+class IdempotentResults:
+    """
+    First-result cache for side-effecting calls (the Fusion create).
+
+    run(key, fn) calls fn() once per key; a repeat with the same key inside
+    `ttl` returns the stored result, and a concurrent repeat waits for the
+    first call instead of issuing its own. Only results accepted by
+    `should_cache` are kept, so a failed create can still be retried.
+    """
+
+    def __init__(self, ttl=600, max_keys=10000, should_cache=None):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.should_cache = should_cache or (lambda result: True)
+        self._results = OrderedDict()   # key -> (result, expires_at)
+        self._inflight = {}             # key -> threading.Event
+        self._lock = threading.Lock()
+
+        self.replayed = 0
+
+    @staticmethod
+    def make_key(*parts, payload=None):
+        raw = "\x1f".join(map(str, parts))
+        if payload is not None:
+            raw += "\x1f" + json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def run(self, key, fn):
+        while True:
+            with self._lock:
+                entry = self._results.get(key)
+                if entry is not None and entry[1] > time.monotonic():
+                    self.replayed += 1
+                    return entry[0]
+
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    break
+
+            # same key already running: wait, then re-check the stored result
+            event.wait()
+
+        try:
+            result = fn()
+            if self.should_cache(result):
+                with self._lock:
+                    self._results[key] = (result, time.monotonic() + self.ttl)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_keys:
+                        self._results.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def stats(self):
+        return {"keys": len(self._results), "replayed": self.replayed}
@@ -0,0 +1,181 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+
+from utils.tracing import TraceIdFilter
+
+# values of these keys are masked wherever they appear in a logged payload;
+# "text" is what the user typed (bare answers to the TaxpayerId / DUNS questions)
+REDACT_KEYS = {
+    "taxpayerid", "dunsnumber", "password", "client_secret",
+    "authorization", "access_token", "token", "text"
+}
+# catches "TaxpayerId: 12-3456789" / "'DUNSNumber': '123456789'" inside plain strings
+_REDACT_INLINE = re.compile(
+    r"""(?i)(["']?(?:taxpayerid|dunsnumber|client_secret|password)["']?\s*[:=]\s*["']?)([^"',}\s]+)"""
+)
+# unlabelled ID-shaped numbers: 9-11 digits, plain or in the usual groupings
+# ("EIN 12-3456789", "DUNS 12-345-6789", "BN 123 456 789", "ABN 51 824 753 556")
+_REDACT_DIGITS = re.compile(
+    r"(?<![\w.-])"
+    r"(?:\d{9,11}|\d{2}-\d{7}|\d{2}-\d{3}-\d{4}|\d{3}[- ]\d{3}[- ]\d{3}|\d{2} \d{3} \d{3} \d{3})"
+    r"(?![\w-]|\.\d)"
+)
+
+_listener = None
+
+
+# ------------------------------------------------------------------
+# Redaction / truncation
+# ------------------------------------------------------------------
+def redact(value, max_chars=2000):
+    if isinstance(value, dict):
+        return {
+            k: "***" if str(k).lower() in REDACT_KEYS else redact(v, max_chars)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        items = [redact(v, max_chars) for v in value[:50]]
+        if len(value) > 50:
+            items.append(f"... {len(value) - 50} more")
+        return items
+    if isinstance(value, str):
+        value = _REDACT_DIGITS.sub("***", _REDACT_INLINE.sub(r"\1***", value))
+        if len(value) > max_chars:
+            return value[:max_chars] + f"... [{len(value) - max_chars} chars truncated]"
+    return value
+
+
+# ------------------------------------------------------------------
+# JSON formatter (runs on the listener thread, not the request path)
+# ------------------------------------------------------------------
+class JsonFormatter(logging.Formatter):
+
+    def __init__(self, max_chars=2000):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage(), self.max_chars),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id and trace_id != "-":
+            entry["trace_id"] = trace_id
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            entry["payload"] = redact(payload, self.max_chars)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+# ------------------------------------------------------------------
+# Text formatter (LOG_FORMAT != json): same redaction, payload appended
+# ------------------------------------------------------------------
+class TextFormatter(logging.Formatter):
+
+    def __init__(self, max_chars=2000):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record):
+        line = "{}:{}:[{}] {}".format(
+            record.levelname,
+            record.name,
+            getattr(record, "trace_id", "-"),
+            redact(record.getMessage(), self.max_chars)
+        )
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            line += " " + json.dumps(redact(payload, self.max_chars), default=str, ensure_ascii=False)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue the record as-is: the stock QueueHandler formats the message on
+    the calling thread, which is exactly the cost we are moving off it.
+    A full queue drops the record instead of blocking the request.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info:
+            # don't keep frames alive across threads; render the traceback now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DeferredQueueHandler.dropped += 1
+
+
+# ------------------------------------------------------------------
+# Sampling
+# ------------------------------------------------------------------
+def should_sample(rate):
+    return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+def log_payload(logger, message, payload, rate=1.0, level=logging.INFO):
+    """
+    Sampled structured payload logging; the payload itself is only
+    redacted / truncated / serialized on the listener thread.
+    """
+    if logger.isEnabledFor(level) and should_sample(rate):
+        logger.log(level, message, extra={"payload": payload})
+
+
+# ------------------------------------------------------------------
+# Setup
+# ------------------------------------------------------------------
+def setup_logging(level="INFO", json_output=True, max_chars=2000, queue_size=10000):
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(
+        JsonFormatter(max_chars) if json_output else TextFormatter(max_chars)
+    )
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = _DeferredQueueHandler(log_queue)
+    # trace id lives in a contextvar, so capture it on the calling thread
+    handler.addFilter(TraceIdFilter())
+
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def dropped_records():
+    return _DeferredQueueHandler.dropped
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
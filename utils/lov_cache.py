@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from config.fusion_settings import (
+    FUSION_ALLOWED_VALUES,
+    LOV_DEFAULTS,
+    LOV_ENDPOINT,
+    LOV_LOOKUP_TYPES,
+    LOV_CACHE_PATH,
+    LOV_TTL,
+    LOV_REMOTE_ENABLED
+)
+from utils.normalizer import FUSION_TAX_ORG_TYPE, FUSION_SUPPLIER_TYPE
+
+logger = logging.getLogger("lov_cache")
+
+# hand-maintained synonyms on top of Fusion's own codes / meanings
+LOV_ALIASES = {
+    "TaxOrganizationType": FUSION_TAX_ORG_TYPE,
+    "SupplierType": FUSION_SUPPLIER_TYPE,
+}
+
+
+class LovIndex:
+    """
+    Immutable lookup index built once per LOV refresh.
+
+    allowed(field)        -> canonical values accepted by Fusion
+    lookup(field, value)  -> canonical value for any case / code / alias, or None
+    default(field)        -> LOV_DEFAULTS value as Fusion spells it, or None
+    """
+
+    def __init__(self, values, codes=None):
+        self.values = {field: list(v) for field, v in values.items()}
+        self._allowed = {field: frozenset(v) for field, v in self.values.items()}
+        self._index = {}
+
+        for field, allowed in self.values.items():
+            index = {}
+            for alias, canonical in LOV_ALIASES.get(field, {}).items():
+                if canonical in self._allowed[field]:
+                    index[alias.lower()] = canonical
+            for code, canonical in (codes or {}).get(field, {}).items():
+                index[code.strip().lower()] = canonical
+                index[code.strip().lower().replace("_", " ")] = canonical
+            for canonical in allowed:
+                index[canonical.lower()] = canonical
+            self._index[field] = index
+
+    @property
+    def fields(self):
+        return list(self.values)
+
+    def allowed(self, field):
+        return self.values.get(field)
+
+    def is_allowed(self, field, value):
+        return value in self._allowed.get(field, ())
+
+    def lookup(self, field, value):
+        if not value or field not in self._index:
+            return None
+        return self._index[field].get(str(value).strip().lower())
+
+    def default(self, field):
+        # None when Fusion no longer offers the configured default
+        return self.lookup(field, LOV_DEFAULTS.get(field))
+
+
+class LovCache:
+    """
+    LOV values from Fusion's lookup resources.
+
+    - served from memory; readers never wait on Fusion
+    - persisted to `path` so a restart starts warm
+    - refreshed in the background once older than `ttl`
+    - falls back to FUSION_ALLOWED_VALUES when nothing else is available
+    """
+
+    def __init__(self, path=LOV_CACHE_PATH, ttl=LOV_TTL, remote_enabled=LOV_REMOTE_ENABLED):
+        self.path = path
+        self.ttl = ttl
+        self.remote_enabled = remote_enabled
+
+        self._index = LovIndex(FUSION_ALLOWED_VALUES)
+        self._fetched_at = 0.0
+        self._source = "defaults"
+        self._refreshing = False
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+        self._load_disk()
+
+    # --------------------------------------------------------------
+    # Read side
+    # --------------------------------------------------------------
+    @property
+    def index(self):
+        if self.remote_enabled and self.is_stale() and time.time() >= self._retry_at:
+            self.refresh_async()
+        return self._index
+
+    def is_stale(self):
+        return time.time() - self._fetched_at > self.ttl
+
+    # --------------------------------------------------------------
+    # Refresh
+    # --------------------------------------------------------------
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_guarded, name="lov-refresh", daemon=True).start()
+
+    def _refresh_guarded(self):
+        try:
+            self.refresh()
+        except Exception:
+            self.refresh_errors += 1
+            # don't retry on every read while Fusion is down
+            self._retry_at = time.time() + min(self.ttl, 60)
+            logger.exception("LOV refresh failed, keeping the current LOVs (source: %s)", self._source)
+        finally:
+            self._refreshing = False
+
+    def refresh(self):
+        values, codes = self._fetch_remote()
+        self._install(values, codes, time.time(), "fusion")
+        self._save_disk(values, codes)
+        self.refreshes += 1
+
+    def _fetch_remote(self):
+        from fusion_client import get_fusion_client
+
+        client = get_fusion_client()
+        values, codes = {}, {}
+
+        for field, lookup_type in LOV_LOOKUP_TYPES.items():
+            response = client.get(
+                LOV_ENDPOINT,
+                params={
+                    "q": f"LookupType='{lookup_type}'",
+                    "fields": "LookupCode,Meaning",
+                    "limit": 500,
+                    "onlyData": "true"
+                }
+            )
+            response.raise_for_status()
+            items = response.json().get("items", [])
+
+            meanings = [i["Meaning"] for i in items if i.get("Meaning")]
+            if not meanings:
+                # unknown lookup type on this pod: keep the seed values
+                meanings = list(FUSION_ALLOWED_VALUES.get(field, []))
+            values[field] = meanings
+            codes[field] = {i["LookupCode"]: i["Meaning"] for i in items if i.get("LookupCode") and i.get("Meaning")}
+
+        return values, codes
+
+    def _install(self, values, codes, fetched_at, source):
+        index = LovIndex(values, codes)
+        # single reference swap; readers see either the old or the new index
+        self._index = index
+        self._fetched_at = fetched_at
+        self._source = source
+
+    # --------------------------------------------------------------
+    # Disk tier
+    # --------------------------------------------------------------
+    def _load_disk(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._install(data["values"], data.get("codes", {}), data["fetched_at"], "disk")
+        except (OSError, ValueError, KeyError):
+            logger.warning("Ignoring unreadable LOV cache file %s", self.path)
+
+    def _save_disk(self, values, codes):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"fetched_at": self._fetched_at, "values": values, "codes": codes}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.exception("Could not write LOV cache file %s", self.path)
+
+    # --------------------------------------------------------------
+    # Background refresher
+    # --------------------------------------------------------------
+    def start(self, interval=None):
+        if not self.remote_enabled or self._thread is not None:
+            return
+        interval = interval or max(60, self.ttl // 2)
+
+        def run():
+            if self.is_stale():
+                self._refresh_guarded_sync()
+            while not self._stop.wait(interval):
+                self._refresh_guarded_sync()
+
+        self._thread = threading.Thread(target=run, name="lov-refresher", daemon=True)
+        self._thread.start()
+
+    def _refresh_guarded_sync(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._refresh_guarded()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "source": self._source,
+            "age_seconds": int(time.time() - self._fetched_at) if self._fetched_at else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "values": sum(len(v) for v in self._index.values.values()),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_lov_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LovCache()
+    return _cache
+
+
+def get_lov_index():
+    return get_lov_cache().index
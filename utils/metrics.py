@@ -0,0 +1,175 @@
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+# ------------------------------------------------------------------
+# Metric types (Prometheus semantics, no external dependency)
+# ------------------------------------------------------------------
+class Counter:
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_label_str(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram:
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}   # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    data[i] += 1
+                    break
+            else:
+                data[len(self.buckets)] += 1
+            data[-1] += value
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for upper, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, [('le', upper)])} {cumulative}")
+            cumulative += data[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {data[-1]}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+# ------------------------------------------------------------------
+# Registry
+# ------------------------------------------------------------------
+class Registry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def register_stats(self, component, stats_fn):
+        """
+        Expose an existing `stats()` dict as gauges:
+        {"hits": 3, "breaker": {"opened": 1}} -> agent_<component>_hits, agent_<component>_breaker_opened
+        """
+        self._collectors.append((component, stats_fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        for component, stats_fn in self._collectors:
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for name, value in _flatten(f"agent_{component}", stats):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(prefix, value):
+    if isinstance(value, bool):
+        yield prefix, int(value)
+    elif isinstance(value, (int, float)):
+        yield prefix, value
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            key = "".join(c if c.isalnum() else "_" for c in str(k)).strip("_").lower()
+            yield from _flatten(f"{prefix}_{key}", v)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "agent_stage_duration_seconds",
+    "Time spent per supplier-flow stage",
+    ("stage", "outcome")
+)
+STAGE_TOTAL = REGISTRY.counter(
+    "agent_stage_total",
+    "Supplier-flow stage executions",
+    ("stage", "outcome")
+)
+
+
+class _Stage:
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def track_stage(stage):
+    """
+    with track_stage("fusion_create") as t:
+        ...
+        t.outcome = "4xx"     # optional; exceptions record "error"
+    """
+    t = _Stage()
+    started = time.perf_counter()
+    try:
+        yield t
+    except BaseException:
+        t.outcome = "error"
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, outcome=t.outcome)
+        STAGE_TOTAL.inc(stage=stage, outcome=t.outcome)
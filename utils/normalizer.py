@@ -1,46 +1,58 @@
+from utils.countries import lookup_country, normalize_taxpayer_id
+
+FUSION_TAX_ORG_TYPE = {
+    "corporation": "Corporation",
+    "corp": "Corporation",
+    "company": "Corporation"
+}
+
+FUSION_SUPPLIER_TYPE = {
+    "services": "Services",
+    "service": "Services",
+    "provided services": "Services"
+}
+
+# legacy spellings; utils.countries covers every ISO-3166 country
+FUSION_COUNTRY = {
+    "us": "United States",
+    "usa": "United States",
+    "united states": "United States"
+}
+
+
+def normalize(value, mapping):
+    if not value:
+        return None
+    key = value.strip().lower()
+    return mapping.get(key)
+
+
 def normalize_supplier_payload(payload: dict) -> dict:
     """
     Normalize LLM output to Oracle Fusion LOV-compliant values
     """
 
-    FUSION_TAX_ORG_TYPE = {
-        "corporation": "Corporation",
-        "corp": "Corporation",
-        "company": "Corporation"
-    }
-
-    FUSION_SUPPLIER_TYPE = {
-        "services": "Services",
-        "service": "Services",
-        "provided services": "Services"
-    }
-
-    FUSION_COUNTRY = {
-        "us": "United States",
-        "usa": "United States",
-        "united states": "United States"
-    }
-
-    def normalize(value, mapping):
-        if not value:
-            return None
-        key = value.strip().lower()
-        return mapping.get(key)
-
-    # 🔒 FORCE Fusion-approved values
-    payload["TaxOrganizationType"] = normalize(
-        payload.get("TaxOrganizationType"),
-        FUSION_TAX_ORG_TYPE
+    from utils.lov_cache import get_lov_index
+    lov = get_lov_index()
+
+    # 🔒 FORCE Fusion-approved values (LOV index: values, codes, aliases)
+    payload["TaxOrganizationType"] = lov.lookup(
+        "TaxOrganizationType",
+        payload.get("TaxOrganizationType")
     )
 
-    payload["SupplierType"] = normalize(
-        payload.get("SupplierType"),
-        FUSION_SUPPLIER_TYPE
+    payload["SupplierType"] = lov.lookup(
+        "SupplierType",
+        payload.get("SupplierType")
     )
 
-    payload["TaxpayerCountry"] = normalize(
-        payload.get("TaxpayerCountry"),
-        FUSION_COUNTRY
+    # ISO-3166 names, codes, aliases and typos -> Fusion country name
+    payload["TaxpayerCountry"] = lookup_country(payload.get("TaxpayerCountry"))
+
+    # "12 345 6789" -> "12-3456789" (per-country TaxpayerId rules)
+    payload["TaxpayerId"] = normalize_taxpayer_id(
+        payload["TaxpayerCountry"],
+        payload.get("TaxpayerId")
     )
 
     # Defaults
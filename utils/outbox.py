@@ -0,0 +1,246 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("outbox")
+
+
+def is_retryable(status):
+    return status == 429 or status >= 500
+
+
+class Outbox:
+    """
+    Durable queue of confirmed Fusion submissions (SQLite, WAL).
+
+    - enqueue() commits the payload before the user is acknowledged
+    - `workers` threads claim items with a lease, so an item held by a
+      crashed process is picked up again once the lease runs out
+    - 429 / 5xx results are retried with jittered exponential backoff up to
+      `max_attempts`; anything else is final and reported via `on_done`
+    """
+
+    def __init__(self, path, workers=4, max_attempts=8, retry_base=2.0,
+                 retry_max=300.0, lease_seconds=600, busy_timeout=5):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease_seconds = lease_seconds
+        self.busy_timeout = busy_timeout
+
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.enqueued = 0
+        self.duplicates = 0
+        self.submitted = 0
+        self.retried = 0
+        self.failed = 0
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL UNIQUE,"
+            " payload TEXT NOT NULL,"
+            " context TEXT NOT NULL,"
+            " status TEXT NOT NULL,"          # pending / in_progress / done / failed
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " lease_until REAL,"
+            " result TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    # --------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------
+    def enqueue(self, key, payload, context):
+        """
+        Returns False if `key` is already pending / in progress / done
+        (repeated confirm). A `failed` item with the same key is re-opened,
+        so confirming again retries it; it restarts at attempts=1 so its next
+        claim counts as a retry (the caller checks whether it already landed).
+        """
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO outbox"
+            " (key, payload, context, status, next_attempt_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, 'pending', ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            "  status = 'pending', attempts = 1, context = excluded.context,"
+            "  next_attempt_at = excluded.next_attempt_at, lease_until = NULL,"
+            "  result = NULL, updated_at = excluded.updated_at"
+            " WHERE outbox.status = 'failed'",
+            (key, json.dumps(payload), json.dumps(context), now, now, now)
+        )
+        if cur.rowcount == 0:
+            self.duplicates += 1
+            return False
+        self.enqueued += 1
+        self._wake.set()
+        return True
+
+    def get(self, key):
+        """
+        {"status", "attempts", "result"} of the item with `key`, or None.
+        """
+        row = self._conn().execute(
+            "SELECT status, attempts, result FROM outbox WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "attempts": row[1], "result": json.loads(row[2]) if row[2] else None}
+
+    # --------------------------------------------------------------
+    # Consumer side
+    # --------------------------------------------------------------
+    def start(self, submit, on_done):
+        """
+        submit(item) -> (status, body); on_done(item, status, body) runs once
+        per item when it succeeds or fails for good.
+        """
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._worker, args=(submit, on_done), name=f"outbox-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._threads = []
+
+    def _worker(self, submit, on_done):
+        while not self._stop.is_set():
+            try:
+                item = self._claim()
+            except sqlite3.Error:
+                logger.exception("Outbox claim failed")
+                item = None
+
+            if item is None:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+
+            try:
+                status, body = submit(item)
+            except Exception as e:
+                logger.exception("Outbox submit failed for item %s", item["id"])
+                status, body = 503, str(e)
+
+            try:
+                self._settle(item, status, body, on_done)
+            except Exception:
+                logger.exception("Outbox could not settle item %s", item["id"])
+
+    def _claim(self):
+        conn = self._conn()
+        now = time.time()
+
+        # BEGIN IMMEDIATE: one claimer at a time across threads and processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, key, payload, context, attempts, created_at FROM outbox"
+                " WHERE (status = 'pending' AND next_attempt_at <= ?)"
+                "    OR (status = 'in_progress' AND lease_until < ?)"
+                " ORDER BY id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE outbox SET status = 'in_progress', attempts = attempts + 1,"
+                " lease_until = ?, updated_at = ? WHERE id = ?",
+                (now + self.lease_seconds, now, row[0])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {
+            "id": row[0],
+            "key": row[1],
+            "payload": json.loads(row[2]),
+            "context": json.loads(row[3]),
+            "attempts": row[4] + 1,
+            "created_at": row[5],
+        }
+
+    def _settle(self, item, status, body, on_done):
+        now = time.time()
+
+        if is_retryable(status) and item["attempts"] < self.max_attempts:
+            delay = min(self.retry_max, random.uniform(0, self.retry_base * (2 ** item["attempts"])))
+            self._conn().execute(
+                "UPDATE outbox SET status = 'pending', next_attempt_at = ?, lease_until = NULL,"
+                " result = ?, updated_at = ? WHERE id = ?",
+                (now + delay, json.dumps(body, default=str), now, item["id"])
+            )
+            self.retried += 1
+            logger.warning("Outbox item %s got %s, retry #%s in %.1fs", item["id"], status, item["attempts"], delay)
+            return
+
+        final = "done" if 200 <= status < 300 else "failed"
+        self._conn().execute(
+            "UPDATE outbox SET status = ?, lease_until = NULL, result = ?, updated_at = ? WHERE id = ?",
+            (final, json.dumps(body, default=str), now, item["id"])
+        )
+        if final == "done":
+            self.submitted += 1
+        else:
+            self.failed += 1
+        on_done(item, status, body)
+
+    # --------------------------------------------------------------
+    # Housekeeping / metrics
+    # --------------------------------------------------------------
+    def purge(self, older_than=7 * 86400):
+        cur = self._conn().execute(
+            "DELETE FROM outbox WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - older_than,)
+        )
+        return cur.rowcount
+
+    def stats(self):
+        depth, oldest = self._conn().execute(
+            "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE status IN ('pending', 'in_progress')"
+        ).fetchone()
+        return {
+            "depth": depth,
+            "oldest_age_seconds": round(time.time() - oldest, 1) if oldest else 0,
+            "workers": self.workers,
+            "enqueued": self.enqueued,
+            "duplicates": self.duplicates,
+            "submitted": self.submitted,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
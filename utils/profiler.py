@@ -0,0 +1,79 @@
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler: every `interval` seconds it records the
+    stack of every thread. Output is collapsed-stack text (flamegraph.pl /
+    speedscope compatible). Start/stop at runtime; off by default.
+    """
+
+    def __init__(self):
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.interval = 0.01
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.01):
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return self.collapsed()
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            return self.collapsed()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = ";".join(
+                    f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})"
+                    for f in traceback.extract_stack(frame)
+                )
+                self._stacks[f"{names.get(ident, ident)};{stack}"] += 1
+            self.samples += 1
+
+    def collapsed(self, top=None):
+        items = self._stacks.most_common(top)
+        return "\n".join(f"{stack} {count}" for stack, count in items) + "\n"
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval": self.interval,
+            "distinct_stacks": len(self._stacks),
+        }
+
+
+profiler = SamplingProfiler()
@@ -1,7 +1,14 @@
-from config.fusion_settings import REQUIRED_FIELDS, DEFAULT_VALUES
+import threading
+
+from config.fusion_settings import COLLECTED_FIELDS, DEFAULT_VALUES
+
+# turns per conversation that ended in a created supplier
+_created = {"suppliers": 0, "turns": 0}
+_created_lock = threading.Lock()
+
 
 def init_session():
-    session = {field: None for field in REQUIRED_FIELDS}
+    session = {field: None for field in COLLECTED_FIELDS}
     session.update(DEFAULT_VALUES)
     return session
 
@@ -14,4 +21,19 @@ def merge_session(session, extracted):
 
 
 def get_missing_fields(session):
-    return [f for f in REQUIRED_FIELDS if not session.get(f)]
+    return [f for f in COLLECTED_FIELDS if not session.get(f)]
+
+
+def record_created(turns):
+    with _created_lock:
+        _created["suppliers"] += 1
+        _created["turns"] += turns or 0
+
+
+def conversation_stats():
+    with _created_lock:
+        created, turns = _created["suppliers"], _created["turns"]
+    return {
+        "suppliers_created": created,
+        "avg_turns_per_supplier": round(turns / created, 2) if created else 0.0,
+    }
@@ -0,0 +1,214 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class SessionConflict(Exception):
+    """Raised when a conversation was updated by someone else since it was read."""
+
+
+class SessionStore(ABC):
+    """
+    Conversation state keyed by conversation id.
+
+    `get` returns a private copy carrying a `_version`; `save` only succeeds
+    if that version is still current (and bumps it on the caller's dict), so
+    concurrent workers / processes cannot silently overwrite each other's turn.
+    """
+
+    def __init__(self, idle_ttl=3600):
+        self.idle_ttl = idle_ttl
+        self.conflicts = 0
+        self.expired = 0
+
+    @abstractmethod
+    def get(self, conversation_id):
+        ...
+
+    @abstractmethod
+    def save(self, conversation_id, state):
+        ...
+
+    @abstractmethod
+    def delete(self, conversation_id):
+        ...
+
+    @abstractmethod
+    def purge_expired(self):
+        ...
+
+    @abstractmethod
+    def count(self):
+        ...
+
+    def stats(self):
+        return {
+            "backend": type(self).__name__,
+            "sessions": self.count(),
+            "idle_ttl": self.idle_ttl,
+            "conflicts": self.conflicts,
+            "expired": self.expired,
+        }
+
+
+# ------------------------------------------------------------------
+# In-memory backend (single process)
+# ------------------------------------------------------------------
+class InMemorySessionStore(SessionStore):
+
+    def __init__(self, idle_ttl=3600):
+        super().__init__(idle_ttl)
+        self._data = {}     # conversation_id -> (state, version, updated_at)
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        with self._lock:
+            entry = self._data.get(conversation_id)
+            if entry is None:
+                return None
+            state, version, updated_at = entry
+            if time.time() - updated_at > self.idle_ttl:
+                del self._data[conversation_id]
+                self.expired += 1
+                return None
+            state = copy.deepcopy(state)
+        state["_version"] = version
+        return state
+
+    def save(self, conversation_id, state):
+        expected = state.get("_version", 0)
+        data = {k: v for k, v in state.items() if k != "_version"}
+        with self._lock:
+            entry = self._data.get(conversation_id)
+            current = entry[1] if entry else 0
+            if current != expected:
+                self.conflicts += 1
+                raise SessionConflict(conversation_id)
+            self._data[conversation_id] = (copy.deepcopy(data), current + 1, time.time())
+        state["_version"] = current + 1
+        return current + 1
+
+    def delete(self, conversation_id):
+        with self._lock:
+            self._data.pop(conversation_id, None)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            stale = [k for k, (_, _, ts) in self._data.items() if ts < cutoff]
+            for k in stale:
+                del self._data[k]
+        self.expired += len(stale)
+        return len(stale)
+
+    def count(self):
+        return len(self._data)
+
+
+# ------------------------------------------------------------------
+# SQLite backend (WAL; shared by all workers on the host)
+# ------------------------------------------------------------------
+class SqliteSessionStore(SessionStore):
+
+    def __init__(self, path, idle_ttl=3600, busy_timeout=5):
+        super().__init__(idle_ttl)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " conversation_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, conversation_id):
+        row = self._conn().execute(
+            "SELECT state, version, updated_at FROM sessions WHERE conversation_id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        state, version, updated_at = row
+        if time.time() - updated_at > self.idle_ttl:
+            self._conn().execute(
+                "DELETE FROM sessions WHERE conversation_id = ? AND version = ?",
+                (conversation_id, version)
+            )
+            self.expired += 1
+            return None
+
+        state = json.loads(state)
+        state["_version"] = version
+        return state
+
+    def save(self, conversation_id, state):
+        expected = state.get("_version", 0)
+        data = {k: v for k, v in state.items() if k != "_version"}
+        conn = self._conn()
+
+        # BEGIN IMMEDIATE takes the write lock up front -> atomic read-check-write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT version FROM sessions WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+            current = row[0] if row else 0
+            if current != expected:
+                self.conflicts += 1
+                raise SessionConflict(conversation_id)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (conversation_id, state, version, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                (conversation_id, json.dumps(data), current + 1, time.time())
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        state["_version"] = current + 1
+        return current + 1
+
+    def delete(self, conversation_id):
+        self._conn().execute("DELETE FROM sessions WHERE conversation_id = ?", (conversation_id,))
+
+    def purge_expired(self):
+        cur = self._conn().execute(
+            "DELETE FROM sessions WHERE updated_at < ?",
+            (time.time() - self.idle_ttl,)
+        )
+        self.expired += cur.rowcount
+        return cur.rowcount
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend, path=None, idle_ttl=3600):
+    if backend == "sqlite":
+        logging.info(f"Using SQLite session store at {path}")
+        return SqliteSessionStore(path, idle_ttl=idle_ttl)
+    if backend != "memory":
+        logging.warning(f"Unknown SESSION_STORE '{backend}', falling back to memory")
+    return InMemorySessionStore(idle_ttl=idle_ttl)
@@ -0,0 +1,52 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """
+    Per-subsystem startup timings (imports, lazy client creation, warm-up),
+    a coarse per-subsystem view of `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.first_healthy = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, subsystem):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(subsystem, time.perf_counter() - t0)
+
+    def record(self, subsystem, seconds):
+        with self._lock:
+            self.timings[subsystem] = self.timings.get(subsystem, 0.0) + seconds
+
+    def mark_healthy(self):
+        if self.first_healthy is None:
+            self.first_healthy = time.perf_counter() - self.started
+
+    def report(self):
+        with self._lock:
+            timings = sorted(self.timings.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "since_import_seconds": round(time.perf_counter() - self.started, 3),
+            "first_healthy_seconds": round(self.first_healthy, 3) if self.first_healthy is not None else None,
+            "subsystems_ms": {name: round(s * 1000, 1) for name, s in timings},
+        }
+
+    def log(self):
+        r = self.report()
+        logging.info(
+            "Startup report: %s",
+            ", ".join(f"{k}={v}ms" for k, v in r["subsystems_ms"].items())
+        )
+
+
+startup_report = StartupReport()
@@ -0,0 +1,250 @@
+import logging
+import re
+import threading
+import time
+
+from config.fusion_settings import (
+    SUPPLIER_ENDPOINT,
+    SUPPLIER_INDEX_ENABLED,
+    SUPPLIER_INDEX_PAGE_SIZE,
+    SUPPLIER_INDEX_SYNC_INTERVAL
+)
+from config.tenants import tenants, use_tenant
+
+logger = logging.getLogger("supplier_index")
+
+INDEX_FIELDS = "SupplierId,Supplier,SupplierNumber,TaxpayerId,DUNSNumber,LastUpdateDate"
+
+# supplier field -> key normalizer
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(value):
+    # "ACME, Inc." / "acme inc" -> "acme inc"
+    return _NON_ALNUM.sub(" ", str(value).casefold()).strip()
+
+
+def normalize_taxpayer_id(value):
+    return _NON_ALNUM.sub("", str(value).casefold())
+
+
+def normalize_duns(value):
+    return re.sub(r"\D", "", str(value))
+
+
+KEY_FIELDS = {
+    "Supplier": normalize_name,
+    "TaxpayerId": normalize_taxpayer_id,
+    "DUNSNumber": normalize_duns,
+}
+
+
+class _TenantKeys:
+    # one tenant's suppliers; replaced wholesale, never shared between tenants
+    def __init__(self):
+        self.keys = {field: {} for field in KEY_FIELDS}   # field -> key -> supplier
+        self.by_id = {}                                    # SupplierId -> supplier
+        self.bootstrapped = False
+        self.last_update = None     # highest LastUpdateDate seen (Fusion ISO string)
+        self.last_sync = None
+
+
+class SupplierIndex:
+    """
+    In-memory index of existing Fusion suppliers for pre-submit duplicate checks.
+
+    - one set of keys per Fusion tenant; lookups and adds use the current
+      turn's tenant (config/tenants.py), so pods never see each other's suppliers
+    - bootstrapped with paginated reads of the suppliers resource
+    - kept current by polling for LastUpdateDate > last seen
+    - lookups are plain dict hits; they never touch Fusion
+    """
+
+    def __init__(self, page_size=SUPPLIER_INDEX_PAGE_SIZE, enabled=SUPPLIER_INDEX_ENABLED):
+        self.page_size = page_size
+        self.enabled = enabled
+
+        self._tenants = {}          # tenant name -> _TenantKeys
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.sync_errors = 0
+        self.hits = 0
+        self.checks = 0
+
+    def _for(self, tenant=None):
+        name, _ = tenants.get(tenant)
+        index = self._tenants.get(name)
+        if index is None:
+            with self._lock:
+                index = self._tenants.setdefault(name, _TenantKeys())
+        return index
+
+    # --------------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------------
+    def find_duplicates(self, payload):
+        """
+        Returns {field: existing supplier} for every key field in `payload`
+        that already belongs to a supplier in the current tenant's Fusion.
+        """
+        self.checks += 1
+        keys = self._for().keys
+        found = {}
+        for field, normalize in KEY_FIELDS.items():
+            value = payload.get(field)
+            if not value:
+                continue
+            key = normalize(value)
+            match = keys[field].get(key) if key else None
+            if match is not None:
+                found[field] = match
+        if found:
+            self.hits += 1
+        return found
+
+    # --------------------------------------------------------------
+    # Updates
+    # --------------------------------------------------------------
+    def add(self, supplier, tenant=None):
+        index = self._for(tenant)
+        supplier_id = supplier.get("SupplierId")
+        record = {
+            "SupplierId": supplier_id,
+            "Supplier": supplier.get("Supplier"),
+            "SupplierNumber": supplier.get("SupplierNumber"),
+        }
+
+        with self._lock:
+            # a renamed / re-keyed supplier must not keep its old keys
+            previous = index.by_id.get(supplier_id) if supplier_id is not None else None
+            if previous is not None:
+                for field, keys in index.keys.items():
+                    old = previous["_keys"].get(field)
+                    if old and keys.get(old) is previous:
+                        del keys[old]
+
+            record["_keys"] = {}
+            for field, normalize in KEY_FIELDS.items():
+                value = supplier.get(field)
+                key = normalize(value) if value else ""
+                if key:
+                    record["_keys"][field] = key
+                    index.keys[field][key] = record
+
+            if supplier_id is not None:
+                index.by_id[supplier_id] = record
+
+            updated = supplier.get("LastUpdateDate")
+            if updated and (index.last_update is None or updated > index.last_update):
+                index.last_update = updated
+
+    def sync(self):
+        # every tenant in the registry; tenants dropped on reload are forgotten
+        names = tenants.names()
+        with self._lock:
+            for name in set(self._tenants) - set(names):
+                del self._tenants[name]
+
+        for name in names:
+            try:
+                with use_tenant(name):
+                    self._sync_tenant(name, self._for(name))
+            except Exception:
+                self.sync_errors += 1
+                logger.exception("Supplier index sync failed for tenant %s", name)
+
+    def _sync_tenant(self, name, index):
+        if not index.bootstrapped:
+            t0 = time.perf_counter()
+            count = self._sync(name, index, query=None)
+            index.bootstrapped = True
+            logger.info("Supplier index bootstrapped for %s: %s suppliers in %.1fs",
+                        name, count, time.perf_counter() - t0)
+            return
+        if index.last_update is None:
+            self._sync(name, index, query=None)
+            return
+        # ">=": suppliers sharing the last timestamp may have landed after our read
+        count = self._sync(name, index, query=f"LastUpdateDate>='{index.last_update}'")
+        if count:
+            logger.info("Supplier index for %s: %s suppliers added/updated", name, count)
+
+    def _sync(self, name, index, query):
+        from fusion_client import get_fusion_client
+
+        client = get_fusion_client(name)
+        offset = 0
+        count = 0
+
+        while True:
+            params = {
+                "fields": INDEX_FIELDS,
+                "limit": self.page_size,
+                "offset": offset,
+                "orderBy": "LastUpdateDate",
+                "onlyData": "true"
+            }
+            if query:
+                params["q"] = query
+
+            response = client.get(SUPPLIER_ENDPOINT, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            items = data.get("items", [])
+            for supplier in items:
+                self.add(supplier, tenant=name)
+            count += len(items)
+
+            if not data.get("hasMore") or not items:
+                break
+            offset += len(items)
+
+        index.last_sync = time.time()
+        return count
+
+    # --------------------------------------------------------------
+    # Background sync
+    # --------------------------------------------------------------
+    def start(self, interval=SUPPLIER_INDEX_SYNC_INTERVAL):
+        if not self.enabled or self._thread is not None:
+            return
+
+        def run():
+            while True:
+                self.sync()
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=run, name="supplier-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        indexes = dict(self._tenants)
+        synced = [i.last_sync for i in indexes.values() if i.last_sync]
+        return {
+            "enabled": self.enabled,
+            "bootstrapped": bool(indexes) and all(i.bootstrapped for i in indexes.values()),
+            "suppliers": {name: len(i.by_id) for name, i in indexes.items()},
+            "last_sync_age_seconds": int(time.time() - min(synced)) if synced else None,
+            "sync_errors": self.sync_errors,
+            "checks": self.checks,
+            "duplicates_found": self.hits,
+        }
+
+
+supplier_index = SupplierIndex()
+
+
+def duplicate_message(duplicates):
+    lines = [
+        f"- {field} matches existing supplier **{s['Supplier']}** "
+        f"(Supplier Number: {s.get('SupplierNumber') or 'N/A'})"
+        for field, s in duplicates.items()
+    ]
+    return "⚠️ A supplier with these details already exists in Fusion:\n" + "\n".join(lines)
@@ -0,0 +1,129 @@
+import threading
+import time
+import logging
+import requests
+
+
+class TokenManager:
+    """
+    Caches the Bot Framework access token until shortly before it expires.
+
+    - Fresh token  -> served from memory (hit)
+    - Near expiry  -> served from memory, refreshed once in the background
+    - Expired      -> callers block on a single shared refresh (miss)
+    """
+
+    def __init__(self, token_url, client_id, client_secret, scope,
+                 refresh_margin=300, expiry_skew=60, timeout=10):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.expiry_skew = expiry_skew
+        self.timeout = timeout
+
+        self._token = None
+        self._expires_at = 0.0
+        # held for the duration of one refresh (single-flight); cache hits never wait on it
+        self._refresh_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    # --------------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------------
+    def get_token(self):
+        now = time.monotonic()
+        token = self._token
+
+        if token and now < self._expires_at:
+            self.hits += 1
+            if now >= self._expires_at - self.refresh_margin:
+                self._start_background_refresh()
+            return token
+
+        # ---- expired: single-flight refresh ----
+        with self._refresh_lock:
+            if self._token and time.monotonic() < self._expires_at:
+                # another caller refreshed while we waited
+                self.hits += 1
+                return self._token
+
+            self.misses += 1
+            self._refresh()
+            return self._token
+
+    def invalidate(self):
+        self._expires_at = 0.0
+        self._token = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "expires_in": max(0, int(self._expires_at - time.monotonic())),
+        }
+
+    # --------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------
+    def _start_background_refresh(self):
+        # try-acquire: a refresh already running means nothing to do
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(
+                target=self._background_worker,
+                name="bot-token-refresh",
+                daemon=True
+            ).start()
+        except BaseException:
+            self._refresh_lock.release()
+            raise
+
+    def _background_worker(self):
+        # runs holding _refresh_lock (taken by _start_background_refresh)
+        try:
+            # skip if someone already renewed the token
+            if time.monotonic() < self._expires_at - self.refresh_margin:
+                return
+            self._refresh()
+        except Exception:
+            # keep serving the current token until it actually expires
+            logging.exception("Background Bot Framework token refresh failed")
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self):
+        # caller holds _refresh_lock; readers keep using the old token meanwhile
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": self.scope
+        }
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+
+        try:
+            r = requests.post(self.token_url, data=data, headers=headers, timeout=self.timeout)
+            r.raise_for_status()
+            body = r.json()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+
+        expires_in = int(body.get("expires_in", 3600))
+
+        self._token = body["access_token"]
+        self._expires_at = time.monotonic() + max(0, expires_in - self.expiry_skew)
+        self.refreshes += 1
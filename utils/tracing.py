@@ -0,0 +1,22 @@
+import contextvars
+import logging
+import uuid
+
+# per-turn trace id; copied into executor threads by utils.executor.run_blocking
+trace_id_var = contextvars.ContextVar("trace_id", default="-")
+
+
+def new_trace_id(conversation_id=None):
+    # short conversation prefix keeps one conversation's turns greppable
+    prefix = (conversation_id or "")[-8:].replace(":", "")
+    trace_id = f"{prefix}-{uuid.uuid4().hex[:12]}" if prefix else uuid.uuid4().hex[:12]
+    trace_id_var.set(trace_id)
+    return trace_id
+
+
+class TraceIdFilter(logging.Filter):
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
+
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+
+class ConversationWorkQueue:
+    """
+    Background work queue for webhook activities.
+
+    - Turns of the same conversation run strictly in arrival order
+    - Different conversations are processed in parallel by `workers` tasks
+    - `max_depth` bounds the total number of queued turns
+    """
+
+    def __init__(self, handler, workers=8, max_depth=1000):
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+
+        self._pending = {}          # conversation_id -> deque[(enqueued_at, item)]
+        self._scheduled = set()     # conversations waiting in / taken from _ready
+        self._ready = None
+        self._tasks = []
+        self._depth = 0
+
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.processing_total = 0.0
+        self.processing_max = 0.0
+
+    # --------------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------------
+    def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"conversation-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --------------------------------------------------------------
+    # Producer side
+    # --------------------------------------------------------------
+    def submit(self, conversation_id, item):
+        if self._ready is None:
+            raise RuntimeError("ConversationWorkQueue.start() has not been called")
+
+        if self._depth >= self.max_depth:
+            self.rejected += 1
+            return False
+
+        self._pending.setdefault(conversation_id, deque()).append((time.monotonic(), item))
+        self._depth += 1
+        self.enqueued += 1
+
+        if conversation_id not in self._scheduled:
+            self._scheduled.add(conversation_id)
+            self._ready.put_nowait(conversation_id)
+
+        return True
+
+    # --------------------------------------------------------------
+    # Consumer side
+    # --------------------------------------------------------------
+    async def _worker(self):
+        while True:
+            conversation_id = await self._ready.get()
+            pending = self._pending[conversation_id]
+            enqueued_at, item = pending.popleft()
+            self._depth -= 1
+
+            started = time.monotonic()
+            wait = started - enqueued_at
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+            try:
+                await self.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                logging.exception("Failed to process activity for conversation %s", conversation_id)
+            finally:
+                elapsed = time.monotonic() - started
+                self.processed += 1
+                self.processing_total += elapsed
+                self.processing_max = max(self.processing_max, elapsed)
+
+                # one turn at a time per conversation; requeue at the back so
+                # a chatty conversation cannot starve the others
+                if pending:
+                    self._ready.put_nowait(conversation_id)
+                else:
+                    self._pending.pop(conversation_id, None)
+                    self._scheduled.discard(conversation_id)
+
+    # --------------------------------------------------------------
+    # Metrics
+    # --------------------------------------------------------------
+    def stats(self):
+        done = self.processed or 1
+        return {
+            "depth": self._depth,
+            "conversations_pending": len(self._pending),
+            "workers": self.workers,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_avg_ms": round(self.wait_total / done * 1000, 2),
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "processing_avg_ms": round(self.processing_total / done * 1000, 2),
+            "processing_max_ms": round(self.processing_max * 1000, 2),
+        }